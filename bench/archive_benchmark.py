@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Callable
+
+sys.path.append("/etc/dfr")
+from dfr_scripts.common import mirrorStore  # noqa: E402
+from dfr_scripts.common.mountindex import treeSize  # noqa: E402
+
+# Compares the two install paths of GitPythonOSSTool from a warm mirror store:
+#  * checkout: a working tree (with recursive submodules) checked out from the mirrors, then
+#    copied into the install folder with rsync (every byte is written twice).
+#  * archive: the trees streamed from the mirrors with `git archive` into the install folder.
+# Nothing is installed under /mnt, and no root access is needed (the install folder is temporary).
+# usage: archive_benchmark.py [--repo <url>] [--commit <commit>] [--repeat N] [--json <path>]
+parser = argparse.ArgumentParser()
+parser.add_argument("--repo", default="https://github.com/litex-hub/pythondata-cpu-vexriscv-smp")
+parser.add_argument("--commit", default="HEAD")
+parser.add_argument("--repeat", type=int, default=3, help="runs of every scenario (the best is kept)")
+parser.add_argument("--json", help="writes the results to a JSON file")
+args = parser.parse_args()
+
+work = tempfile.mkdtemp(prefix="dfr_archive_bench_")
+dest = os.path.join(work, "install")
+
+# warming up the mirrors (of the submodules as well)
+with ExitStack() as stack:
+    mirror = stack.enter_context(mirrorStore.use(args.repo))
+    commit = subprocess.run(
+        ["git", "--git-dir", mirror, "rev-parse", f"{args.commit}^{{commit}}"],
+        stdout=subprocess.PIPE,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    mirrorStore.archive(args.repo, commit, dest, stack, True)
+installSize = treeSize(dest)
+
+
+def checkout() -> int:
+    workTree = os.path.join(work, "worktree")
+    with ExitStack() as stack:
+        stack.enter_context(mirrorStore.use(args.repo, commit))
+        mirrorStore.clone(args.repo, workTree, commit)
+        mirrorStore.updateSubmodules(workTree, stack)
+        subprocess.run(["rsync", "-a", f"{workTree}/", dest, "--exclude", ".git"], check=True)
+    written = treeSize(workTree) + treeSize(dest)
+    shutil.rmtree(workTree)
+    return written
+
+
+def archive() -> int:
+    with ExitStack() as stack:
+        mirrorStore.archive(args.repo, commit, dest, stack, True)
+    return treeSize(dest)
+
+
+results: list[dict] = []
+
+
+def measure(name: str, run: Callable[[], int]):
+    best = None
+    for _ in range(args.repeat):
+        shutil.rmtree(dest, ignore_errors=True)
+        start = time.perf_counter()
+        written = run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best["s"]:
+            best = {"scenario": name, "s": elapsed, "writtenMB": written / (1 << 20)}
+    results.append(best)  # type: ignore
+    print(f"  {name:<12} {best['s']:>8.2f} {best['writtenMB']:>12.1f} {(installSize >> 20) / best['s']:>8.1f}")  # type: ignore
+
+
+print(f"{args.repo} @ {commit}: {installSize / (1 << 20):.1f}MB installed")
+print(f"  {'path':<12} {'s':>8} {'written MB':>12} {'MB/s':>8}")
+measure("checkout", checkout)
+measure("archive", archive)
+
+if args.json:
+    with open(args.json, "w") as file:
+        json.dump({"repo": args.repo, "commit": commit, "size": installSize, "results": results}, file, indent=2)
+shutil.rmtree(work, ignore_errors=True)
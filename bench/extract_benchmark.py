@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+sys.path.append("/etc/dfr")
+from dfr_scripts.common.xzparallel import ParallelXZDecompressor  # noqa: E402
+
+# Extraction throughput of `.tar.xz` archives (as the PDK archives of openpdks), comparing
+# single-threaded `tar` with the parallel block decompression of ParallelXZDecompressor.
+# A synthetic PDK-like tree (text cell libraries and some binary data) is compressed twice:
+# by a multi-threaded `xz` (independent blocks) and by a single-threaded `xz` (one block, where
+# the parallel decompression falls back to a sequential one).
+# Throughput is reported in MB/s of the uncompressed archive.
+# usage: extract_benchmark.py [--size MB] [--threads N] [--repeat N] [--json <path>]
+parser = argparse.ArgumentParser()
+parser.add_argument("--size", type=int, default=128, help="uncompressed size of the archive (MB)")
+parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+parser.add_argument("--repeat", type=int, default=3, help="runs of every scenario (the best is kept)")
+parser.add_argument("--json", help="writes the results to a JSON file")
+args = parser.parse_args()
+
+work = tempfile.mkdtemp(prefix="dfr_extract_bench_")
+tree = os.path.join(work, "tree")
+out = os.path.join(work, "out")
+
+print(f"Creating a {args.size}MB synthetic PDK tree...")
+rng = random.Random(0)
+written = 0
+fileIndex = 0
+while written < args.size << 20:
+    cellDir = os.path.join(tree, f"libs.ref/cells{fileIndex // 100:03d}")
+    os.makedirs(cellDir, exist_ok=True)
+    if fileIndex % 10 == 9:
+        data = rng.randbytes(1 << 18)
+        path = os.path.join(cellDir, f"cell{fileIndex}.gds")
+    else:
+        lines = [
+            f"  RECT {rng.randint(0, 99999) / 1000:.3f} {rng.randint(0, 99999) / 1000:.3f} "
+            f"{rng.randint(0, 99999) / 1000:.3f} {rng.randint(0, 99999) / 1000:.3f} ;\n"
+            for _ in range(8000)
+        ]
+        data = f"MACRO cell{fileIndex}\n  LAYER met{fileIndex % 5 + 1} ;\n{''.join(lines)}END cell{fileIndex}\n".encode()
+        path = os.path.join(cellDir, f"cell{fileIndex}.lef")
+    with open(path, "wb") as file:
+        file.write(data)
+    written += len(data)
+    fileIndex += 1
+tarPath = os.path.join(work, "tree.tar")
+subprocess.run(["tar", "-cf", tarPath, "-C", tree, "."], check=True)
+shutil.rmtree(tree)
+tarSize = os.path.getsize(tarPath)
+
+archives: dict[str, str] = {}
+for kind, threadsOpt in [("multi-block", f"-T{args.threads}"), ("single-block", "-T1")]:
+    print(f"Compressing the {kind} archive...")
+    archives[kind] = os.path.join(work, f"{kind}.tar.xz")
+    with open(archives[kind], "wb") as file:
+        subprocess.run(["xz", "-c", "-6", threadsOpt, tarPath], stdout=file, check=True)
+os.remove(tarPath)
+
+
+def tarSingleThreaded(archive: str):
+    subprocess.run(["tar", "-x", "-I", "xz -T1", "-f", archive, "-C", out], check=True)
+
+
+def tarDefault(archive: str):
+    subprocess.run(["tar", "-xJ", "-f", archive, "-C", out], check=True)
+
+
+def parallel(archive: str):
+    extract = subprocess.Popen(["tar", "-x", "-f", "-", "-C", out], stdin=subprocess.PIPE)
+    decoder = ParallelXZDecompressor(extract.stdin.write, args.threads)  # type: ignore
+    with open(archive, "rb") as file:
+        while data := file.read(1 << 20):
+            decoder.feed(data)
+    decoder.close()
+    extract.stdin.close()  # type: ignore
+    if extract.wait() != 0:
+        raise Exception("tar failed")
+
+
+results: list[dict] = []
+
+
+def measure(name: str, kind: str, run: Callable[[str], None]):
+    best = None
+    for _ in range(args.repeat):
+        shutil.rmtree(out, ignore_errors=True)
+        os.makedirs(out)
+        start = time.perf_counter()
+        run(archives[kind])
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    result = {"scenario": name, "archive": kind, "s": best, "MBps": (tarSize >> 20) / best}  # type: ignore
+    results.append(result)
+    print(f"  {name:<36} {kind:<14} {result['s']:>8.2f} {result['MBps']:>8.1f}")
+
+
+print(f"  {'scenario':<36} {'archive':<14} {'s':>8} {'MB/s':>8}")
+for kind in archives:
+    measure("tar -x (xz -T1)", kind, tarSingleThreaded)
+    measure("tar -xJ (system xz)", kind, tarDefault)
+    measure(f"parallel blocks ({args.threads} threads)", kind, parallel)
+
+if args.json:
+    with open(args.json, "w") as file:
+        json.dump({"size": tarSize, "threads": args.threads, "results": results}, file, indent=2)
+shutil.rmtree(work, ignore_errors=True)
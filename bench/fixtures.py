@@ -0,0 +1,133 @@
+import http.server
+import json
+import subprocess
+import threading
+from typing import Optional
+from urllib.parse import urlparse
+
+
+def _git(repo: str, args: list[str], input: Optional[bytes] = None) -> str:
+    return subprocess.run(
+        ["git", "-C", repo] + args, input=input, stdout=subprocess.PIPE, check=True
+    ).stdout.decode()
+
+
+# the tag name of the i-th fixture commit, e.g. `1.2.34`
+def tagName(i: int) -> str:
+    return f"{i // 1000}.{(i // 100) % 10}.{i % 100}"
+
+
+# creates a bare fixture repo with one commit per tag on `main`, where every 10th tag is
+# annotated, and a branch on every 10th commit. commit dates increase with the tag number.
+# the repo is built with a single `git fast-import` stream, so thousands of refs take seconds.
+def createFixtureRepo(path: str, tags: int, branches: int):
+    subprocess.run(["git", "init", "--quiet", "--bare", "--initial-branch=main", path], check=True)
+    stream: list[bytes] = []
+    for i in range(tags):
+        date = 1500000000 + i * 3600
+        message = f"commit {i}\n".encode()
+        content = f"{i}\n".encode()
+        stream.append(b"commit refs/heads/main\n")
+        stream.append(f"mark :{i + 1}\n".encode())
+        stream.append(f"committer Bench <bench@example.com> {date} +0000\n".encode())
+        stream.append(b"data %d\n%s" % (len(message), message))
+        stream.append(b"M 644 inline version.txt\ndata %d\n%s\n" % (len(content), content))
+    for i in range(tags):
+        if i % 10 == 0:
+            message = f"release {tagName(i)}\n".encode()
+            stream.append(f"tag {tagName(i)}\nfrom :{i + 1}\n".encode())
+            stream.append(f"tagger Bench <bench@example.com> {1500000000 + i * 3600} +0000\n".encode())
+            stream.append(b"data %d\n%s\n" % (len(message), message))
+        else:
+            stream.append(f"reset refs/tags/{tagName(i)}\nfrom :{i + 1}\n\n".encode())
+    for b in range(min(branches, tags // 10)):
+        stream.append(f"reset refs/heads/release-{b}\nfrom :{b * 10 + 1}\n\n".encode())
+    subprocess.run(["git", "-C", path, "fast-import", "--quiet"], input=b"".join(stream), check=True)
+    # partial (treeless) fetches are served as by GitHub
+    subprocess.run(["git", "-C", path, "config", "uploadpack.allowFilter", "true"], check=True)
+
+
+# the commit hashes of all the fixture tags
+def tagCommits(repo: str) -> dict[str, str]:
+    ret: dict[str, str] = {}
+    for line in _git(repo, ["for-each-ref", "--format=%(refname:short) %(objectname) %(*objectname)", "refs/tags"]).splitlines():
+        tag, obj, peeled = (line.split(" ") + [""])[:3]
+        ret[tag] = peeled or obj
+    return ret
+
+
+# A stand-in for the GitHub REST endpoints used by `common`, answering from a fixture repo
+# for any owner and repo name. Answers carry ETags, and conditional requests get 304.
+# Every request is counted.
+class FakeGitHubAPI:
+    def __init__(self, repo: str):
+        self.repo = repo
+        self.requests = 0
+        self._dates: Optional[dict[str, str]] = None
+        self._refs: dict[str, str] = {}
+        self._lock = threading.Lock()
+        api = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with api._lock:
+                    api.requests += 1
+                    status, body = api.answer(self.path)
+                etag = f'"{hash(json.dumps(body)) & 0xFFFFFFFF:x}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    # the commit hash and date of a ref or a (partial) commit hash.
+    # all the commits and refs are loaded once, so answers do not spawn git.
+    def _commit(self, ref: str) -> Optional[tuple[str, str]]:
+        if self._dates is None:
+            commitLog = _git(self.repo, ["log", "--all", "--format=%H %cI"])
+            self._dates = dict(line.split(" ") for line in commitLog.splitlines())
+            refs = _git(self.repo, ["for-each-ref", "--format=%(refname) %(objectname) %(*objectname)"])
+            for line in refs.splitlines():
+                name, obj, peeled = (line.split(" ") + [""])[:3]
+                self._refs[name] = peeled or obj
+        sha = self._refs.get(ref)
+        if sha is None:
+            matches = [h for h in self._dates if h.startswith(ref)] if len(ref) >= 4 else []
+            if len(matches) != 1:
+                return None
+            sha = matches[0]
+        return sha, self._dates[sha]
+
+    def answer(self, path: str) -> tuple[int, dict]:
+        parsed = urlparse(path)
+        parts = parsed.path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "repos":
+            return 404, {"message": "Not Found"}
+        rest = parts[3:]
+        if not rest:
+            return 200, {"default_branch": "main"}
+        if rest[0] == "branches" and len(rest) == 2:
+            commit = self._commit(f"refs/heads/{rest[1]}")
+            return (200, {"commit": {"sha": commit[0]}}) if commit else (404, {"message": "Branch not found"})
+        if rest[0] == "commits" and len(rest) == 2:
+            commit = self._commit(rest[1])
+            if commit is None:
+                return 422, {"message": "No commit found"}
+            return 200, {"sha": commit[0], "commit": {"committer": {"date": commit[1]}}}
+        return 404, {"message": "Not Found"}
+
+    def close(self):
+        self._server.shutdown()
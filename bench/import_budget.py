@@ -0,0 +1,54 @@
+import os
+import re
+import subprocess
+import sys
+
+# checks the import cost of the activation and query paths with `python -X importtime`.
+# fails if a heavy library is imported eagerly, or if the cumulative import time of
+# `dfr_scripts.common` exceeds the budget (the best of several runs, to filter out noise).
+# usage: import_budget.py [<budget ms>] (default: $DFR_IMPORT_BUDGET_MS or 30)
+budgetMS = float(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("DFR_IMPORT_BUDGET_MS", "30"))
+runs = 5
+# libraries that must only load on first use
+lazyModules = {"git", "requests", "urllib3", "yaml"}
+# the modules imported by the activation and query entry points
+entryModules = ["dfr_scripts.common", "dfr_scripts.common.envcache", "dfr_scripts.common.registry"]
+
+env = dict(os.environ)
+# the first run compiles the bytecode, as an installation would
+env.pop("PYTHONDONTWRITEBYTECODE", None)
+env["PYTHONPATH"] = ":".join(filter(None, [env.get("PYTHONPATH"), "/etc/dfr"]))
+
+
+# returns the cumulative import time (us) of every module imported by the given module
+def importTimes(module: str) -> dict[str, int]:
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+        check=True,
+    )
+    ret: dict[str, int] = {}
+    for line in r.stderr.splitlines():
+        m = re.match(r"import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*(\S+)", line)
+        if m:
+            ret[m.group(2)] = int(m.group(1))
+    return ret
+
+
+failed = False
+for module in entryModules:
+    times = [importTimes(module) for _ in range(runs)]
+    eager = sorted(m for m in times[0] if m.split(".")[0] in lazyModules)
+    if eager:
+        print(f"FAIL {module}: eagerly imports {', '.join(eager)}")
+        failed = True
+    bestMS = min(t.get(module, 0) for t in times) / 1000
+    if bestMS > budgetMS:
+        print(f"FAIL {module}: {bestMS:.1f}ms exceeds the {budgetMS:.0f}ms budget")
+        failed = True
+    elif not eager:
+        print(f"ok   {module}: {bestMS:.1f}ms")
+sys.exit(1 if failed else 0)
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from fixtures import FakeGitHubAPI, createFixtureRepo, tagCommits, tagName
+
+# Offline benchmarks of version resolution and environment generation.
+# A fixture git repo with thousands of tags and branches stands in for every tool repo
+# (through a `url.<file URL>.insteadOf` git configuration), and a local HTTP server stands in
+# for the GitHub REST API. Synthetic tool scripts (git tools, every 5th one depending on the
+# next one) are installed into a temporary mount, so nothing outside the work folder is used.
+# Every scenario is timed on 1, 10 and 60 tool configurations, counting the HTTP requests
+# served and the subprocesses started.
+# usage: run_benchmarks.py [--tags N] [--branches N] [--installed N] [--repeat N] [--json <path>]
+parser = argparse.ArgumentParser()
+parser.add_argument("--tags", type=int, default=2000)
+parser.add_argument("--branches", type=int, default=100)
+parser.add_argument("--installed", type=int, default=50, help="installed versions per tool")
+parser.add_argument("--repeat", type=int, default=3, help="runs of every warm scenario (the best is kept)")
+parser.add_argument("--sizes", default="1,10,60")
+parser.add_argument("--json", help="writes the results to a JSON file")
+args = parser.parse_args()
+sizes = [int(n) for n in args.sizes.split(",")]
+toolCount = max(sizes)
+
+work = tempfile.mkdtemp(prefix="dfr_bench_")
+repo = os.path.join(work, "fixture.git")
+scriptsRoot = os.path.join(work, "scripts")
+mntRoot = os.path.join(work, "mnt")
+optRoot = os.path.join(work, "opt")
+gitConfig = os.path.join(work, "gitconfig")
+
+print(f"Creating a fixture repo with {args.tags} tags and {args.branches} branches...")
+createFixtureRepo(repo, args.tags, args.branches)
+commits = tagCommits(repo)
+# every tool requests the newest tag series, e.g. `1.*`
+versionReq = f"{tagName(args.tags - 1).split('.')[0]}.*"
+api = FakeGitHubAPI(repo)
+with open(gitConfig, "w") as file:
+    file.write(f'[url "file://{repo}"]\n')
+    for i in range(toolCount):
+        file.write(f"\tinsteadOf = https://github.com/bench/tool{i:02d}\n")
+    file.write("[protocol]\n\tversion = 2\n")
+
+# the settings of `common` are read when it is imported
+os.environ.update(
+    {
+        "DFR_CACHE_DIR": os.path.join(work, "cache"),
+        "DFR_MIRROR_DIR": os.path.join(work, "mirrors"),
+        "DFR_GITHUB_API": api.url,
+        "DFR_TELEMETRY": "0",
+        "GIT_CONFIG_GLOBAL": gitConfig,
+        "GIT_CONFIG_NOSYSTEM": "1",
+    }
+)
+sys.path.append("/etc/dfr")
+import dfr_scripts.common as common  # noqa: E402
+from dfr_scripts.common import lsrefs  # noqa: E402
+from dfr_scripts.common.metacache import MetaCache  # noqa: E402
+
+common.paths.scripts = scriptsRoot
+common.toolRegistry.root = scriptsRoot
+common.mountIndex.root = mntRoot
+
+
+def toolName(i: int) -> str:
+    return f"bench.oss.tool{i:02d}"
+
+
+# the synthetic tool scripts
+for i in range(toolCount):
+    dependencies = {toolName(i + 1): versionReq} if i % 5 == 0 and i + 1 < toolCount else {}
+    scriptDir = os.path.join(scriptsRoot, "bench", "oss", f"tool{i:02d}")
+    os.makedirs(scriptDir)
+    with open(os.path.join(scriptDir, "__init__.py"), "w") as file:
+        file.write(
+            f"""from dfr_scripts.common import GitOSSTool
+
+dependencies: set[str] = {set(dependencies) or "set()"}
+
+
+class SpecificTool(GitOSSTool):
+    def __init__(self, versionReq: str):
+        super().__init__("bench", "tool{i:02d}", versionReq, "https://github.com/bench/tool{i:02d}")
+
+    def dependencies(self) -> dict[str, str]:
+        return {dependencies}
+
+    def _toolPathNoVersion(self, toolMnt: str) -> str:
+        return f"{mntRoot}/{{toolMnt}}/bench/oss/tool{i:02d}"
+
+    def linkedPath(self) -> str:
+        return "{optRoot}/tool{i:02d}"
+"""
+        )
+
+# the installed versions (the newest tags of the requested series)
+installedTags = [tagName(i) for i in range(args.tags) if tagName(i).startswith(versionReq[:-1])][-args.installed :]
+for i in range(toolCount):
+    for tag in installedTags:
+        installPath = os.path.join(mntRoot, "mytools", "bench", "oss", f"tool{i:02d}", commits[tag])
+        os.makedirs(installPath)
+        open(common.installDirReadyFile(installPath), "w").close()
+
+# counting the subprocesses started in this process
+subprocessCount = 0
+popenInit = subprocess.Popen.__init__
+
+
+def countingPopenInit(self, *a, **kw):
+    global subprocessCount
+    subprocessCount += 1
+    popenInit(self, *a, **kw)
+
+
+subprocess.Popen.__init__ = countingPopenInit  # type: ignore
+
+
+# drops every in-process and persistent cache, as on a fresh node
+def coldCaches():
+    lsrefs._listings.clear()
+    common._toolModules.clear()
+    common.toolRegistry._entries = None
+    common.mountIndex._indexes.clear()
+    shutil.rmtree(common.paths.cache, ignore_errors=True)
+    common.metaCache = MetaCache(os.path.join(common.paths.cache, f"github-{time.time_ns()}.sqlite"))
+
+
+def useMountIndex(enabled: bool):
+    common.mountIndex._indexes.clear()
+    indexPath = common.mountIndex.path("mytools")
+    if enabled:
+        common.mountIndex.rebuild("mytools")
+    elif os.path.exists(indexPath):
+        os.remove(indexPath)
+
+
+def configOf(n: int) -> dict[str, str]:
+    return {toolName(i): versionReq for i in range(n)}
+
+
+results: list[dict] = []
+
+
+def measure(name: str, n: int, run: Callable[[], None], setup: Callable[[], None], repeat: int):
+    best = None
+    for _ in range(repeat):
+        setup()
+        http0, sub0 = api.requests, subprocessCount
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        result = {
+            "scenario": name,
+            "tools": n,
+            "ms": elapsed * 1000,
+            "http": api.requests - http0,
+            "subprocesses": subprocessCount - sub0,
+        }
+        if best is None or result["ms"] < best["ms"]:
+            best = result
+    results.append(best)  # type: ignore
+    print(f"  {name:<44} {n:>4} {best['ms']:>10.1f} {best['http']:>6} {best['subprocesses']:>8}")  # type: ignore
+
+
+def resolveInstallable(n: int):
+    for fullName in configOf(n):
+        tool = common.getTool(fullName, versionReq)
+        tool.latestInstallableVersion(tool.versionReq)
+
+
+def resolveInstalled(n: int):
+    for fullName in configOf(n):
+        tool = common.getTool(fullName, versionReq)
+        tool.latestInstalledVersion(tool.versionReq)
+
+
+def createTools(n: int):
+    common.Tools(configOf(n))
+
+
+def generateEnv(n: int):
+    shutil.rmtree(optRoot, ignore_errors=True)
+    os.makedirs(optRoot)
+    common.Tools(configOf(n)).getEnv()
+
+
+def noSetup():
+    pass
+
+
+print(f"  {'scenario':<44} {'tools':>4} {'ms':>10} {'http':>6} {'subproc':>8}")
+for n in sizes:
+    common.tagDatesSource = "git"
+    measure("latestInstallableVersion (cold)", n, lambda: resolveInstallable(n), coldCaches, 1)
+    measure("latestInstallableVersion (warm)", n, lambda: resolveInstallable(n), noSetup, args.repeat)
+    common.tagDatesSource = "api"
+    measure("latestInstallableVersion (cold, api dates)", n, lambda: resolveInstallable(n), coldCaches, 1)
+    common.tagDatesSource = "git"
+    measure("latestInstalledVersion (scan)", n, lambda: resolveInstalled(n), lambda: useMountIndex(False), args.repeat)
+    measure("latestInstalledVersion (index)", n, lambda: resolveInstalled(n), lambda: useMountIndex(True), args.repeat)
+    measure("Tools.__init__ (cold modules)", n, lambda: createTools(n), coldCaches, 1)
+    measure("Tools.__init__ (warm)", n, lambda: createTools(n), noSetup, args.repeat)
+    measure("Tools.getEnv", n, lambda: generateEnv(n), noSetup, args.repeat)
+
+api.close()
+if args.json:
+    with open(args.json, "w") as file:
+        json.dump({"tags": args.tags, "branches": args.branches, "results": results}, file, indent=2)
+shutil.rmtree(work, ignore_errors=True)
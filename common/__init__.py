@@ -4,32 +4,116 @@ import os
 import time
 import sys
 import importlib.util
-import requests
 import re
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from abc import abstractmethod
 from typing import final, Callable
 import string
 import stat
 import os
-import yaml
 from collections import OrderedDict
 import re
 from urllib.parse import urlparse
 import textwrap
 import fnmatch
 from datetime import datetime
-import git
-from git import Repo, RemoteProgress
+from typing import TYPE_CHECKING
 import shutil
+import json
+import tempfile
+import threading
+from .metacache import MetaCache
+from .locks import fileLock
+from .mirror import MirrorStore
+from .lsrefs import lsRemote
+from .toolgraph import ToolGraph, ToolGraphError
+from .registry import Registry
+from .mountindex import MountIndex
+from .compcache import openCompilerCache
+from .telemetry import InstallTelemetry
+from .pkgcache import baseFingerprint, openPackageCache, packageKey
+from .dlcache import DownloadCache, parseSize
+from .dedup import DedupStore
+from .envview import EnvView, viewDirs
+from .rpath import verifiedLibDirs
+from .envcapture import SourceCapture
+
+# GitPython, requests and yaml are only imported where used (first clone, network access or
+# configuration parsing), so environment activation and queries do not pay for them
+if TYPE_CHECKING:
+    from git import Repo
+from contextlib import ExitStack, nullcontext
 
 
 class Paths:
     common = os.path.dirname(os.path.abspath(__file__))
+    # the root folder of all tool scripts
+    scripts = "/etc/dfr/dfr_scripts"
+    # persistent node-local cache folder (metadata, mirrors, etc.)
+    cache = os.environ.get("DFR_CACHE_DIR", os.path.expanduser("~/.cache/dfr"))
 
 
 paths = Paths()
 
+githubApiURL = os.environ.get("DFR_GITHUB_API", "https://api.github.com")
+# seconds before a cached branch/default-branch answer is revalidated against GitHub
+githubRefTTL = int(os.environ.get("DFR_GITHUB_TTL", "600"))
+metaCache = MetaCache(os.path.join(paths.cache, "github.sqlite"))
+# where tag/branch commit dates are resolved from:
+# `git` reads them from a treeless bare fetch of the refs and falls back to the GitHub API,
+# `api` requests each commit from the GitHub API
+tagDatesSource = os.environ.get("DFR_TAG_DATES", "git")
+# how git tools fetch their sources for an install:
+# `mirror` checks out from a persistent bare mirror store that is fetched incrementally,
+# `shallow` fetches only the target commit (and shallow submodules) for every install,
+# `full` clones the full history from the remote for every install
+gitFetchMode = os.environ.get("DFR_GIT_FETCH", "mirror")
+# number of submodules fetched in parallel by shallow fetches
+gitJobs = int(os.environ.get("DFR_GIT_JOBS", "8"))
+# the prebuilt index of all the tool scripts
+toolRegistry = Registry(paths.scripts)
+# the compiler cache of source builds (`ccache`, `sccache`, `none`, or empty for any installed one)
+compilerCache = openCompilerCache(
+    os.environ.get("DFR_COMPILER_CACHE", ""),
+    os.environ.get("DFR_COMPILER_CACHE_DIR", os.path.join(paths.cache, "compiler")),
+    os.environ.get("DFR_COMPILER_CACHE_SIZE"),
+)
+# the JSON lines log of install phase spans (disabled with DFR_TELEMETRY=0)
+telemetryEnabled = os.environ.get("DFR_TELEMETRY", "1") != "0"
+telemetryLog = os.environ.get("DFR_TELEMETRY_LOG", os.path.join(paths.cache, "telemetry", "spans.jsonl"))
+# the tool mounts, in lookup order
+toolMnts = ["osstools", "orgtools", "mytools"]
+mountIndex = MountIndex()
+# how completed installs are deduplicated against the file store of their mount
+# (`hardlink`, `reflink` where supported, or `none`). every installed file is hashed, so it is opt-in.
+dedupMode = os.environ.get("DFR_DEDUP", "none")
+dedupStore = DedupStore()
+# built installs get `$ORIGIN`-relative RUNPATHs to their lib dirs (with `patchelf`), so their
+# environment does not need LD_LIBRARY_PATH once the fixups are verified
+rpathFixup = os.environ.get("DFR_RPATH_FIXUP", "1") != "0"
+# with DFR_ENV_VIEW=1, the search paths of the environment are merged into a single view prefix
+envView = EnvView(os.environ.get("DFR_ENV_VIEW_DIR", os.path.join(paths.cache, "views")))
+envViewEnabled = os.environ.get("DFR_ENV_VIEW", "0") != "0"
+# with DFR_ENV_CAPTURE=1, the environment changes of sourced setup scripts are captured once
+# and replayed as plain exports
+envCapture = SourceCapture(os.environ.get("DFR_ENV_CAPTURE_DIR", os.path.join(paths.cache, "sources")))
+envCaptureEnabled = os.environ.get("DFR_ENV_CAPTURE", "0") != "0"
+# the binary package cache of built tool installs (a directory or an HTTP URL; disabled if empty)
+packageCache = openPackageCache(os.environ.get("DFR_PKG_CACHE", ""))
+# pushing new builds to the package cache can be disabled (e.g., for a read-only cache)
+packageCachePush = os.environ.get("DFR_PKG_CACHE_PUSH", "1") != "0"
+mirrorStore = MirrorStore(os.environ.get("DFR_MIRROR_DIR", os.path.join(paths.cache, "mirrors")))
+# number of parallel range connections of large installer downloads
+downloadConnections = int(os.environ.get("DFR_DOWNLOAD_JOBS", "4"))
+# number of threads decompressing downloaded `.tar.xz` archives (0 for a single-threaded `tar -J`)
+xzThreads = int(os.environ.get("DFR_XZ_THREADS", str(os.cpu_count() or 1)))
+# the cache of downloaded installer artifacts and their extracted installer trees, evicted
+# least recently used first when over its size budget
+downloadCache = DownloadCache(
+    os.environ.get("DFR_DOWNLOAD_CACHE_DIR", os.path.join(paths.cache, "installers")),
+    parseSize(os.environ.get("DFR_DOWNLOAD_CACHE_SIZE", "200G")),
+)
+
 
 # remove initial `v` character from a string when it is followed by either a
 # digit, `*` or `?`.
@@ -70,39 +154,70 @@ def extract_owner_and_repo_from_github_url(github_url):
         return sys.exit(1)
 
 
+def isFullCommitHash(ref: str) -> bool:
+    return len(ref) == 40 and isCommitVersion(ref)
+
+
+# GET a GitHub REST API path and return its status code and JSON data.
+# When `ttl` is None, the answer is immutable and a successful one is cached forever.
+# Otherwise, a cached answer is reused for `ttl` seconds and then revalidated with
+# `If-None-Match`, since a `304 Not Modified` answer does not count against the rate limit.
+def githubApiGet(apiPath: str, ttl: Optional[int] = None) -> tuple[int, Any]:
+    api_url = f"{githubApiURL}{apiPath}"
+    cached = metaCache.get(api_url)
+    headers: dict[str, str] = {}
+    if cached:
+        body, etag, fetchedAt, immutable = cached
+        if immutable or (ttl is not None and time.time() - fetchedAt < ttl):
+            return 200, json.loads(body)
+        if etag:
+            headers["If-None-Match"] = etag
+
+    import requests
+
+    # make the request
+    response = requests.get(api_url, headers=headers)
+
+    if response.status_code == 304 and cached:
+        metaCache.touch(api_url)
+        return 200, json.loads(cached[0])
+    if response.status_code == 200:
+        metaCache.put(api_url, response.text, response.headers.get("ETag"), immutable=ttl is None)
+        return 200, response.json()
+    return response.status_code, None
+
+
 def get_latest_commit_hash(repoOwnerName: str, repoName: str, branch: Optional[str] = None) -> str:
     if branch is None:
         branch = get_default_branch(repoOwnerName, repoName)
-    api_url = f"https://api.github.com/repos/{repoOwnerName}/{repoName}/branches/{branch}"  # create the api url
+    api_path = f"/repos/{repoOwnerName}/{repoName}/branches/{branch}"
 
     # make the request
-    response = requests.get(api_url)
+    status_code, branch_data = githubApiGet(api_path, githubRefTTL)
 
     # check for errors
-    if response.status_code != 200:
-        print(f"`{api_url}` error with status code: {response.status_code}")
+    if status_code != 200:
+        print(f"`{githubApiURL}{api_path}` error with status code: {status_code}")
         return sys.exit(1)
 
     # extract the latest commit hash
-    branch_data = response.json()
     latest_commit_hash = branch_data["commit"]["sha"]
 
     return latest_commit_hash
 
 
 def get_default_branch(repoOwnerName: str, repoName: str) -> str:
-    api_url = f"https://api.github.com/repos/{repoOwnerName}/{repoName}"  # create the api url
+    api_path = f"/repos/{repoOwnerName}/{repoName}"
 
     # make the request
-    response = requests.get(api_url)
+    status_code, repo_data = githubApiGet(api_path, githubRefTTL)
 
     # check for errors
-    if response.status_code != 200:
-        print(f"`{api_url}` error with status code: {response.status_code}")
+    if status_code != 200:
+        print(f"`{githubApiURL}{api_path}` error with status code: {status_code}")
         return sys.exit(1)
 
     # extract the default branch
-    repo_data = response.json()
     default_branch = repo_data["default_branch"]
 
     return default_branch
@@ -110,11 +225,11 @@ def get_default_branch(repoOwnerName: str, repoName: str) -> str:
 
 def get_submodule_commit_hash(repoOwnerName: str, repoName: str, submodulePath: str, ref: str) -> Optional[str]:
     try:
-        url = f"https://api.github.com/repos/{repoOwnerName}/{repoName}/contents/{submodulePath}?ref={ref}"
-        response = requests.get(url)
+        api_path = f"/repos/{repoOwnerName}/{repoName}/contents/{submodulePath}?ref={ref}"
+        # a submodule pointer at an exact commit never changes
+        status_code, submodule_info = githubApiGet(api_path, None if isFullCommitHash(ref) else githubRefTTL)
 
-        if response.status_code == 200:
-            submodule_info = response.json()
+        if status_code == 200:
             if submodule_info["type"] == "submodule":
                 commit_hash = submodule_info["sha"]
                 return commit_hash
@@ -129,26 +244,38 @@ def get_submodule_commit_hash(repoOwnerName: str, repoName: str, submodulePath:
 
 
 def get_commit_datetime(repoOwnerName: str, repoName: str, commit_hash: str) -> Optional[str]:
-    api_url = f"https://api.github.com/repos/{repoOwnerName}/{repoName}/commits/{commit_hash}"  # create the api url
-    # make the request
-    response = requests.get(api_url)
+    api_path = f"/repos/{repoOwnerName}/{repoName}/commits/{commit_hash}"
+    # make the request (the date of an exact commit never changes)
+    status_code, commit_data = githubApiGet(api_path, None if isFullCommitHash(commit_hash) else githubRefTTL)
 
     # if a commit is no longer available returning None
-    if response.status_code == 422:
+    if status_code == 422:
         return None
 
     # check for errors
-    if response.status_code != 200:
-        print(f"`{api_url}` error with status code: {response.status_code}")
+    if status_code != 200:
+        print(f"`{githubApiURL}{api_path}` error with status code: {status_code}")
         return sys.exit(1)
 
     # extract the commit datetime
-    commit_data = response.json()
     commit_datetime = commit_data["commit"]["committer"]["date"]
 
     return commit_datetime
 
 
+def get_full_commit_hash(repoOwnerName: str, repoName: str, partial_hash: str) -> str:
+    api_path = f"/repos/{repoOwnerName}/{repoName}/commits/{partial_hash}"
+    # make the request (a commit hash prefix always resolves to the same commit)
+    status_code, commit_data = githubApiGet(api_path)
+
+    # check for errors
+    if status_code != 200:
+        print(f"`{githubApiURL}{api_path}` error with status code: {status_code}")
+        return sys.exit(1)
+
+    return commit_data["sha"]
+
+
 def sort_tags_by_commit_datetime(
     repoOwnerName: str, repoName: str, tags_commits_dict: dict[str, str]
 ) -> dict[str, str]:
@@ -168,6 +295,74 @@ def sort_tags_by_commit_datetime(
     return sorted_dict
 
 
+# get the committer unix time of the given commits by fetching only the commit objects
+# of the remote tags and branches (depth 1, no trees or blobs) into a persistent bare
+# repository and reading them locally in one pass.
+# commits that could not be fetched are missing from the returned dict, and
+# non-commit objects (e.g., annotated tags) are mapped to None.
+def get_commits_timestamp_from_git(repoURL: str, localName: str, commits: list[str]) -> dict[str, Optional[int]]:
+    gitDir = os.path.join(paths.cache, "tagdates", f"{localName}.git")
+    with fileLock(f"{gitDir}.lock"):
+        if not os.path.exists(gitDir):
+            if subprocess.run(["git", "init", "--quiet", "--bare", gitDir]).returncode != 0:
+                return {}
+        fetch = subprocess.run(
+            ["git", "--git-dir", gitDir, "-c", "protocol.version=2", "fetch", "--quiet", "--no-tags"]
+            + ["--depth=1", "--filter=tree:0", repoURL, "+refs/tags/*:refs/tags/*", "+refs/heads/*:refs/heads/*"],
+            stdin=subprocess.DEVNULL,
+        )
+        if fetch.returncode != 0:
+            return {}
+        catFile = subprocess.run(
+            ["git", "--git-dir", gitDir, "cat-file", "--batch"],
+            input="\n".join(commits).encode(),
+            stdout=subprocess.PIPE,
+        )
+    ret: dict[str, Optional[int]] = {}
+    out = catFile.stdout
+    pos = 0
+    while pos < len(out):
+        headerEnd = out.index(b"\n", pos)
+        header = out[pos:headerEnd].decode().split()
+        pos = headerEnd + 1
+        if header[1] == "missing":
+            continue
+        sha, objType, size = header[0], header[1], int(header[2])
+        content = out[pos : pos + size]
+        pos += size + 1
+        ret[sha] = None
+        if objType == "commit":
+            match = re.search(rb"^committer .* (\d+) [+-]\d{4}$", content, re.MULTILINE)
+            if match:
+                ret[sha] = int(match.group(1))
+    return ret
+
+
+# the same as sort_tags_by_commit_datetime, but with the commit dates read from git.
+# the GitHub API is only used for commits git could not provide.
+def sort_tags_by_commit_datetime_from_git(
+    repoURL: str, repoOwnerName: str, repoName: str, tags_commits_dict: dict[str, str]
+) -> dict[str, str]:
+    timestamps = get_commits_timestamp_from_git(
+        repoURL, f"{repoOwnerName}/{repoName}", list(set(tags_commits_dict.values()))
+    )
+    tuples_list = []
+    for tag, commit in tags_commits_dict.items():
+        if commit in timestamps:
+            timestamp = timestamps[commit]
+        else:
+            commit_datetime = get_commit_datetime(repoOwnerName, repoName, commit)
+            timestamp = None
+            if commit_datetime:
+                timestamp = datetime.fromisoformat(commit_datetime.replace("Z", "+00:00")).timestamp()
+        if timestamp is not None:
+            tuples_list.append((tag, commit, timestamp))
+
+    tuples_list.sort(key=lambda x: x[2], reverse=True)
+
+    return {t[0]: t[1] for t in tuples_list}
+
+
 def addEnvPaths(envName: str, paths: list[str]) -> None:
     if len(os.environ.get(envName, "")) == 0:
         os.environ[envName] = ":".join(paths)
@@ -183,6 +378,8 @@ def getEnvPaths(envName: str, paths: list[str]) -> list[str]:
 
 
 def downloadAvailable(url: str) -> bool:
+    import requests
+
     return requests.head(url).status_code < 400
 
 
@@ -194,6 +391,18 @@ def dfrToStdPattern(pattern: str) -> str:
         return pattern
 
 
+# the tag and branch ref prefixes that can match a (standard) version pattern.
+# the prefixes end at the pattern's first wildcard, and also cover tags with an initial `v`.
+def tagBranchRefPrefixes(pattern: str) -> list[str]:
+    literal = re.split(r"[*?\[]", pattern, 1)[0]
+    prefixes: list[str] = []
+    for refs in ["refs/tags/", "refs/heads/"]:
+        prefixes.append(f"{refs}{literal}")
+        if literal and strip_initial_v(f"v{literal}") == literal:
+            prefixes.append(f"{refs}v{literal}")
+    return prefixes
+
+
 def installDirReadyFile(path: str) -> str:
     return os.path.join(path, ".dfr_ready")
 
@@ -202,16 +411,51 @@ def curlGitFolderCmd(repo: str, commit: str, folder: str) -> str:
     return f"curl -L {repo}/tarball/{commit}  | tar --wildcards */{folder} --strip-components={folder.count('/') + 2} -xzC ."
 
 
-def runShellCmd(cmd: str):
+# a shell command running one of the common python scripts (e.g., under `sudo`)
+def pythonScriptCmd(script: str, args: list[str]) -> str:
+    pythonPath = os.path.dirname(os.path.dirname(paths.common))
+    scriptPath = os.path.join(paths.common, script)
+    return shlex.join(["env", f"PYTHONPATH={pythonPath}", sys.executable, scriptPath] + args)
+
+
+# the shell command that downloads an archive and extracts it (as root) into a folder while
+# downloading. the command exits with code 3 if the archive is not available.
+def downloadExtractShellCmd(url: str, extractPath: str, sha256: Optional[str] = None) -> str:
+    args = [url, "--extract", extractPath, "--sudo", "--connections", str(downloadConnections)]
+    args += ["--xz-threads", str(xzThreads)]
+    if sha256:
+        args += ["--sha256", sha256]
+    return pythonScriptCmd("download.py", args)
+
+
+# the phase marker of install shell commands (`dfr_phase <phase>` lines, emitted explicitly by
+# the command builders), which records the start of a phase in the telemetry phase log if any
+phaseMarkerFunction = (
+    'dfr_phase() { [ -z "$DFR_PHASE_LOG" ] || '
+    "echo \"$1 $(date +%s.%N) $(cut -d' ' -f16,17 /proc/$$/stat)\" >> \"$DFR_PHASE_LOG\"; }"
+)
+
+
+# the shell script of a command, which stops at the first error
+def shellScript(cmd: str) -> str:
     withErrCmd = f"""
                   set -e
+                  {phaseMarkerFunction}
                   {cmd}
                   """
     # strip empty lines (only whitespaces and newlines)
-    properCmd = "".join([s.strip(" ") for s in withErrCmd.splitlines(True) if s.strip("\t\r\n ")])
-    r = subprocess.run(properCmd, shell=True)
-    if r.returncode != 0:
-        sys.exit(r.returncode)
+    return "".join([s.strip(" ") for s in withErrCmd.splitlines(True) if s.strip("\t\r\n ")])
+
+
+# runs a shell command (that stops at the first error) and returns its exit code
+def runShellCmdStatus(cmd: str) -> int:
+    return subprocess.run(shellScript(cmd), shell=True).returncode
+
+
+def runShellCmd(cmd: str):
+    returncode = runShellCmdStatus(cmd)
+    if returncode != 0:
+        sys.exit(returncode)
 
 
 def getReadyFolders(path: str, __filterFunc: Callable[[str], bool]) -> list[str]:
@@ -244,6 +488,10 @@ class Tool:
     name: str
     versionReq: str
     versionLoc: VersionLoc
+    # a version pinned by a lockfile, which setVersion uses without resolving
+    lockedVersionLoc: Optional[VersionLoc] = None
+    # the telemetry of the running install
+    _telemetry: Optional[InstallTelemetry] = None
     _zero_install: bool = False
 
     def __init__(self, domain: str, vendor: str, name: str, versionReq: str):
@@ -253,18 +501,24 @@ class Tool:
         self.versionReq = dfrToStdPattern(strip_initial_v(versionReq))
 
     def latestInstalledVersionFiltered(self, __filterFunc: Callable[[str], bool]) -> VersionLoc:
-        # listing all the given path file/folders according to the given filter
-        folderList: list[str] = (
-            getReadyFolders(self._toolPathNoVersion("osstools"), __filterFunc)
-            + getReadyFolders(self._toolPathNoVersion("orgtools"), __filterFunc)
-            + getReadyFolders(self._toolPathNoVersion("mytools"), __filterFunc)
-        )
-        if folderList:
-            fullPath = max(folderList, key=lambda x: os.stat(installDirReadyFile(x)).st_ctime_ns)
-            toolMnt = fullPath.split("/")[2]
-            return VersionLoc(toolMnt, os.path.basename(fullPath))
-        else:
-            return VersionLoc("", "")
+        # (ready timestamp, tool mount, version, whether indexed) of all the matching installed versions
+        installed: list[tuple[int, str, str, bool]] = []
+        for toolMnt in toolMnts:
+            versions = mountIndex.versions(toolMnt, self.fullName())
+            if versions is not None:
+                installed += [(e["ready"], toolMnt, v, True) for v, e in versions.items() if __filterFunc(v)]
+            else:
+                # no index for this mount, so listing the ready folders according to the given filter
+                for fullPath in getReadyFolders(self._toolPathNoVersion(toolMnt), __filterFunc):
+                    ready = os.stat(installDirReadyFile(fullPath)).st_ctime_ns
+                    installed.append((ready, toolMnt, os.path.basename(fullPath), False))
+        for _, toolMnt, version, indexed in sorted(installed, key=lambda x: x[0], reverse=True):
+            # skipping (and dropping) the indexed versions whose install was removed
+            if indexed and not os.path.exists(self.installDirReadyFilePath(toolMntOpt=toolMnt, versionOpt=version)):
+                mountIndex.drop(toolMnt, self.fullName(), version)
+                continue
+            return VersionLoc(toolMnt, version)
+        return VersionLoc("", "")
 
     def latestInstallableVersion(self, pattern: str) -> str:
         return self.versionReq
@@ -299,16 +553,21 @@ class Tool:
     def _install(self, flags: str):
         pass
 
+    # the mount of an installed tool version, looked up in the mount indexes when available
+    # (or always on the install folders, with `useIndex=False`)
     @final
-    def getInstalledToolMnt(self, version: str) -> Optional[str]:
-        if os.path.exists(self.installDirReadyFilePath(toolMntOpt="osstools", versionOpt=version)):
-            return "osstools"
-        elif os.path.exists(self.installDirReadyFilePath(toolMntOpt="orgtools", versionOpt=version)):
-            return "orgtools"
-        elif os.path.exists(self.installDirReadyFilePath(toolMntOpt="mytools", versionOpt=version)):
-            return "mytools"
-        else:
-            return None
+    def getInstalledToolMnt(self, version: str, useIndex: bool = True) -> Optional[str]:
+        for toolMnt in toolMnts:
+            versions = mountIndex.versions(toolMnt, self.fullName()) if useIndex else None
+            if versions is not None:
+                if version in versions:
+                    if os.path.exists(self.installDirReadyFilePath(toolMntOpt=toolMnt, versionOpt=version)):
+                        return toolMnt
+                    # the install was removed
+                    mountIndex.drop(toolMnt, self.fullName(), version)
+            elif os.path.exists(self.installDirReadyFilePath(toolMntOpt=toolMnt, versionOpt=version)):
+                return toolMnt
+        return None
 
     @final
     def isInstalled(self) -> bool:
@@ -326,26 +585,59 @@ class Tool:
             for depFullName, depVersionReq in deps:
                 getTool(depFullName, depVersionReq).install(toolMntReq, "", True)
 
+    # called when the tool version is found installed already (instead of installing it)
+    def _installSkipped(self):
+        pass
+
+    # a telemetry span of an install phase (if the telemetry is enabled)
+    def span(self, phase: str):
+        return self._telemetry.span(phase) if self._telemetry else nullcontext()
+
     @final
     def install(self, toolMntReq: str, flags: str, withToolDeps: bool):
-        version = self.latestInstallableVersion(self.versionReq)
-        if version == "":
-            print(
-                f"No installable versions found to match the pattern `{self.versionReq}` for the tool `{self.fullName()}`"
-            )
-            sys.exit(1)
-        toolMnt: str
-        installedToolMnt = self.getInstalledToolMnt(version)
-        if installedToolMnt:
-            toolMnt = installedToolMnt
-        else:
-            toolMnt = toolMntReq
-        self.versionLoc = VersionLoc(toolMnt=toolMnt, version=version)
-        if installedToolMnt:
-            print(f"Found exiting tool `{self.fullName()}` with version `{version}` under mount `{toolMnt}`.")
-        else:
-            print(f"Installing tool `{self.fullName()}` with version `{version}` under mount `{toolMnt}`...")
-            self._install(flags)
+        if telemetryEnabled:
+            self._telemetry = InstallTelemetry(telemetryLog, self.fullName(), self.versionReq)
+        try:
+            with self.span("ref resolution"):
+                version = self.latestInstallableVersion(self.versionReq)
+            if version == "":
+                print(
+                    f"No installable versions found to match the pattern `{self.versionReq}` for the tool `{self.fullName()}`"
+                )
+                self._installSkipped()
+                sys.exit(1)
+            if self._telemetry:
+                self._telemetry.version = version
+            toolMnt: str
+            # concurrent installs of the same tool version wait for each other
+            with fileLock(os.path.join(paths.cache, "locks", f"{self.fullName()}@{version}.lock")):
+                installedToolMnt = self.getInstalledToolMnt(version, useIndex=False)
+                if installedToolMnt:
+                    toolMnt = installedToolMnt
+                else:
+                    toolMnt = toolMntReq
+                self.versionLoc = VersionLoc(toolMnt=toolMnt, version=version)
+                if installedToolMnt:
+                    print(f"Found exiting tool `{self.fullName()}` with version `{version}` under mount `{toolMnt}`.")
+                    self._installSkipped()
+                    status = "found"
+                else:
+                    print(f"Installing tool `{self.fullName()}` with version `{version}` under mount `{toolMnt}`...")
+                    self._install(flags)
+                    if os.path.exists(self.installDirReadyFilePath()):
+                        if dedupMode != "none":
+                            with self.span("dedup"):
+                                dedupArgs = ["dedup", dedupMode, toolMnt, self.installPath()]
+                                runShellCmd(f"sudo {pythonScriptCmd('dedup_store.py', dedupArgs)}")
+                        indexArgs = ["add", toolMnt, self.fullName(), version, self.installPath()]
+                        runShellCmd(f"sudo {pythonScriptCmd('mount_index.py', indexArgs)}")
+                    status = "installed"
+            if self._telemetry:
+                self._telemetry.status = status
+        finally:
+            if self._telemetry:
+                self._telemetry.flush()
+                self._telemetry = None
         if withToolDeps:
             self.installDependencies(toolMntReq)
 
@@ -420,6 +712,12 @@ class Tool:
     def env_ld_library_path(self) -> list[str]:
         return []
 
+    # the ld_library paths the tool still needs, without the lib dirs its binaries find by RUNPATH
+    @final
+    def ldLibraryPaths(self) -> list[str]:
+        verified = [f"{self.linkedPath()}/{d}" for d in verifiedLibDirs(self.installPath())]
+        return [p for p in self.env_ld_library_path() if p not in verified]
+
     # added man paths to the man path environment variable
     # by default, empty list
     def env_man_path(self) -> list[str]:
@@ -435,6 +733,25 @@ class Tool:
     def env_sources(self) -> list[str]:
         return []
 
+    # whether the effect of the environment source files can be captured as plain exports.
+    # tools whose source files define shell functions or aliases, or act on the shell otherwise,
+    # should opt out.
+    # by default, true
+    def env_sources_capturable(self) -> bool:
+        return True
+
+    # the environment setup of the source files: their captured exports (in capture mode, where
+    # they can be captured), or their bash `source`
+    @final
+    def sourcesEnv(self) -> list[str]:
+        ret: list[str] = []
+        for source in self.env_sources():
+            lines = None
+            if envCaptureEnabled and self.env_sources_capturable():
+                lines = envCapture.capture(source, self.env_extra())
+            ret += lines if lines is not None else [f"source {source}"]
+        return ret
+
     # added other environment variables {<var_name> : <value>, ...}
     # by default, empty dict
     def env_extra(self) -> dict[str, str]:
@@ -445,8 +762,29 @@ class Tool:
     def env_extra_cmds(self) -> list[str]:
         return []
 
+    # whether the search paths of the tool can be merged into an environment view.
+    # tools whose executables locate their own files through the invoked path should opt out.
+    # by default, true
+    def env_viewable(self) -> bool:
+        return True
+
+    # the search paths that an environment view merges
+    def viewSearchPaths(self) -> dict[str, list[str]]:
+        return {
+            "PATH": self.env_path(),
+            "LD_LIBRARY_PATH": self.ldLibraryPaths(),
+            "MANPATH": self.env_man_path(),
+            "PKG_CONFIG_PATH": self.env_pkg_config_path(),
+        }
+
+    def lockVersion(self, versionLoc: VersionLoc):
+        self.lockedVersionLoc = versionLoc
+
     def setVersion(self):
-        self.versionLoc = self.latestInstalledVersion(self.versionReq)
+        if self.lockedVersionLoc:
+            self.versionLoc = self.lockedVersionLoc
+        else:
+            self.versionLoc = self.latestInstalledVersion(self.versionReq)
         if self.versionLoc.version == "" or (not self._zero_install and not self.isInstalled()):
             print(
                 f'Missing version that matches `{self.versionReq}`.\nConsider running: `dfr install {self.fullName()} "{self.versionReq}"`'
@@ -454,39 +792,62 @@ class Tool:
             sys.exit(1)
 
     # the initial environment setup that includes environment variables,
-    # symlinks, and command aliases
+    # symlinks, and command aliases.
+    # when `viewed`, the search paths of the view are left to the environment view.
     @final
-    def getEnv(self) -> list[str]:
+    def getEnv(self, viewed: bool = False) -> list[str]:
         self.setVersion()
         for symlink in self.symlinks():
             os.symlink(symlink[0], symlink[1])
+        searchPaths = {} if viewed else self.viewSearchPaths()
         return (
             [f"#Environment for {self.name}"]
-            + getEnvPaths("PATH", self.env_path())
+            + getEnvPaths("PATH", searchPaths.get("PATH", []))
             + getEnvPaths("PYTHONPATH", self.env_python_path())
-            + getEnvPaths("LD_LIBRARY_PATH", self.env_ld_library_path())
-            + getEnvPaths("MANPATH", self.env_man_path())
-            + getEnvPaths("PKG_CONFIG_PATH", self.env_pkg_config_path())
+            + getEnvPaths("LD_LIBRARY_PATH", searchPaths.get("LD_LIBRARY_PATH", []))
+            + getEnvPaths("MANPATH", searchPaths.get("MANPATH", []))
+            + getEnvPaths("PKG_CONFIG_PATH", searchPaths.get("PKG_CONFIG_PATH", []))
             + list(map(lambda e: f"export {e[0]}={e[1]}", self.env_extra().items()))
             + list(map(lambda a: f"alias {a[0]}={a[1]}", self.cmdAliases().items()))
-            + list(map(lambda s: f"source {s}", self.env_sources()))
+            + self.sourcesEnv()
             + self.env_extra_cmds()
         )
 
 
+# flattens the nested `tool_versions` configuration of domains, vendors and tool names into
+# a dict of full tool names and their version requests. empty sections are skipped.
+def flattenToolVersions(tool_versions: Optional[dict]) -> dict[str, str]:
+    ret: dict[str, str] = {}
+    for domain, vendors in (tool_versions or {}).items():
+        for vendor, tools in (vendors or {}).items():
+            for name, versionReq in (tools or {}).items():
+                if versionReq is not None:
+                    ret[f"{domain}.{vendor}.{name}"] = str(versionReq)
+    return ret
+
+
+# every tool module is loaded at most once per process
+_toolModules: dict[str, Any] = {}
+_toolModulesLock = threading.RLock()
+
+
 def getToolModule(fullName: str):
-    try:
-        module_name = f"dfr_scripts.{fullName}"
-        spec = importlib.util.spec_from_file_location(
-            module_name, f"/etc/dfr/dfr_scripts/{fullName.replace('.','/')}/__init__.py"
-        )
-        module = importlib.util.module_from_spec(spec)  # type: ignore
-        sys.modules[module_name] = module
-        spec.loader.exec_module(module)  # type: ignore
-        return module
-    except FileNotFoundError:
-        print(f"Missing script for `{fullName}`")
-        sys.exit(1)
+    with _toolModulesLock:
+        if fullName in _toolModules:
+            return _toolModules[fullName]
+        try:
+            module_name = f"dfr_scripts.{fullName}"
+            spec = importlib.util.spec_from_file_location(
+                module_name, f"{paths.scripts}/{fullName.replace('.','/')}/__init__.py"
+            )
+            module = importlib.util.module_from_spec(spec)  # type: ignore
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)  # type: ignore
+            _toolModules[fullName] = module
+            return module
+        except FileNotFoundError:
+            print(f"Missing script for `{fullName}`")
+            sys.exit(1)
 
 
 def getTool(fullName: str, versionReq: str) -> Tool:
@@ -494,7 +855,11 @@ def getTool(fullName: str, versionReq: str) -> Tool:
     return module.SpecificTool(versionReq)
 
 
+# the static dependencies of a tool, taken from the registry index when available
 def getDependencies(fullName: str) -> set[str]:
+    dependencies = toolRegistry.dependencies(fullName)
+    if dependencies is not None:
+        return dependencies
     try:
         module = getToolModule(fullName)
         return module.dependencies
@@ -503,48 +868,122 @@ def getDependencies(fullName: str) -> set[str]:
 
 
 class Tools:
-    all: OrderedDict[str, Tool] = OrderedDict()
+    all: OrderedDict[str, Tool]
+    # the resolved static dependency and sibling graph of the configured tools
+    # (not available for tools loaded from a lockfile)
+    graph: Optional[ToolGraph] = None
+    # all tools of the environment (including dependencies) in setup order, once resolved
+    _resolved: Optional[list[Tool]] = None
+    # the environment view folder, once built
+    view: Optional[str] = None
+
+    # when `lockedTools` entries (from a lockfile) are given, every tool and dependency is
+    # pinned to the locked version and mount, so no version resolution is needed.
+    def __init__(self, tool_versions_flat: dict[str, str], lockedTools: Optional[list[dict[str, str]]] = None):
+        self.all = OrderedDict()
+        if lockedTools is not None:
+            self._resolved = []
+            for entry in lockedTools:
+                tool = getTool(entry["name"], entry["versionReq"])
+                tool.lockVersion(VersionLoc(entry["toolMnt"], entry["version"]))
+                self._resolved.append(tool)
+                if entry["name"] in tool_versions_flat and entry["name"] not in self.all:
+                    self.all[entry["name"]] = tool
+            return
+        tools: dict[str, Tool] = {}
+
+        def getConfiguredTool(fullName: str) -> Tool:
+            if fullName not in tools:
+                tools[fullName] = getTool(fullName, tool_versions_flat[fullName])
+            return tools[fullName]
+
+        def siblingsOf(fullName: str) -> set[str]:
+            siblings = toolRegistry.siblings(fullName)
+            return siblings if siblings is not None else getConfiguredTool(fullName).siblings()
 
-    def __init__(self, tool_versions_flat: dict[str, str]):
         # ordering tools so that if a tool appears as another tool's dependency,
         # but also as standalone, the standalone will come first and take precedence
-        ordered: list[str] = []
-        toolNames: list[str] = list(tool_versions_flat.keys())
-        while toolNames:
-            head, *tail = toolNames
-            deps: set[str] = getDependencies(head)
-            if deps:
-                goFirst = deps.intersection(toolNames)
-                if goFirst:
-                    toolNames = list(goFirst) + list(set(toolNames) - goFirst)
-                else:
-                    ordered.append(head)
-                    toolNames = tail
-            else:
-                ordered.append(head)
-                toolNames = tail
+        try:
+            self.graph = ToolGraph(tool_versions_flat, getDependencies, siblingsOf)
+            ordered = self.graph.configuredOrder()
+        except ToolGraphError as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+        # verifying existence of sibling configuration
+        missingSiblings = self.graph.missingSiblings()
+        for tool, sibling in missingSiblings:
+            print(f"Error: The tool {tool} requires {sibling} configuration as well!")
+        if missingSiblings:
+            sys.exit(1)
         for fullName in ordered:
-            self.all[fullName] = getTool(fullName, tool_versions_flat[fullName])
-
-    def getEnv(self) -> list[str]:
-        totalEnv: list[str] = []
+            self.all[fullName] = getConfiguredTool(fullName)
+
+    # resolves the versions of all the environment tools, including their dependencies,
+    # and pins them. returns the tools in setup order.
+    def resolved(self) -> list[Tool]:
+        if self._resolved is not None:
+            return self._resolved
+        ret: list[Tool] = []
         setTools: set[str] = set()
+        # the tool that required each dependency tool, for error reports
+        requiredBy: dict[str, str] = {}
         tools: list[Tool] = list(self.all.values())
         while tools:
             tool, *tail = tools
             tools = tail
-            # verifying existence of sibling configuration
+            # verifying existence of sibling configuration (of dependency tools)
             for s in tool.siblings():
                 if s not in self.all:
-                    print(f"Error: The tool {tool.fullName()} requires {s} configuration as well!")
+                    path = [tool.fullName()]
+                    while path[0] in requiredBy:
+                        path.insert(0, requiredBy[path[0]])
+                    print(f"Error: The tool {tool.fullName()} requires {s} configuration as well! ({' -> '.join(path)})")
                     sys.exit(1)
-            totalEnv = totalEnv + tool.getEnv()
+            tool.setVersion()
+            tool.lockVersion(tool.versionLoc)
+            ret.append(tool)
             setTools.add(tool.fullName())
             # if we have dependencies, we set them up as well
             for depFullName, depVersionReq in tool.dependencies().items():
                 if depFullName not in setTools:
+                    requiredBy.setdefault(depFullName, tool.fullName())
                     tools = [getTool(depFullName, depVersionReq)] + tools
-        return totalEnv
+        self._resolved = ret
+        return ret
+
+    # the lockfile entries that pin all the resolved environment tools
+    def lockedTools(self) -> list[dict[str, str]]:
+        return [
+            {
+                "name": t.fullName(),
+                "versionReq": t.versionReq,
+                "version": t.versionLoc.version,
+                "toolMnt": t.versionLoc.toolMnt,
+                "installPath": t.installPath(),
+            }
+            for t in self.resolved()
+        ]
+
+    def getEnv(self) -> list[str]:
+        totalEnv: list[str] = []
+        if not envViewEnabled:
+            for tool in self.resolved():
+                totalEnv = totalEnv + tool.getEnv()
+            return totalEnv
+        # the tool symlinks (that the view links through) are created first
+        viewedTools = [t for t in self.resolved() if t.env_viewable()]
+        for tool in self.resolved():
+            totalEnv = totalEnv + tool.getEnv(viewed=tool in viewedTools)
+        searchPaths: dict[str, list[str]] = {}
+        for tool in viewedTools:
+            for envName, toolPaths in tool.viewSearchPaths().items():
+                searchPaths.setdefault(envName, []).extend(toolPaths)
+        self.view = envView.build([t.installPath() for t in viewedTools], searchPaths)
+        viewEnv = [f"#Environment view {self.view}"]
+        for envName, viewDir in viewDirs.items():
+            if searchPaths.get(envName):
+                viewEnv += getEnvPaths(envName, [os.path.join(self.view, viewDir)])
+        return viewEnv + totalEnv
 
 
 class ZeroInstallTool(Tool):
@@ -565,47 +1004,202 @@ class ShellInstallTool(Tool):
     def _installShellCmd(self, flags: str) -> str:
         pass
 
+    # called after the install command has finished (or failed)
+    def _installCleanup(self):
+        pass
+
+    # installs a prebuilt package instead of running the install command, if one is available.
+    # returns True if the tool was installed.
+    def _installPrebuilt(self, flags: str) -> bool:
+        return False
+
+    # called after the install command has succeeded
+    def _installDone(self, flags: str):
+        pass
+
+    # whether the tool is built with CMake (which gets the compiler cache as a compiler launcher)
+    def usesCMake(self) -> bool:
+        return False
+
+    # the build folder whose paths are made relative in compiler cache lookups
+    def compilerCacheBaseDir(self) -> Optional[str]:
+        return None
+
+    # runs the install shell command, with a telemetry span for every phase of it
+    @final
+    def _runInstallShellCmd(self, cmd: str):
+        if self._telemetry:
+            returncode = self._telemetry.runShellCmd(shellScript(cmd))
+        else:
+            returncode = runShellCmdStatus(cmd)
+        if returncode != 0:
+            sys.exit(returncode)
+
     @final
     def _install(self, flags: str):
-        runShellCmd(self._installShellCmd(flags))
+        try:
+            if self._installPrebuilt(flags):
+                return
+            cmd = self._installShellCmd(flags)
+            if compilerCache:
+                statsBefore = compilerCache.stats()
+                self._runInstallShellCmd(
+                    compilerCache.envShellCmd(self.usesCMake(), self.compilerCacheBaseDir()) + "\n" + cmd
+                )
+                print(compilerCache.report(statsBefore, compilerCache.stats()))
+            else:
+                self._runInstallShellCmd(cmd)
+        finally:
+            self._installCleanup()
+        self._installDone(flags)
 
 
-class CloneProgress(RemoteProgress):
-    def update(self, op_code, cur_count, max_count=None, message=""):
-        percentage = (cur_count / max_count) * 100 if max_count else 0
-        print(f"Progress: {percentage:.2f}%", end="\r")
+def cloneProgress():
+    from git import RemoteProgress
+
+    class CloneProgress(RemoteProgress):
+        def update(self, op_code, cur_count, max_count=None, message=""):
+            percentage = (cur_count / max_count) * 100 if max_count else 0
+            print(f"Progress: {percentage:.2f}%", end="\r")
+
+    return CloneProgress()
 
 
 class GitOSSTool(ShellInstallTool):
     repoURL: str
     repoOwnerName: str
     repoName: str
-    repo: Optional[Repo] = None
+    repo: Optional["Repo"] = None
     repoLocalPath: str
+    # mirrors held in use by the local repo
+    _repoMirrors: Optional[ExitStack] = None
     # if set to true, then latest installable version will only cater to tagged commits
     _useOnlyTaggedCommits: bool = False
 
-    def getRepo(self) -> Repo:
+    # the local repo, which has the given commit (if any) in mirror mode, also where no branch or
+    # tag reaches it
+    def getRepo(self, commit: Optional[str] = None) -> "Repo":
+        from git import Repo
+
         if self.repo:
+            if commit and self._repoMirrors:
+                # the local repo shares the objects of the mirror
+                mirrorStore.update(self.repoURL, commit)
             return self.repo
         else:
-            print(f"Cloning from {self.repoURL} ...")
-            self.repoLocalPath = f"/tmp/dfr_git_{self.repoName}"
-            shutil.rmtree(self.repoLocalPath, ignore_errors=True)
-            self.repo = Repo.clone_from(self.repoURL, self.repoLocalPath, progress=CloneProgress())  # type: ignore
+            self.repoLocalPath = tempfile.mkdtemp(prefix=f"dfr_git_{self.repoName}_")
+            if gitFetchMode == "mirror":
+                self._repoMirrors = ExitStack()
+                try:
+                    self._repoMirrors.enter_context(mirrorStore.use(self.repoURL, commit))
+                    print(f"Checking out from the mirror of {self.repoURL} ...")
+                    mirrorStore.clone(self.repoURL, self.repoLocalPath)
+                except subprocess.CalledProcessError as e:
+                    print(f"Error while checking out {self.repoURL} from its mirror: {str(e)}")
+                    sys.exit(1)
+                self.repo = Repo(self.repoLocalPath)
+            else:
+                print(f"Cloning from {self.repoURL} ...")
+                self.repo = Repo.clone_from(self.repoURL, self.repoLocalPath, progress=cloneProgress())  # type: ignore
             return self.repo
 
+    def compilerCacheBaseDir(self) -> Optional[str]:
+        return getattr(self, "repoLocalPath", None)
+
+    # whether a build of this tool can be reused on other nodes from the package cache
+    # (on the same mount, since builds embed their install prefix)
+    def packageCacheable(self) -> bool:
+        return True
+
+    # the package cache key of the install (tool, exact commit, build flags, base image and install path)
+    def packageKey(self, flags: str) -> Optional[str]:
+        if packageCache is None or not self.packageCacheable():
+            return None
+        return packageKey(self.fullName(), self.versionLoc.version, flags, baseFingerprint(), self.installPath())
+
+    def _installPrebuilt(self, flags: str) -> bool:
+        key = self.packageKey(flags)
+        if key is None or not packageCache.has(key):  # type: ignore
+            return False
+        print(f"Unpacking the prebuilt package of `{self.fullName()}` from {packageCache.location} ...")  # type: ignore
+        with self.span("package unpack"):
+            returncode = runShellCmdStatus(packageCache.unpackShellCmd(key, self.installPath()))  # type: ignore
+        if returncode == 0:
+            # the local repo of the version resolution is not needed for a prebuilt install
+            self._releaseRepo()
+            return True
+        print("Could not unpack the prebuilt package, building from source instead...")
+        return False
+
+    def _installDone(self, flags: str):
+        key = self.packageKey(flags)
+        if key is None or not packageCachePush:
+            return
+        print(f"Pushing the install of `{self.fullName()}` to the package cache...")
+        with self.span("package push"):
+            returncode = runShellCmdStatus(packageCache.pushShellCmd(key, self.installPath()))  # type: ignore
+        if returncode != 0:
+            print("Warning: could not push the install to the package cache.")
+
+    def _installCleanup(self):
+        if self._repoMirrors:
+            self._repoMirrors.close()
+            self._repoMirrors = None
+
+    # releases the mirrors and removes the local repo of the version resolution
+    def _releaseRepo(self):
+        self._installCleanup()
+        if self.repo:
+            shutil.rmtree(self.repoLocalPath, ignore_errors=True)
+            self.repo = None
+
+    # the local repo of the version resolution is not needed when the version is installed already
+    def _installSkipped(self):
+        self._releaseRepo()
+
     def getLatestCommitHash(self) -> str:
         """Get the commit hash of the remote HEAD."""
-        output = subprocess.check_output(["git", "ls-remote", self.repoURL, "HEAD"])
-        return output.decode().split()[0]
+        for commit, ref in lsRemote(self.repoURL, ["HEAD"]):
+            if ref == "HEAD":
+                return commit
+        print(f"Could not find the HEAD commit of {self.repoURL}")
+        return sys.exit(1)
 
     def getFullCommitHash(self, partial: str) -> str:
         if len(partial) == 40:
             return partial
+        elif gitFetchMode == "shallow":
+            # there is no local history to resolve the hash prefix with
+            return get_full_commit_hash(self.repoOwnerName, self.repoName, partial)
         else:
             return self.getRepo().commit(partial).hexsha
 
+    # fetches just the given commit into a new local repo, and shallow submodules
+    # in parallel for recursive clones.
+    # falls back to a blobless fetch of the history when the server refuses to fetch
+    # a commit by its hash, and to full submodule fetches when shallow ones fail.
+    def shallowCheckout(self, commit: str):
+        self.repoLocalPath = tempfile.mkdtemp(prefix=f"dfr_git_{self.repoName}_")
+        print(f"Fetching {commit} from {self.repoURL} ...")
+        git = ["git", "-C", self.repoLocalPath]
+        with self.span("clone"):
+            subprocess.run(["git", "init", "--quiet", self.repoLocalPath], check=True)
+            subprocess.run(git + ["remote", "add", "origin", self.repoURL], check=True)
+            if subprocess.run(git + ["fetch", "--quiet", "--depth=1", "origin", commit]).returncode != 0:
+                print("Fetching by commit hash failed, fetching the history without file contents...")
+                subprocess.run(git + ["fetch", "--quiet", "--filter=blob:none", "origin"], check=True)
+        with self.span("checkout"):
+            subprocess.run(git + ["checkout", "--quiet", commit], check=True)
+        if self.recursiveClone():
+            submoduleUpdate = git + ["submodule", "update", "--init", "--recursive", f"--jobs={gitJobs}"]
+            with self.span("submodule update"):
+                if subprocess.run(submoduleUpdate + ["--depth=1"]).returncode != 0:
+                    print("Shallow submodule fetch failed, fetching full submodules...")
+                    subprocess.run(submoduleUpdate, check=True)
+        from git import Repo
+
+        self.repo = Repo(self.repoLocalPath)
+
     def __init__(self, domain: str, name: str, versionReq: str, repoURL: str):
         self.repoURL = repoURL
         self.repoOwnerName, self.repoName = extract_owner_and_repo_from_github_url(self.repoURL)
@@ -619,11 +1213,9 @@ class GitOSSTool(ShellInstallTool):
     # keys are tags, values are commits.
     @final
     def getGitTagBranchCommits(self, tagPattern: str) -> dict[str, str]:
-        command = f"git ls-remote -th {self.repoURL}"
-        commitsTagsBytes = subprocess.Popen(shlex.split(command), stdout=subprocess.PIPE).stdout.read().splitlines()  # type: ignore
         ret: dict[str, str] = {}
-        for ctb in commitsTagsBytes:
-            commit, tag = ctb.decode("utf-8").replace("refs/tags/", "").replace("refs/heads/", "").split("\t")
+        for commit, ref in lsRemote(self.repoURL, tagBranchRefPrefixes(tagPattern)):
+            tag = ref.replace("refs/tags/", "").replace("refs/heads/", "")
             if fnmatch.fnmatch(strip_initial_v(tag), tagPattern):
                 ret[tag] = commit
         return ret
@@ -635,9 +1227,11 @@ class GitOSSTool(ShellInstallTool):
         if len(tagsAndCommits) <= 1:
             return tagsAndCommits
         else:
-            return sort_tags_by_commit_datetime(
-                self.repoOwnerName, self.repoName, self.getGitTagBranchCommits(tagPattern)
-            )
+            if tagDatesSource == "git":
+                return sort_tags_by_commit_datetime_from_git(
+                    self.repoURL, self.repoOwnerName, self.repoName, tagsAndCommits
+                )
+            return sort_tags_by_commit_datetime(self.repoOwnerName, self.repoName, tagsAndCommits)
 
     def latestInstalledVersion(self, versionReq: str) -> VersionLoc:
         commits: list[str]
@@ -673,11 +1267,72 @@ class GitOSSTool(ShellInstallTool):
     def acceptCloneError(self) -> bool:
         return False
 
+    # whether the built binaries get RUNPATH fixups to the lib dirs of the tool
+    # by default, true
+    def rpathFixup(self) -> bool:
+        return True
+
+    # the lib dirs (relative to the install) of the ld_library paths under the linked path
+    def rpathLibDirs(self) -> list[str]:
+        prefix = f"{self.linkedPath()}/"
+        return [p[len(prefix) :] for p in self.env_ld_library_path() if p.startswith(prefix)]
+
+    # the post-install command setting the RUNPATHs of the built binaries to the lib dirs of the tool
+    def _rpathFixupShellCmd(self) -> str:
+        libDirs = self.rpathLibDirs()
+        if not rpathFixup or not self.rpathFixup() or not libDirs:
+            return ""
+        return f"""
+                dfr_phase rpath-fixup
+                sudo {pythonScriptCmd('rpath_fixup.py', ['fix', self.installPath()] + libDirs)}
+                """
+
+    # whether the install is just the source tree of the commit, which can then be streamed from
+    # the mirrors into the install folder without a working tree (see `_archiveInstallShellCmd`)
+    def archiveInstall(self) -> bool:
+        return False
+
+    # streams the tree of the commit (and its submodules) from the mirrors into the install folder
+    def _archiveInstallShellCmd(self) -> str:
+        self._releaseRepo()
+        self._repoMirrors = ExitStack()
+        commit = self.versionLoc.version
+        subprocess.run(["sudo", "rm", "-rf", self.installPath()], check=True)
+        print(f"Streaming {commit} of {self.repoURL} from its mirror into the installation folder...")
+        with self.span("archive"):
+            mirrorStore.archive(
+                self.repoURL, commit, self.installPath(), self._repoMirrors, self.recursiveClone(), sudo=True
+            )
+        return f"""
+                dfr_phase ready-marker
+                sudo touch -a -m -t {mirrorStore.commitTouchTime(self.repoURL, commit)} {self.installDirReadyFilePath()}
+                """
+
     @final
     def _installShellCmd(self, flags: str) -> str:
-        self.getRepo().git.checkout(self.versionLoc.version)
-        if self.recursiveClone():
-            self.getRepo().submodule_update(recursive=True)
+        if gitFetchMode == "mirror" and self.archiveInstall():
+            try:
+                return self._archiveInstallShellCmd()
+            except subprocess.CalledProcessError as e:
+                print(f"Could not stream {self.repoURL} from its mirror ({str(e)}), checking it out instead...")
+                self._installCleanup()
+        if gitFetchMode == "shallow":
+            try:
+                self.shallowCheckout(self.versionLoc.version)
+            except subprocess.CalledProcessError as e:
+                print(f"Error while fetching {self.repoURL}: {str(e)}")
+                sys.exit(1)
+        else:
+            with self.span("clone"):
+                self.getRepo(self.versionLoc.version)
+            with self.span("checkout"):
+                self.getRepo().git.checkout(self.versionLoc.version)
+            if self.recursiveClone():
+                with self.span("submodule update"):
+                    if self._repoMirrors:
+                        mirrorStore.updateSubmodules(self.repoLocalPath, self._repoMirrors)
+                    else:
+                        self.getRepo().submodule_update(recursive=True)
         # acceptErr = ""
         # if self.acceptCloneError():
         #     acceptErr = "|| true"
@@ -686,7 +1341,10 @@ class GitOSSTool(ShellInstallTool):
                 sudo mkdir -p {self.installPath()}
                 cd {self.repoLocalPath}
                 TIMEDATE=`TZ=UTC0 git show --quiet --date='format-local:%Y%m%d%H%M.%S' --format="%cd"`
+                dfr_phase build
                 {self.buildAndInstallShellCmd(flags)}
+                {self._rpathFixupShellCmd()}
+                dfr_phase ready-marker
                 sudo touch -a -m -t $TIMEDATE {self.installDirReadyFilePath()}
                 sudo rm -rf {self.repoLocalPath}
                 """
@@ -696,8 +1354,13 @@ class GitPythonOSSTool(GitOSSTool):
     def __init__(self, domain: str, name: str, versionReq: str, repo: str):
         super().__init__(domain, name, versionReq, repo)
 
+    # the plain source tree is streamed into the install folder, unless the install is customized
+    def archiveInstall(self) -> bool:
+        return type(self).buildAndInstallShellCmd is GitPythonOSSTool.buildAndInstallShellCmd
+
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase install
                 echo Copying source files into installation folder without git history...
                 sudo rsync -a --info=progress2 . {self.installPath()} --exclude '.git'
                 """
@@ -715,11 +1378,14 @@ class Download:
     url: str
     fileName: str
     date: str
+    # the file size in bytes, if known (for the download ETA)
+    size: Optional[int]
 
-    def __init__(self, url: str, fileName: str, date: str) -> None:
+    def __init__(self, url: str, fileName: str, date: str, size: Optional[int] = None) -> None:
         self.url = url
         self.fileName = fileName
         self.date = date
+        self.size = size
 
 
 class InteractivelyDownloadedTool(Tool):
@@ -747,42 +1413,60 @@ class InteractivelyDownloadedTool(Tool):
         print(f"Error: {self.name} version `{self.versionLoc.version}` is not supported.")
         sys.exit(1)
 
-    def _downloadWithFirefox(self, downloadedFilePath: str, downloadURL: str):
-        if os.path.exists(downloadedFilePath) and os.path.getsize(downloadedFilePath) != 0:
-            print(f"Installation already downloaded.")
-        else:
+    # the download is complete when firefox renames its `.part` file to the downloaded file name
+    def _downloadWithFirefox(self, download: Download):
+        from .downloadwatch import DownloadWatch
+
+        watch = DownloadWatch(self.downloadsPath, download.fileName, download.size)
+        try:
+            if watch.completed():
+                print(f"Installation already downloaded.")
+                return
+            for path in [watch.path, watch.partPath]:
+                if os.path.exists(path):
+                    os.remove(path)
             print(f"(Remote) Firefox is now opening the {self.vendor} download page for you.")
             print(self.downloadInstructions())
             firefoxPid = subprocess.Popen(
-                ["firefox", downloadURL],
+                ["firefox", download.url],
                 stdin=subprocess.DEVNULL,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
             )
-            if os.path.exists(downloadedFilePath):
-                os.remove(downloadedFilePath)
-            print(f"Waiting for start of file download at {downloadedFilePath}...")
-            while not os.path.exists(downloadedFilePath):
-                time.sleep(1)
+            print(f"Waiting for start of file download at {watch.path}...")
+            watch.waitForStart()
             print("Start of download detected.")
             print("Waiting for end of download (do not close the firefox browser)...")
-            while os.path.getsize(downloadedFilePath) == 0:
-                time.sleep(1)
+            watch.waitForCompletion()
             print("Download completed!")
             firefoxPid.terminate()
+        finally:
+            watch.close()
 
     def _install(self, flags: str):
         try:
             download = self.versionDownloadMap()[self.versionLoc.version]
         except:
             return self.unsupportedVersionErr()
-        downloadedFilePath = f"{self.downloadsPath}/{download.fileName}"
-        self._downloadWithFirefox(downloadedFilePath, download.url)
-        print("Extracting setup...")
-        self.extract(downloadedFilePath)
-        os.remove(downloadedFilePath)
-        self.postDownloadInstall(download.date, flags)
-
+        # the cached download (and its extracted installer) is held in use for the whole install,
+        # so it is not evicted meanwhile (the lookup is repeated if it was evicted before its use)
+        while True:
+            downloadedFilePath = downloadCache.lookup(download.fileName)
+            if downloadedFilePath is not None:
+                print(f"Using the cached download {downloadedFilePath}")
+            else:
+                self._downloadWithFirefox(download)
+                print("Adding the download to the download cache...")
+                downloadedFilePath = downloadCache.put(f"{self.downloadsPath}/{download.fileName}", move=True)
+            with downloadCache.use(downloadedFilePath) as cached:
+                if cached:
+                    print("Extracting setup...")
+                    self.extract(downloadedFilePath)
+                    self.postDownloadInstall(download.date, flags)
+                    return
+
+    # the downloaded file is kept in the download cache (see `downloadCache.extractedTree` to
+    # cache the extracted installer as well)
     def extract(self, downloadedFilePath: str):
         pass
 
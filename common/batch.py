@@ -0,0 +1,319 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from . import InteractivelyDownloadedTool, getDependencies, getTool, paths
+from .toolgraph import ToolGraph, ToolGraphError
+
+
+class InstallNode:
+    fullName: str
+    versionReq: str
+    requiredBy: Optional[str]
+    state: str = "queued"
+    startTime: float = 0.0
+    endTime: float = 0.0
+    logPath: str
+    version: str = ""
+    toolMnt: str = ""
+    # the nodes to install first (known once resolved, or once installed for tools that read
+    # their dependencies from their install tree)
+    deps: list["InstallNode"]
+    # interactive installs (e.g., browser downloads) run in the foreground, one at a time
+    interactive: bool = False
+
+    def __init__(self, fullName: str, versionReq: str, requiredBy: Optional[str], logPath: str):
+        self.fullName = fullName
+        self.versionReq = versionReq
+        self.requiredBy = requiredBy
+        self.logPath = logPath
+        self.deps = []
+
+    def elapsed(self) -> float:
+        if self.startTime == 0.0:
+            return 0.0
+        return (self.endTime or time.time()) - self.startTime
+
+    # the last line written to the install log
+    def lastLogLine(self) -> str:
+        try:
+            with open(self.logPath, "rb") as file:
+                file.seek(max(0, os.path.getsize(self.logPath) - 4096))
+                lines = [l for l in re.split(r"[\r\n]", file.read().decode(errors="replace")) if l.strip()]
+                return lines[-1].strip() if lines else ""
+        except OSError:
+            return ""
+
+
+# Installs a whole tool configuration as a dependency DAG.
+# The DAG is built up front: the configured tools are ordered with the static dependency graph
+# (`ToolGraph`), and every node (a tool and its version request) is first resolved in its own
+# process by `install_node.py`, which reports its version and tool dependencies. These become
+# new nodes, and a node is only installed (with its resolved version and mount) once all its
+# dependencies are installed, so a failed node blocks the branch of the tools depending on it.
+# The nodes of a dependency cycle found while resolving fail.
+# Tools that only know their dependencies once installed (like OpenLane and LiteX) are installed
+# first, and are done once their dependencies are.
+# Independent nodes run concurrently in a bounded worker pool (with their output in log files),
+# and interactive installs run in the foreground, one at a time.
+class BatchInstaller:
+    icons = {
+        "queued": " ",
+        "resolving": "?",
+        "waiting": ".",
+        "running": ">",
+        "finishing": "~",
+        "done": "+",
+        "failed": "!",
+        "blocked": "x",
+    }
+    # the states of nodes with a job in the worker pool
+    busyStates = ["resolving", "running"]
+    # seconds between renewals of the cached sudo credentials
+    sudoRenewal = 60
+
+    def __init__(self, tool_versions_flat: dict[str, str], toolMnt: str, jobs: int, logDir: str):
+        self.toolMnt = toolMnt
+        self.logDir = logDir
+        self.nodes: list[InstallNode] = []
+        self._known: dict[tuple[str, str], InstallNode] = {}
+        # re-entrant, as state changes are reported while holding it
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+        self._interactive = sys.stdout.isatty()
+        self._renderedLines = 0
+        os.makedirs(logDir, exist_ok=True)
+        try:
+            graph = ToolGraph(tool_versions_flat, getDependencies, lambda _: set())
+            ordered = graph.configuredOrder()
+        except ToolGraphError as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
+        configured = {n: self._add(n, tool_versions_flat[n], None) for n in ordered}
+        # the static dependencies between configured tools
+        for fullName, node in configured.items():
+            node.deps += [configured[d] for d in graph.dependencies[fullName] if d in configured]
+
+    def _add(self, fullName: str, versionReq: str, requiredBy: Optional[str]) -> InstallNode:
+        with self._lock:
+            if (fullName, versionReq) in self._known:
+                return self._known[(fullName, versionReq)]
+            logName = re.sub(r"[^\w.@-]", "_", f"{fullName}@{versionReq}")
+            node = InstallNode(fullName, versionReq, requiredBy, os.path.join(self.logDir, f"{logName}.log"))
+            node.interactive = isinstance(getTool(fullName, versionReq), InteractivelyDownloadedTool)
+            self._known[(fullName, versionReq)] = node
+            self.nodes.append(node)
+            return node
+
+    def _addDeps(self, node: InstallNode, dependencies: dict[str, Optional[str]]):
+        for depFullName, depVersionReq in dependencies.items():
+            if depVersionReq is not None:
+                dep = self._add(depFullName, depVersionReq, node.fullName)
+                if dep not in node.deps:
+                    node.deps.append(dep)
+
+    # appends an error to the install log of a node
+    def _logError(self, node: InstallNode, message: str):
+        with open(node.logPath, "a") as log:
+            log.write(f"\nError: {message}\n")
+
+    # runs `install_node.py` for a node, and returns its result (or None if it failed).
+    # a node is resolved with its version request, and installed with its resolved version and mount.
+    def _runNode(self, node: InstallNode, cmd: str, foreground: bool = False) -> Optional[dict]:
+        resultPath = f"{node.logPath}.{cmd}.json"
+        env = dict(os.environ)
+        env["PYTHONPATH"] = ":".join(filter(None, [os.path.dirname(os.path.dirname(paths.common)), env.get("PYTHONPATH")]))
+        version, toolMnt = (node.versionReq, self.toolMnt) if cmd == "resolve" else (node.version, node.toolMnt)
+        args = [
+            sys.executable,
+            os.path.join(paths.common, "install_node.py"),
+            cmd,
+            node.fullName,
+            version,
+            toolMnt,
+            resultPath,
+        ]
+        try:
+            if foreground:
+                r = subprocess.run(args, env=env)
+            else:
+                with open(node.logPath, "ab") as log:
+                    r = subprocess.run(args, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, env=env)
+            if r.returncode != 0:
+                return None
+            with open(resultPath) as file:
+                return json.load(file)
+        except Exception as e:
+            self._logError(node, f"running `{cmd}` for `{node.fullName}` failed: {str(e)}")
+            return None
+
+    def _setState(self, node: InstallNode, state: str):
+        node.state = state
+        if state in ["done", "failed", "blocked"]:
+            node.endTime = time.time()
+        self._report(node)
+
+    # fails the nodes of the dependency cycles among the nodes (which would wait for each other forever)
+    def _failCycles(self):
+        with self._lock:
+            while True:
+                live = {f"{n.fullName}@{n.versionReq}": n for n in self.nodes if n.state != "failed"}
+                try:
+                    ToolGraph(
+                        {key: n.versionReq for key, n in live.items()},
+                        lambda key: {f"{d.fullName}@{d.versionReq}" for d in live[key].deps if d.state != "failed"},
+                        lambda _: set(),
+                    ).order()
+                    return
+                except ToolGraphError as e:
+                    for key in set(e.path):
+                        self._logError(live[key], str(e))
+                        self._setState(live[key], "failed")
+
+    def _resolve(self, node: InstallNode):
+        try:
+            result = self._runNode(node, "resolve")
+            if result is None:
+                with self._lock:
+                    self._setState(node, "failed")
+                return
+            with self._lock:
+                node.version = result["version"]
+                node.toolMnt = result["toolMnt"]
+            if result["dependencies"] is not None:
+                self._addDeps(node, result["dependencies"])
+            with self._lock:
+                self._setState(node, "waiting")
+                self._failCycles()
+        except Exception as e:
+            self._logError(node, f"resolving `{node.fullName}` failed: {str(e)}")
+            with self._lock:
+                self._setState(node, "failed")
+
+    def _install(self, node: InstallNode, foreground: bool = False):
+        try:
+            result = self._runNode(node, "install", foreground)
+            if result is None:
+                with self._lock:
+                    self._setState(node, "failed")
+                return
+            with self._lock:
+                node.version = result["version"]
+                node.toolMnt = result["toolMnt"]
+            self._addDeps(node, result["dependencies"])
+            with self._lock:
+                self._setState(node, "finishing")
+                self._failCycles()
+        except Exception as e:
+            self._logError(node, f"installing `{node.fullName}` failed: {str(e)}")
+            with self._lock:
+                self._setState(node, "failed")
+
+    # schedules the nodes whose dependencies are settled, and returns whether any node is pending
+    def _schedule(self) -> bool:
+        pending = False
+        foreground: Optional[InstallNode] = None
+        with self._lock:
+            for node in list(self.nodes):
+                if node.state == "queued":
+                    node.state = "resolving"
+                    node.startTime = time.time()
+                    self._executor.submit(self._resolve, node)
+                elif node.state in ["waiting", "finishing"]:
+                    if any(d.state in ["failed", "blocked"] for d in node.deps):
+                        self._setState(node, "blocked")
+                        continue
+                    if all(d.state == "done" for d in node.deps):
+                        if node.state == "finishing":
+                            self._setState(node, "done")
+                            continue
+                        if node.interactive:
+                            if foreground is None:
+                                foreground = node
+                        else:
+                            self._setState(node, "running")
+                            self._executor.submit(self._install, node)
+                if node.state not in ["done", "failed", "blocked"]:
+                    pending = True
+        if foreground:
+            self._runForeground(foreground)
+        return pending
+
+    # an interactive install runs in the foreground, once the running jobs are done (so the
+    # live view does not write over it)
+    def _runForeground(self, node: InstallNode):
+        while any(n.state in self.busyStates for n in self.nodes):
+            time.sleep(0.5)
+        with self._lock:
+            self._setState(node, "running")
+        print(f"Installing `{node.fullName}` `{node.versionReq}` in the foreground...", flush=True)
+        self._install(node, foreground=True)
+        self._renderedLines = 0
+
+    # the cached sudo credentials are validated up front (asking for the password in the
+    # foreground), and renewed while installing, so no job waits for a password prompt
+    def _renewSudo(self, interactive: bool) -> bool:
+        cmd = ["sudo", "-v"] if interactive else ["sudo", "-n", "-v"]
+        return subprocess.run(cmd).returncode == 0
+
+    # without a terminal, state changes are reported as plain lines
+    def _report(self, node: InstallNode):
+        if not self._interactive:
+            with self._lock:
+                print(f"[{node.state}] {node.fullName} ({node.versionReq}) {node.elapsed():.0f}s", flush=True)
+
+    # redraws the live view of all nodes
+    def _render(self):
+        width = shutil.get_terminal_size().columns
+        with self._lock:
+            nodes = list(self.nodes)
+        lines: list[str] = []
+        for node in nodes:
+            line = f"[{self.icons[node.state]}] {node.fullName:<40} {node.versionReq:<12} {node.elapsed():>6.0f}s"
+            if node.state == "running":
+                line = f"{line}  {node.lastLogLine()}"
+            elif node.state in ["done", "finishing"]:
+                line = f"{line}  {node.version} @ {node.toolMnt}"
+            elif node.state == "blocked":
+                line = f"{line}  (a dependency failed)"
+            lines.append(line[:width])
+        out = f"\x1b[{self._renderedLines}A" if self._renderedLines else ""
+        out += "".join(f"\x1b[2K{l}\n" for l in lines)
+        sys.stdout.write(out)
+        sys.stdout.flush()
+        self._renderedLines = len(lines)
+
+    # installs all nodes and returns True if all of them succeeded
+    def run(self) -> bool:
+        if not self._renewSudo(True):
+            print("Error: the installs need sudo access")
+            return False
+        renewed = time.time()
+        while self._schedule():
+            if self._interactive:
+                self._render()
+            if time.time() - renewed > self.sudoRenewal:
+                self._renewSudo(False)
+                renewed = time.time()
+            time.sleep(0.5)
+        if self._interactive:
+            self._render()
+        self._executor.shutdown()
+        failed = [n for n in self.nodes if n.state != "done"]
+        done = len(self.nodes) - len(failed)
+        print(f"Installed {done} of {len(self.nodes)} tool versions.")
+        for node in failed:
+            requiredBy = f" (required by `{node.requiredBy}`)" if node.requiredBy else ""
+            if node.state == "blocked":
+                failedDeps = [f"`{d.fullName}`" for d in node.deps if d.state != "done"]
+                print(f"Skipped `{node.fullName}` `{node.versionReq}`{requiredBy}: {', '.join(failedDeps)} not installed.")
+            else:
+                print(f"Failed to install `{node.fullName}` `{node.versionReq}`{requiredBy}. See log: {node.logPath}")
+        return not failed
@@ -0,0 +1,7 @@
+from dfr_scripts.common import getToolModule, toolRegistry
+
+# (re)generates the tool registry index of the installed scripts.
+# expected to run whenever the scripts are installed or updated.
+# usage: build_registry.py
+tools = toolRegistry.build(getToolModule)
+print(f"Indexed {len(tools)} tools in {toolRegistry.path()}")
@@ -0,0 +1,97 @@
+import json
+import os
+import shlex
+import shutil
+import subprocess
+from typing import Optional
+
+
+# A persistent compiler cache (ccache or sccache) shared by all source builds.
+# Builds run in throwaway clones, so with ccache the clone folder is set as the base
+# directory, making the cached results independent of the clone location.
+# CMake-based tools get the cache as `CMAKE_<LANG>_COMPILER_LAUNCHER` (read from the
+# environment by CMake 3.17+), and other tools get it as a `CC`/`CXX` launcher prefix.
+# Note that commands run under `sudo` do not inherit the environment, so they are not cached.
+class CompilerCache:
+    # the launcher program: `ccache` or `sccache`
+    launcher: str
+    dir: str
+    size: Optional[str]
+
+    def __init__(self, launcher: str, dir: str, size: Optional[str] = None):
+        self.launcher = launcher
+        self.dir = dir
+        self.size = size
+
+    def env(self, cmake: bool, baseDir: Optional[str] = None) -> dict[str, str]:
+        ret: dict[str, str] = {}
+        if self.launcher == "ccache":
+            ret["CCACHE_DIR"] = self.dir
+            if baseDir:
+                ret["CCACHE_BASEDIR"] = baseDir
+                ret["CCACHE_NOHASHDIR"] = "true"
+            if self.size:
+                ret["CCACHE_MAXSIZE"] = self.size
+        else:
+            ret["SCCACHE_DIR"] = self.dir
+            if self.size:
+                ret["SCCACHE_CACHE_SIZE"] = self.size
+        if cmake:
+            ret["CMAKE_C_COMPILER_LAUNCHER"] = self.launcher
+            ret["CMAKE_CXX_COMPILER_LAUNCHER"] = self.launcher
+        else:
+            ret["CC"] = f"{self.launcher} {os.environ.get('CC', 'gcc')}"
+            ret["CXX"] = f"{self.launcher} {os.environ.get('CXX', 'g++')}"
+        return ret
+
+    # shell commands exporting the compiler cache environment
+    def envShellCmd(self, cmake: bool, baseDir: Optional[str] = None) -> str:
+        return "\n".join(f"export {k}={shlex.quote(v)}" for k, v in self.env(cmake, baseDir).items())
+
+    # the current (hits, misses) counters of the cache, if available
+    def stats(self) -> Optional[tuple[int, int]]:
+        env = dict(os.environ)
+        env.update(self.env(False))
+        try:
+            if self.launcher == "ccache":
+                out = subprocess.run(
+                    ["ccache", "--print-stats"], stdout=subprocess.PIPE, text=True, env=env, check=True
+                ).stdout
+                counters = dict(line.split("\t", 1) for line in out.splitlines() if "\t" in line)
+                hits = int(counters.get("direct_cache_hit", 0)) + int(counters.get("preprocessed_cache_hit", 0))
+                return hits, int(counters.get("cache_miss", 0))
+            else:
+                # the counters live in the sccache server, which must use this cache directory
+                subprocess.run(["sccache", "--start-server"], env=env, capture_output=True)
+                out = subprocess.run(
+                    ["sccache", "--show-stats", "--stats-format=json"],
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    env=env,
+                    check=True,
+                ).stdout
+                stats = json.loads(out)["stats"]
+                return sum(stats["cache_hits"]["counts"].values()), sum(stats["cache_misses"]["counts"].values())
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
+            return None
+
+    # a report of the cache hit rate between two stats snapshots
+    def report(self, before: Optional[tuple[int, int]], after: Optional[tuple[int, int]]) -> str:
+        if before is None or after is None:
+            return f"Compiler cache ({self.launcher}): no statistics available."
+        hits = after[0] - before[0]
+        misses = after[1] - before[1]
+        if hits + misses <= 0:
+            return f"Compiler cache ({self.launcher}): no cacheable compilations."
+        return f"Compiler cache ({self.launcher}): {hits} hits, {misses} misses ({100 * hits / (hits + misses):.1f}% hit rate)."
+
+
+# the compiler cache of the given kind (`ccache`, `sccache`, `none`, or empty to use ccache or
+# sccache, whichever is installed), or None if disabled or not installed
+def openCompilerCache(kind: str, dir: str, size: Optional[str] = None) -> Optional[CompilerCache]:
+    if kind == "none":
+        return None
+    for launcher in [kind] if kind else ["ccache", "sccache"]:
+        if shutil.which(launcher):
+            return CompilerCache(launcher, dir, size)
+    return None
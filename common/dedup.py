@@ -0,0 +1,131 @@
+import hashlib
+import os
+import stat
+import subprocess
+from typing import Optional
+
+from .locks import fileLock
+
+storeDirName = ".dfr_objects"
+
+
+def _fileSHA256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while data := file.read(1 << 20):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+# replaces a file by a reflink clone of another file (fails where the filesystem has no reflinks)
+def _reflink(src: str, dest: str) -> bool:
+    tmp = f"{dest}.dfr_dedup"
+    r = subprocess.run(["cp", "--reflink=always", "--preserve=all", src, tmp], stderr=subprocess.DEVNULL)
+    if r.returncode != 0:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    os.replace(tmp, dest)
+    return True
+
+
+# replaces a file by a hard link to another file
+def _hardlink(src: str, dest: str):
+    tmp = f"{dest}.dfr_dedup"
+    os.link(src, tmp)
+    os.replace(tmp, dest)
+
+
+# A content-addressed file store per mount (`/mnt/<mount>/.dfr_objects`), deduplicating identical
+# files across install trees (e.g., the generated Verilog of pythondata repos, which barely
+# changes between versions).
+# Every regular file of a completed install is hashed. The first copy of a content becomes the
+# store object (a hard link of the installed file), and later copies are replaced by a hard link
+# to the object (or by a reflink clone of it, in `reflink` mode, where the filesystem supports it).
+# The object key includes the owner and permission bits, since hard links share them. Install
+# trees are immutable once ready, so sharing inodes between versions is safe.
+# An object with a single link is no longer used by any install, which is what the GC removes.
+class DedupStore:
+    # files smaller than this are not worth a link
+    minSize = 4096
+
+    def __init__(self, root: str = "/mnt", mode: str = "hardlink"):
+        self.root = root
+        self.mode = mode
+
+    def path(self, toolMnt: str) -> str:
+        return os.path.join(self.root, toolMnt, storeDirName)
+
+    def _lockPath(self, toolMnt: str) -> str:
+        return os.path.join(self.path(toolMnt), "lock")
+
+    # deduplicates an install tree against the store of its mount, and returns the bytes saved
+    def dedup(self, toolMnt: str, installPath: str) -> int:
+        store = self.path(toolMnt)
+        saved = 0
+        # the GC takes the lock exclusively, so objects are not removed while linking to them
+        with fileLock(self._lockPath(toolMnt), shared=True):
+            for dirPath, _, fileNames in os.walk(installPath):
+                for fileName in fileNames:
+                    path = os.path.join(dirPath, fileName)
+                    st = os.lstat(path)
+                    if not stat.S_ISREG(st.st_mode) or st.st_size < self.minSize:
+                        continue
+                    sha256 = _fileSHA256(path)
+                    objectName = f"{sha256}-{st.st_uid}.{st.st_gid}-{stat.S_IMODE(st.st_mode):o}"
+                    objectPath = os.path.join(store, sha256[:2], objectName)
+                    try:
+                        objectStat = os.stat(objectPath)
+                    except FileNotFoundError:
+                        os.makedirs(os.path.dirname(objectPath), exist_ok=True)
+                        try:
+                            os.link(path, objectPath)
+                        except FileExistsError:
+                            pass
+                        continue
+                    if objectStat.st_ino == st.st_ino:
+                        continue
+                    if self.mode != "reflink" or not _reflink(objectPath, path):
+                        _hardlink(objectPath, path)
+                    saved += st.st_size
+        return saved
+
+    # removes the objects no install links to anymore, and returns (objects, bytes) removed
+    def gc(self, toolMnt: str) -> tuple[int, int]:
+        store = self.path(toolMnt)
+        count = size = 0
+        if not os.path.isdir(store):
+            return count, size
+        with fileLock(self._lockPath(toolMnt)):
+            for dirPath, _, fileNames in os.walk(store):
+                for fileName in fileNames:
+                    path = os.path.join(dirPath, fileName)
+                    if fileName == "lock":
+                        continue
+                    st = os.lstat(path)
+                    if st.st_nlink == 1:
+                        os.remove(path)
+                        count += 1
+                        size += st.st_size
+        return count, size
+
+    # the logical (apparent) and physical (allocated, every inode once) bytes of the install
+    # trees under a mount (optionally only those of a tool folder)
+    def usage(self, toolMnt: str, subPath: Optional[str] = None) -> tuple[int, int]:
+        top = os.path.join(self.root, toolMnt, subPath) if subPath else os.path.join(self.root, toolMnt)
+        store = self.path(toolMnt)
+        logical = physical = 0
+        seen: set[int] = set()
+        for dirPath, dirNames, fileNames in os.walk(top):
+            if dirPath == os.path.dirname(store) and storeDirName in dirNames:
+                dirNames.remove(storeDirName)
+            for fileName in fileNames:
+                try:
+                    st = os.lstat(os.path.join(dirPath, fileName))
+                except OSError:
+                    continue
+                logical += st.st_size
+                if st.st_ino not in seen:
+                    seen.add(st.st_ino)
+                    physical += st.st_blocks * 512
+        return logical, physical
@@ -0,0 +1,38 @@
+from dfr_scripts.common import dedupStore, toolMnts
+import glob
+import os
+import sys
+
+# the content-addressed file stores of the tool mounts (requires write access to them).
+# usage: dedup_store.py dedup <hardlink|reflink> <mount> <install path>
+#        dedup_store.py report [<mount>...]  (logical vs physical bytes of every tool)
+#        dedup_store.py gc [<mount>...]      (removes the objects no install uses anymore)
+cmd, *args = sys.argv[1:] or ["report"]
+
+
+def gb(size: int) -> str:
+    return f"{size / (1 << 30):.2f}G"
+
+
+if cmd == "dedup":
+    dedupStore.mode, toolMnt, installPath = args
+    print(f"Deduplicated {gb(dedupStore.dedup(toolMnt, installPath))} of {installPath}")
+elif cmd in ["report", "gc"]:
+    for toolMnt in args or toolMnts:
+        if not os.path.isdir(os.path.join(dedupStore.root, toolMnt)):
+            continue
+        if cmd == "gc":
+            count, size = dedupStore.gc(toolMnt)
+            print(f"Removed {count} unused objects ({gb(size)}) from {dedupStore.path(toolMnt)}")
+            continue
+        print(f"{'tool':<40} {'logical':>10} {'physical':>10}  ({toolMnt})")
+        for toolPath in sorted(glob.glob(os.path.join(dedupStore.root, toolMnt, "*", "*", "*"))):
+            if os.path.isdir(toolPath) and not os.path.islink(toolPath):
+                subPath = os.path.relpath(toolPath, os.path.join(dedupStore.root, toolMnt))
+                logical, physical = dedupStore.usage(toolMnt, subPath)
+                print(f"{subPath.replace('/', '.'):<40} {gb(logical):>10} {gb(physical):>10}")
+        logical, physical = dedupStore.usage(toolMnt)
+        print(f"{'total':<40} {gb(logical):>10} {gb(physical):>10}")
+else:
+    print(f"Unknown command `{cmd}`")
+    sys.exit(1)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from .locks import fileLock
+
+
+# a size in bytes of a size string, e.g., `500M`, `100G` or `2T`
+def parseSize(size: str) -> int:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", size, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid size `{size}`")
+    return int(float(match[1]) * 1024 ** " KMGT".index(match[2].upper() or " "))
+
+
+def fileSHA256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while data := file.read(1 << 20):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def _treeSize(path: str) -> int:
+    total = 0
+    for dirPath, _, fileNames in os.walk(path):
+        for fileName in fileNames:
+            try:
+                total += os.lstat(os.path.join(dirPath, fileName)).st_size
+            except OSError:
+                pass
+    return total
+
+
+# A node-local cache of downloaded installer artifacts (e.g., Vivado `.bin` installers and
+# volare PDK tarballs) and the installer trees extracted from them, so reinstalling a release
+# (on another mount, or after a failed setup) does not download it again.
+# Entries are keyed by file name and content hash (`<name>@<sha256>`), and stored in
+# `<root>/<sha256>/` (the file itself and an optional `tree/` extracted from it).
+# The index records the size and the last use of every entry, and the least recently used
+# entries are evicted when the cache grows over its budget. Entries in use by an install
+# (see `use`) are never evicted.
+class DownloadCache:
+    def __init__(self, root: str, budget: Optional[int] = None):
+        self.root = root
+        self.budget = budget
+        self.indexPath = os.path.join(root, "index.json")
+        self.lockPath = os.path.join(root, "index.lock")
+
+    def _read(self) -> dict[str, dict]:
+        try:
+            with open(self.indexPath) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries: dict[str, dict]):
+        tmp = f"{self.indexPath}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(entries, file, indent=2)
+        os.replace(tmp, self.indexPath)
+
+    def entryDir(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256)
+
+    def entries(self) -> dict[str, dict]:
+        with fileLock(self.lockPath, shared=True):
+            return self._read()
+
+    # the cached file of a file name (and content hash, if given), or None.
+    # a hit counts as a use of the entry.
+    def lookup(self, fileName: str, sha256: Optional[str] = None) -> Optional[str]:
+        os.makedirs(self.root, exist_ok=True)
+        with fileLock(self.lockPath):
+            entries = self._read()
+            for key, entry in sorted(entries.items(), key=lambda e: -e[1]["lastUsed"]):
+                if entry["fileName"] != fileName or (sha256 and entry["sha256"] != sha256.lower()):
+                    continue
+                path = os.path.join(self.entryDir(entry["sha256"]), fileName)
+                if not os.path.isfile(path):
+                    continue
+                entry["lastUsed"] = time.time()
+                self._write(entries)
+                return path
+        return None
+
+    # stores a file (moved into the cache if `move`, otherwise copied) and returns its cached path.
+    # the content hash is computed unless it is given.
+    def put(self, path: str, fileName: Optional[str] = None, move: bool = False, sha256: Optional[str] = None) -> str:
+        fileName = fileName or os.path.basename(path)
+        sha256 = sha256 or fileSHA256(path)
+        entryDir = self.entryDir(sha256)
+        cachedPath = os.path.join(entryDir, fileName)
+        os.makedirs(entryDir, exist_ok=True)
+        if not os.path.isfile(cachedPath):
+            # a unique temporary file, as the same file may be put concurrently
+            fd, tmp = tempfile.mkstemp(dir=entryDir, prefix=f"{fileName}.", suffix=".tmp")
+            os.close(fd)
+            if move:
+                shutil.move(path, tmp)
+            else:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, cachedPath)
+        elif move:
+            os.remove(path)
+        with fileLock(self.lockPath):
+            entries = self._read()
+            entry = entries.setdefault(f"{fileName}@{sha256}", {"fileName": fileName, "sha256": sha256, "treeSize": 0})
+            entry["size"] = os.path.getsize(cachedPath)
+            entry["lastUsed"] = time.time()
+            self._write(entries)
+        self.evict(keep=sha256)
+        return cachedPath
+
+    # holds a cached file (and its extracted tree) in use, so it is not evicted until the install
+    # using it is done. yields False if the entry was evicted before it could be used.
+    @contextmanager
+    def use(self, cachedPath: str) -> Iterator[bool]:
+        with fileLock(os.path.join(os.path.dirname(cachedPath), "use.lock"), shared=True):
+            yield os.path.isfile(cachedPath)
+
+    # the installer tree extracted from a cached file (which must be in use), extracting it (with
+    # `extract(<cached file>, <tree dir>)`) on the first use only
+    def extractedTree(self, cachedPath: str, extract: Callable[[str, str], None]) -> str:
+        entryDir = os.path.dirname(cachedPath)
+        tree = os.path.join(entryDir, "tree")
+        readyFile = os.path.join(entryDir, ".tree_ready")
+        with fileLock(os.path.join(entryDir, "tree.lock")):
+            if not os.path.exists(readyFile):
+                shutil.rmtree(tree, ignore_errors=True)
+                extract(cachedPath, tree)
+                open(readyFile, "w").close()
+                with fileLock(self.lockPath):
+                    entries = self._read()
+                    for entry in entries.values():
+                        if entry["sha256"] == os.path.basename(entryDir):
+                            entry["treeSize"] = _treeSize(tree)
+                    self._write(entries)
+        return tree
+
+    # removes the least recently used entries until the cache fits its budget
+    def evict(self, budget: Optional[int] = None, keep: Optional[str] = None) -> list[str]:
+        budget = self.budget if budget is None else budget
+        if budget is None:
+            return []
+        removed: list[str] = []
+        with fileLock(self.lockPath):
+            entries = self._read()
+            total = sum(e["size"] + e["treeSize"] for e in entries.values())
+            for key, entry in sorted(entries.items(), key=lambda e: e[1]["lastUsed"]):
+                if total <= budget:
+                    break
+                if entry["sha256"] == keep:
+                    continue
+                entryDir = self.entryDir(entry["sha256"])
+                # an entry in use (or being extracted) is skipped
+                with fileLock(os.path.join(entryDir, "use.lock"), blocking=False) as free:
+                    if not free:
+                        continue
+                    # the same content may be cached under another file name
+                    if any(e["sha256"] == entry["sha256"] for k, e in entries.items() if k != key):
+                        os.remove(os.path.join(entryDir, entry["fileName"]))
+                    else:
+                        shutil.rmtree(entryDir, ignore_errors=True)
+                total -= entry["size"] + entry["treeSize"]
+                del entries[key]
+                removed.append(key)
+            self._write(entries)
+        return removed
@@ -0,0 +1,64 @@
+from dfr_scripts.common import downloadCache, paths
+from dfr_scripts.common.downloader import Download, DownloadError, NotFoundError, extractFile, tarCompressionOpt
+import argparse
+import hashlib
+import os
+import sys
+from contextlib import nullcontext
+
+# downloads a (large) installer artifact over parallel range connections, resuming a previous
+# interrupted download of the same URL. without `--output`, the file is kept in the download
+# cache, and a cached file is used instead of downloading it again.
+# with `--extract`, the archive is extracted into the folder while it is downloaded.
+# `.tar.xz` archives are decompressed by parallel threads (`--xz-threads 0` leaves
+# decompression to `tar -J`).
+# exits with code 3 if the artifact is not available (404/410).
+# usage: download.py <url> [--output <path>] [--extract <dir>] [--sudo] [--sha256 <hex>] [--connections N]
+#                    [--xz-threads N]
+parser = argparse.ArgumentParser()
+parser.add_argument("url")
+parser.add_argument("--output", help="the downloaded file path (default: in the download cache)")
+parser.add_argument("--extract", help="extracts the archive into this folder")
+parser.add_argument("--sudo", action="store_true", help="extracts as root")
+parser.add_argument("--sha256", help="the expected SHA-256 digest of the file")
+parser.add_argument("--connections", type=int, default=4)
+parser.add_argument("--xz-threads", type=int, default=os.cpu_count() or 1)
+args = parser.parse_args()
+
+name = os.path.basename(args.url.split("?")[0]) or "download"
+# the URL disambiguates artifacts of the same file name (e.g., `default.tar.xz`)
+cacheName = f"{hashlib.sha256(args.url.encode()).hexdigest()[:16]}-{name}"
+output = args.output or os.path.join(paths.cache, "downloads", cacheName)
+extractCmd = None
+xzThreads = 0
+if args.extract:
+    extractCmd = ["tar", "-x", "-f", "-", "-C", args.extract]
+    compressionOpt = tarCompressionOpt(name)
+    if compressionOpt == "-J" and args.xz_threads > 1:
+        xzThreads = args.xz_threads
+    elif compressionOpt:
+        extractCmd.insert(1, compressionOpt)
+    if args.sudo:
+        extractCmd = ["sudo"] + extractCmd
+
+try:
+    cachedPath = None if args.output else downloadCache.lookup(cacheName, args.sha256)
+    # the cached file is held in use while extracting it
+    with downloadCache.use(cachedPath) if cachedPath else nullcontext(False) as cached:
+        if cached:
+            print(f"Using the cached download {cachedPath}")
+            if extractCmd:
+                extractFile(cachedPath, extractCmd, xzThreads)  # type: ignore
+    if not cached:
+        digest = Download(args.url, output, args.sha256, args.connections, extractCmd, xzThreads).run()
+        print(f"Downloaded {args.url} (sha256: {digest})")
+        if not args.output:
+            cachedPath = downloadCache.put(output, cacheName, move=True, sha256=digest)
+except NotFoundError as e:
+    print(str(e))
+    sys.exit(3)
+except DownloadError as e:
+    print(str(e))
+    sys.exit(1)
+if not args.extract:
+    print(cachedPath or output)
@@ -0,0 +1,34 @@
+from dfr_scripts.common import downloadCache
+from dfr_scripts.common.dlcache import parseSize
+import os
+import sys
+import time
+
+# manages the cache of downloaded installer artifacts.
+# usage: download_cache.py list
+#        download_cache.py seed <path> [<file name>]  (e.g., an installer downloaded on another node)
+#        download_cache.py evict [<budget>]           (default: $DFR_DOWNLOAD_CACHE_SIZE)
+cmd, *args = sys.argv[1:] or ["list"]
+if cmd == "list":
+    entries = downloadCache.entries()
+    total = 0
+    for key, entry in sorted(entries.items(), key=lambda e: -e[1]["lastUsed"]):
+        size = entry["size"] + entry["treeSize"]
+        total += size
+        lastUsed = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["lastUsed"]))
+        tree = " (+installer tree)" if entry["treeSize"] else ""
+        print(f"{size / (1 << 30):>8.2f}G  {lastUsed}  {entry['fileName']}{tree}  {entry['sha256'][:12]}")
+    budget = f" of {downloadCache.budget / (1 << 30):.0f}G" if downloadCache.budget else ""
+    print(f"{len(entries)} entries, {total / (1 << 30):.2f}G{budget} in {downloadCache.root}")
+elif cmd == "seed":
+    path, *fileName = args
+    if not os.path.isfile(path):
+        print(f"No such file `{path}`")
+        sys.exit(1)
+    print(f"Seeded {downloadCache.put(path, fileName[0] if fileName else None)}")
+elif cmd == "evict":
+    removed = downloadCache.evict(parseSize(args[0]) if args else None)
+    print(f"Evicted {len(removed)} entries" + "".join(f"\n  {key}" for key in removed))
+else:
+    print(f"Unknown command `{cmd}`")
+    sys.exit(1)
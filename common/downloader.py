@@ -0,0 +1,310 @@
+import hashlib
+import json
+import lzma
+import os
+import subprocess
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from .xzparallel import ParallelXZDecompressor
+
+
+class DownloadError(Exception):
+    pass
+
+
+class NotFoundError(DownloadError):
+    pass
+
+
+# the tar decompression option of an archive file name
+def tarCompressionOpt(name: str) -> str:
+    if name.endswith((".tar.xz", ".txz")):
+        return "-J"
+    if name.endswith((".tar.gz", ".tgz")):
+        return "-z"
+    if name.endswith((".tar.bz2", ".tbz2")):
+        return "-j"
+    if name.endswith((".tar.zst", ".tzst")):
+        return "--zstd"
+    return ""
+
+
+# The extraction of an archive stream by a command reading it from stdin (e.g., `tar -x`).
+# With `xzThreads`, the xz data is decompressed in parallel (see ParallelXZDecompressor) before
+# it is written to the command.
+class Extraction:
+    def __init__(self, extractCmd: list[str], xzThreads: int = 0):
+        self._process = subprocess.Popen(extractCmd, stdin=subprocess.PIPE)
+        self._decoder = None
+        if xzThreads:
+            self._decoder = ParallelXZDecompressor(self._process.stdin.write, xzThreads)  # type: ignore
+
+    def write(self, data: bytes):
+        try:
+            if self._decoder:
+                self._decoder.feed(data)
+            else:
+                self._process.stdin.write(data)  # type: ignore
+        except (BrokenPipeError, lzma.LZMAError) as e:
+            raise DownloadError(f"Extraction failed: {str(e)}")
+
+    # all the data was written
+    def finish(self):
+        if self._decoder:
+            try:
+                self._decoder.close()
+            except (BrokenPipeError, lzma.LZMAError) as e:
+                raise DownloadError(f"Extraction failed: {str(e)}")
+
+    # returns True if the extraction succeeded
+    def close(self) -> bool:
+        try:
+            self._process.stdin.close()  # type: ignore
+        except BrokenPipeError:
+            pass
+        return self._process.wait() == 0
+
+
+# extracts a local archive file, as a download is extracted
+def extractFile(path: str, extractCmd: list[str], xzThreads: int = 0):
+    extraction = Extraction(extractCmd, xzThreads)
+    try:
+        with open(path, "rb") as file:
+            while data := file.read(1 << 20):
+                extraction.write(data)
+        extraction.finish()
+    finally:
+        succeeded = extraction.close()
+    if not succeeded:
+        raise DownloadError(f"Extraction of `{path}` failed")
+
+
+# A parallel, resumable and checksummed download of a single (large) file.
+# The first request asks for the whole file as a range, so it also probes the availability
+# and the range support of the server (no separate HEAD request), and it becomes the
+# connection of the first segment. The rest of the file is split into segments fetched over
+# separate range connections, written in place into `<path>.part`.
+# The segment progress is kept in the `<path>.part.json` sidecar, so an interrupted download
+# resumes from where every segment stopped (if the remote file did not change).
+# While downloading, the contiguous prefix of the file is hashed and streamed into the
+# extraction command (see Extraction), so download and extraction overlap.
+class Download:
+    # the smallest segment worth its own connection
+    minSegmentSize = 8 << 20
+    chunkSize = 1 << 20
+    retries = 5
+
+    def __init__(
+        self,
+        url: str,
+        path: str,
+        sha256: Optional[str] = None,
+        connections: int = 4,
+        extractCmd: Optional[list[str]] = None,
+        xzThreads: int = 0,
+    ):
+        self.url = url
+        self.path = path
+        self.partPath = f"{path}.part"
+        self.statePath = f"{path}.part.json"
+        self.sha256 = sha256
+        self.connections = max(1, connections)
+        self.extractCmd = extractCmd
+        self.xzThreads = xzThreads
+        self.size: Optional[int] = None
+        self.validator: Optional[str] = None
+        # [start, end (exclusive, None if unknown), done] of every segment
+        self.segments: list[list] = []
+        self._finished: set[int] = set()
+        self._error: Optional[Exception] = None
+        self._cond = threading.Condition()
+        self._lastSave = 0.0
+
+    def _get(self, start: int, end: Optional[int] = None) -> requests.Response:
+        headers = {"Range": f"bytes={start}-{'' if end is None else end - 1}"}
+        if start > 0 and self.validator:
+            headers["If-Range"] = self.validator
+        response = requests.get(self.url, headers=headers, stream=True, timeout=60)
+        if response.status_code in [404, 410]:
+            response.close()
+            raise NotFoundError(f"Not found: {self.url}")
+        if response.status_code >= 400:
+            response.close()
+            raise DownloadError(f"`{self.url}` error with status code: {response.status_code}")
+        return response
+
+    def _saveState(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._lastSave < 1.0:
+            return
+        self._lastSave = now
+        state = {"url": self.url, "size": self.size, "validator": self.validator, "segments": self.segments}
+        tmp = f"{self.statePath}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(state, file)
+        os.replace(tmp, self.statePath)
+
+    def _loadState(self) -> bool:
+        try:
+            with open(self.statePath) as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if (
+            state.get("url") != self.url
+            or state.get("size") != self.size
+            or state.get("validator") != self.validator
+            or not os.path.exists(self.partPath)
+        ):
+            return False
+        self.segments = state["segments"]
+        return True
+
+    # the end of the downloaded prefix of the file
+    def _contiguousEnd(self) -> int:
+        pos = 0
+        for start, end, done in self.segments:
+            if start > pos:
+                break
+            pos = max(pos, done)
+            if end is None or done < end:
+                break
+        return pos
+
+    def _fetchSegment(self, index: int, fd: int, response: Optional[requests.Response]):
+        segment = self.segments[index]
+        attempt = 0
+        try:
+            while segment[2] < (segment[1] if segment[1] is not None else float("inf")):
+                try:
+                    if response is None:
+                        response = self._get(segment[2], segment[1])
+                        # the server ignored the range (or the file changed): restarting is not possible
+                        if segment[2] > 0 and response.status_code != 206:
+                            raise DownloadError("The server does not support resuming this download")
+                    for chunk in response.iter_content(self.chunkSize):
+                        if segment[1] is not None:
+                            chunk = chunk[: segment[1] - segment[2]]
+                        os.pwrite(fd, chunk, segment[2])
+                        with self._cond:
+                            segment[2] += len(chunk)
+                            self._saveState()
+                            self._cond.notify_all()
+                        if segment[1] is not None and segment[2] >= segment[1]:
+                            break
+                    else:
+                        # the stream ended: the end of a file of unknown size
+                        if segment[1] is None:
+                            break
+                except (requests.RequestException, OSError) as e:
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise DownloadError(f"Download of `{self.url}` failed: {str(e)}")
+                    time.sleep(2**attempt)
+                finally:
+                    if response is not None:
+                        response.close()
+                        response = None
+        except Exception as e:
+            with self._cond:
+                self._error = e
+        finally:
+            with self._cond:
+                self._finished.add(index)
+                self._cond.notify_all()
+
+    # downloads (and extracts) the file, and returns its SHA-256 digest
+    def run(self) -> str:
+        first = self._get(0)
+        if first.status_code == 206:
+            contentRange = first.headers.get("Content-Range", "")
+            self.size = int(contentRange.rsplit("/", 1)[1]) if "/" in contentRange else None
+            self.validator = first.headers.get("ETag") or first.headers.get("Last-Modified")
+        else:
+            length = first.headers.get("Content-Length")
+            self.size = int(length) if length and not first.headers.get("Content-Encoding") else None
+            self.validator = None
+        ranges = first.status_code == 206 and self.size is not None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if ranges and self._loadState():
+            print(f"Resuming the download of {self.url} ...")
+        elif ranges:
+            count = max(1, min(self.connections, self.size // self.minSegmentSize))  # type: ignore
+            bounds = [self.size * i // count for i in range(count + 1)]  # type: ignore
+            self.segments = [[bounds[i], bounds[i + 1], bounds[i]] for i in range(count)]
+            with open(self.partPath, "wb") as file:
+                file.truncate(self.size)
+        else:
+            self.segments = [[0, self.size, 0]]
+            open(self.partPath, "wb").close()
+        self._saveState(force=True)
+
+        fd = os.open(self.partPath, os.O_WRONLY)
+        workers: list[threading.Thread] = []
+        for i, segment in enumerate(self.segments):
+            if segment[1] is not None and segment[2] >= segment[1]:
+                self._finished.add(i)
+                continue
+            # the first request is reused by the segment it covers
+            response = first if segment[2] == 0 and segment[0] == 0 else None
+            if response is first:
+                first = None  # type: ignore
+            workers.append(threading.Thread(target=self._fetchSegment, args=(i, fd, response), daemon=True))
+        if first is not None:
+            first.close()
+        for worker in workers:
+            worker.start()
+
+        digest = hashlib.sha256()
+        extraction = Extraction(self.extractCmd, self.xzThreads) if self.extractCmd else None
+        pos = 0
+        startTime = time.time()
+        lastReport = startTime
+        reader = os.open(self.partPath, os.O_RDONLY)
+        try:
+            while True:
+                with self._cond:
+                    while self._contiguousEnd() <= pos and self._error is None:
+                        if len(self._finished) == len(self.segments):
+                            break
+                        self._cond.wait(1.0)
+                    if self._error is not None:
+                        raise self._error
+                    end = self._contiguousEnd()
+                    finished = len(self._finished) == len(self.segments)
+                if end <= pos and finished:
+                    break
+                while pos < end:
+                    data = os.pread(reader, min(self.chunkSize, end - pos), pos)
+                    digest.update(data)
+                    if extraction:
+                        extraction.write(data)
+                    pos += len(data)
+                now = time.time()
+                if now - lastReport >= 2.0:
+                    lastReport = now
+                    total = f"/{self.size >> 20}MB" if self.size else ""
+                    rate = (pos >> 20) / max(now - startTime, 1e-3)
+                    print(f"Downloading: {pos >> 20}MB{total} ({rate:.1f}MB/s)", end="\r", flush=True)
+            if extraction:
+                extraction.finish()
+        finally:
+            os.close(fd)
+            os.close(reader)
+            with self._cond:
+                self._saveState(force=True)
+            extracted = extraction.close() if extraction else True
+        print()
+        if not extracted:
+            raise DownloadError(f"Extraction of `{self.url}` failed")
+        if self.sha256 and digest.hexdigest() != self.sha256.lower():
+            os.remove(self.partPath)
+            os.remove(self.statePath)
+            raise DownloadError(f"Checksum mismatch for `{self.url}`: {digest.hexdigest()}")
+        os.replace(self.partPath, self.path)
+        os.remove(self.statePath)
+        return digest.hexdigest()
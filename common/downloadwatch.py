@@ -0,0 +1,185 @@
+import ctypes
+import ctypes.util
+import glob
+import json
+import os
+import select
+import struct
+import time
+from typing import Optional
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+_eventHeader = struct.Struct("iIII")
+# the Firefox profiles (of regular and snap installs), whose `downloads.json` lists the running
+# downloads with their total size
+firefoxProfiles = ["~/.mozilla/firefox/*", "~/snap/firefox/common/.mozilla/firefox/*"]
+
+
+# A minimal inotify binding through ctypes, for nodes without the `inotify_simple` package
+class _CtypesInotify:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._addWatch = libc.inotify_add_watch
+        self._addWatch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._addWatch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    # the (mask, name) of the events received within the timeout (ms)
+    def read(self, timeout: int) -> list[tuple[int, str]]:
+        if not select.select([self.fd], [], [], timeout / 1000)[0]:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        events: list[tuple[int, str]] = []
+        pos = 0
+        while pos < len(data):
+            _, mask, _, nameLen = _eventHeader.unpack_from(data, pos)
+            pos += _eventHeader.size
+            events.append((mask, os.fsdecode(data[pos : pos + nameLen].rstrip(b"\0"))))
+            pos += nameLen
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _SimpleInotify:
+    def __init__(self):
+        import inotify_simple
+
+        self._inotify = inotify_simple.INotify()
+
+    def add_watch(self, path: str, mask: int) -> int:
+        return self._inotify.add_watch(path, mask)
+
+    def read(self, timeout: int) -> list[tuple[int, str]]:
+        return [(e.mask, e.name) for e in self._inotify.read(timeout=timeout)]
+
+    def close(self):
+        self._inotify.close()
+
+
+# an inotify instance (`inotify_simple` if installed, otherwise ctypes), or None if unavailable
+def openInotify():
+    for impl in [_SimpleInotify, _CtypesInotify]:
+        try:
+            return impl()
+        except (ImportError, OSError, AttributeError):
+            pass
+    return None
+
+
+# the total size of a running Firefox download of a file, as recorded in its profile
+def firefoxDownloadSize(path: str) -> Optional[int]:
+    for profile in firefoxProfiles:
+        for downloadsPath in glob.glob(os.path.join(os.path.expanduser(profile), "downloads.json")):
+            try:
+                with open(downloadsPath) as file:
+                    downloads = json.load(file).get("list", [])
+            except (OSError, ValueError, AttributeError):
+                continue
+            for download in downloads:
+                target = download.get("target")
+                targetPath = target.get("path") if isinstance(target, dict) else target
+                if targetPath == path and download.get("totalBytes"):
+                    return int(download["totalBytes"])
+    return None
+
+
+def _formatSeconds(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+# Watches a browser download into a folder until it completes.
+# Firefox writes a download into `<file>.part` (next to an empty `<file>` placeholder) and renames
+# it to `<file>` when the download completes, so the completion is the rename of the `.part`
+# file. The folder is watched with inotify (with a polling fallback), so the completion is
+# detected as soon as it happens, and the throughput (and ETA, if the size is known) of the
+# `.part` file is reported while downloading. Unless it is given, the size is taken from the
+# running downloads that Firefox records in its profile.
+class DownloadWatch:
+    reportInterval = 2.0
+
+    def __init__(self, folder: str, fileName: str, size: Optional[int] = None):
+        self.folder = folder
+        self.fileName = fileName
+        self.path = os.path.join(folder, fileName)
+        self.partPath = f"{self.path}.part"
+        self.size = size
+        os.makedirs(folder, exist_ok=True)
+        # the watch starts before the download, so no event is missed. the writes to the `.part`
+        # file are not watched (they would wake up the watch for every chunk), the progress is
+        # reported on the read timeout instead
+        self._inotify = openInotify()
+        if self._inotify is not None:
+            self._inotify.add_watch(folder, IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE)
+        self._lastReport = 0.0
+        self._lastBytes = 0
+        self._rate = 0.0
+
+    def _partSize(self) -> Optional[int]:
+        try:
+            return os.path.getsize(self.partPath)
+        except OSError:
+            return None
+
+    # a complete download exists (not the empty placeholder of a running download)
+    def completed(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0 and not os.path.exists(self.partPath)
+
+    def _report(self):
+        now = time.time()
+        if now - self._lastReport < self.reportInterval:
+            return
+        size = self._partSize()
+        if size is None:
+            return
+        if not self.size:
+            self.size = firefoxDownloadSize(self.path)
+        if self._lastReport:
+            # smoothed throughput
+            rate = (size - self._lastBytes) / (now - self._lastReport)
+            self._rate = rate if self._rate == 0.0 else 0.7 * self._rate + 0.3 * rate
+        self._lastReport, self._lastBytes = now, size
+        line = f"Downloaded {size / (1 << 20):.0f}MB"
+        if self.size:
+            line += f" of {self.size / (1 << 20):.0f}MB ({100 * size / self.size:.1f}%)"
+        line += f", {self._rate / (1 << 20):.1f}MB/s"
+        if self.size and self._rate > 0:
+            line += f", ETA {_formatSeconds((self.size - size) / self._rate)}"
+        print(f"{line}    ", end="\r", flush=True)
+
+    # blocks until the download starts (the `.part` file appears)
+    def waitForStart(self):
+        while self._partSize() is None and not self.completed():
+            self._wait()
+
+    # blocks until the download completes
+    def waitForCompletion(self):
+        while not self.completed():
+            self._wait()
+            self._report()
+        print()
+
+    def _wait(self):
+        if self._inotify is None:
+            time.sleep(1)
+            return
+        for mask, name in self._inotify.read(timeout=1000):
+            if name == self.fileName and mask & IN_MOVED_TO:
+                return
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,37 @@
+from dfr_scripts.common.envcache import envCacheKey, readEnvCache, writeEnvCache
+import os
+import sys
+
+# prints the environment setup script of a DFR configuration file.
+# the tool versions are taken from the lockfile without any network access. without a
+# lockfile (or when the configuration changed), they are resolved and the lockfile is written.
+# the generated script is cached, and a cache hit only recreates the tool symlinks
+# (without loading YAML, the tool scripts, GitPython or requests).
+# usage: env.py <config.yaml>
+configPath = sys.argv[1]
+key = envCacheKey(configPath)
+cached = readEnvCache(key) if key else None
+if cached:
+    symlinks, env = cached
+    for symlink in symlinks:
+        os.symlink(symlink[0], symlink[1])
+else:
+    from dfr_scripts.common import Tools, flattenToolVersions
+    from dfr_scripts.common.lockfile import readLockfile, writeLockfile
+    import yaml
+
+    with open(configPath) as file:
+        config = yaml.safe_load(file) or {}
+    tool_versions_flat = flattenToolVersions(config.get("tool_versions"))
+    lockedTools = readLockfile(configPath, tool_versions_flat)
+    tools = Tools(tool_versions_flat, lockedTools)
+    env = tools.getEnv()
+    if lockedTools is None:
+        lockedTools = tools.lockedTools()
+        writeLockfile(configPath, tool_versions_flat, lockedTools)
+        key = envCacheKey(configPath)
+    if key:
+        symlinks = [s for t in tools.resolved() for s in t.symlinks()]
+        sources = [s for t in tools.resolved() for s in t.env_sources()]
+        writeEnvCache(key, lockedTools, symlinks, env, [tools.view] if tools.view else [], sources)
+print("\n".join(env))
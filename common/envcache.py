@@ -0,0 +1,103 @@
+import glob
+import hashlib
+import json
+import os
+from typing import Optional
+
+from . import installDirReadyFile, paths
+from .lockfile import lockfilePath
+
+envCacheDir = os.path.join(paths.cache, "env")
+# the settings that change the generated script (the view and capture modes, and their folders)
+_keyEnvVars = ["DFR_CACHE_DIR", "DFR_ENV_VIEW", "DFR_ENV_VIEW_DIR", "DFR_ENV_CAPTURE", "DFR_ENV_CAPTURE_DIR"]
+
+
+# the environment cache key of a configuration file and its lockfile.
+# the key covers the raw bytes of both files, so a lookup needs no YAML parsing, and any
+# configuration change or version update leads to a different key. it also covers the
+# modification times of the common modules that generate the script, and the settings
+# that change it.
+# returns None if the configuration is not locked yet.
+def envCacheKey(configPath: str) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        for path in [configPath, lockfilePath(configPath)]:
+            with open(path, "rb") as file:
+                h.update(file.read())
+                h.update(b"\0")
+        for path in sorted(glob.glob(os.path.join(paths.common, "*.py"))):
+            h.update(f"{os.path.basename(path)}:{os.stat(path).st_mtime_ns}\0".encode())
+    except OSError:
+        return None
+    for name in _keyEnvVars:
+        h.update(f"{name}={os.environ.get(name, '')}\0".encode())
+    return h.hexdigest()
+
+
+# a stamp of the install state of the locked tools: the `.dfr_ready` marker identities of
+# their installs and the modification times of their scripts, so any install or uninstall
+# of a selected tool leads to a different stamp. the sourced environment scripts of the
+# tools are covered by their modification times and sizes, as their exports may be captured.
+# returns None if a locked install is missing.
+def installStamp(installs: list[list[str]], sources: list[str]) -> Optional[str]:
+    h = hashlib.sha256()
+    try:
+        for name, installPath in installs:
+            ready = os.stat(installDirReadyFile(installPath))
+            script = os.stat(os.path.join(paths.scripts, *name.split("."), "__init__.py"))
+            h.update(f"{name}:{ready.st_ino}:{ready.st_mtime_ns}:{ready.st_ctime_ns}:{script.st_mtime_ns}".encode())
+    except OSError:
+        return None
+    for source in sources:
+        try:
+            st = os.stat(source)
+            h.update(f"{source}:{st.st_mtime_ns}:{st.st_size}".encode())
+        except OSError:
+            h.update(f"{source}:missing".encode())
+    return h.hexdigest()
+
+
+# returns the cached symlinks and environment script lines of the given key,
+# if the install state of its tools did not change since it was cached (and the folders the
+# script relies on, like an environment view, still exist)
+def readEnvCache(key: str) -> Optional[tuple[list[tuple[str, str]], list[str]]]:
+    try:
+        with open(os.path.join(envCacheDir, f"{key}.json")) as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if entry.get("stamp") is None or installStamp(entry["installs"], entry.get("sources", [])) != entry["stamp"]:
+        return None
+    if not all(os.path.isdir(path) for path in entry.get("requiredPaths", [])):
+        return None
+    return [(s[0], s[1]) for s in entry["symlinks"]], entry["env"]
+
+
+def writeEnvCache(
+    key: str,
+    lockedTools: list[dict[str, str]],
+    symlinks: list[tuple[str, str]],
+    env: list[str],
+    requiredPaths: Optional[list[str]] = None,
+    sources: Optional[list[str]] = None,
+):
+    installs = [[t["name"], t["installPath"]] for t in lockedTools if "installPath" in t]
+    if len(installs) != len(lockedTools):
+        return
+    stamp = installStamp(installs, sources or [])
+    if stamp is None:
+        return
+    os.makedirs(envCacheDir, exist_ok=True)
+    path = os.path.join(envCacheDir, f"{key}.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as file:
+        entry = {
+            "installs": installs,
+            "sources": sources or [],
+            "stamp": stamp,
+            "symlinks": symlinks,
+            "env": env,
+            "requiredPaths": requiredPaths or [],
+        }
+        json.dump(entry, file)
+    os.replace(tmp, path)
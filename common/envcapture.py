@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+from typing import Optional
+
+# the search path variables get a sentinel value in the capture shell, so their exports can be
+# told apart as prepends, appends or overwrites
+_sentinelPrefix = "/nonexistent/dfr-sentinel-"
+_searchVars = ["PATH", "LD_LIBRARY_PATH", "MANPATH", "PKG_CONFIG_PATH", "PYTHONPATH"]
+# the variables of the clean capture shell taken from the calling environment
+_baseVars = ["HOME", "USER", "LOGNAME", "SHELL", "LANG", "LC_ALL", "TERM"]
+# the variables a shell maintains by itself
+_ignoredVars = ["_", "SHLVL", "OLDPWD", "DFR_SOURCE_SCRIPT"]
+# the variables bash sets by itself
+_shellVars = [
+    "BASH",
+    "BASHPID",
+    "BASH_SOURCE",
+    "BASH_VERSION",
+    "EUID",
+    "FUNCNAME",
+    "HOSTNAME",
+    "HOSTTYPE",
+    "IFS",
+    "LINENO",
+    "MACHTYPE",
+    "OLDPWD",
+    "OPTARG",
+    "OPTIND",
+    "OSTYPE",
+    "PIPESTATUS",
+    "PPID",
+    "PWD",
+    "RANDOM",
+    "REPLY",
+    "SHLVL",
+    "UID",
+]
+_cleanPath = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+# sources the script with its output discarded, and writes the environment before and after it,
+# and the functions and aliases it defines, to fd 3
+_captureScript = """
+exec 3>&1 >/dev/null 2>&1 </dev/null
+env -0 >&3; printf '\\1' >&3
+source "$DFR_SOURCE_SCRIPT" || exit $?
+env -0 >&3; printf '\\1' >&3
+declare -F >&3; alias -p >&3
+"""
+
+
+# the variables a script reads without setting them itself
+def _readVars(text: str) -> set[str]:
+    text = "\n".join(line for line in text.splitlines() if not line.lstrip().startswith("#"))
+    refs = set(re.findall(r"\$\{?#?([A-Za-z_]\w*)", text))
+    assigned = set(re.findall(r"(?:^|[\s;&|(])([A-Za-z_]\w*)\+?=", text, re.MULTILINE))
+    assigned |= set(re.findall(r"\bfor\s+([A-Za-z_]\w*)\s+in\b", text))
+    assigned |= {v for m in re.findall(r"\bread\s+((?:-\w+\s+)*[\w\s]+)", text) for v in m.split() if v[0] != "-"}
+    return refs - assigned
+
+
+def _parseEnv(data: str) -> dict[str, str]:
+    return dict(e.split("=", 1) for e in data.split("\0") if "=" in e)
+
+
+# the export line of a variable changed by a sourced script, keeping the value the variable has
+# in the sourcing shell where the script extended its (base) value
+def _exportLine(name: str, value: str, base: Optional[str]) -> str:
+    elems = value.split(":")
+    baseElems = base.split(":") if base else []
+    for i in range(len(elems) - len(baseElems) + 1 if baseElems else 0):
+        if elems[i : i + len(baseElems)] == baseElems:
+            before = ":".join(elems[:i])
+            after = ":".join(elems[i + len(baseElems) :])
+            line = f"export {name}="
+            if before:
+                line += f"{shlex.quote(before)}${{{name}:+:${name}}}"
+            else:
+                line += f"${{{name}:+${name}:}}"
+            if after:
+                line += f"{':' if before else ''}{shlex.quote(after)}"
+            return line
+    return f"export {name}={shlex.quote(value)}"
+
+
+# Captures the environment changes of sourced setup scripts (e.g., Vivado's `settings64.sh`,
+# which forks many subprocesses), so a new shell gets plain `export` lines instead of sourcing
+# the script again.
+# Every script is sourced once in a clean shell (with the exports of its tool), and the exported
+# variables before and after are diffed. Search path variables extended by the script become
+# prepends/appends to the value of the sourcing shell. A script that reads other variables than
+# those of the clean shell (e.g., the exports of other tools), defines shell functions or
+# aliases, changes the working folder, or fails cannot be captured, and is sourced as before.
+# Captures are cached by the script path, modification time and content hash, and the
+# environment it is sourced with. Failed captures are only cached for reasons of the script
+# itself (reads of other variables, functions and aliases), and are retried otherwise.
+class SourceCapture:
+    def __init__(self, root: str):
+        self.root = root
+
+    def baseEnv(self, extraEnv: dict[str, str]) -> dict[str, str]:
+        env = {name: os.environ[name] for name in _baseVars if name in os.environ}
+        env.update({name: f"{_sentinelPrefix}{name}" for name in _searchVars})
+        env["PATH"] = _cleanPath
+        env.update(extraEnv)
+        return env
+
+    def key(self, script: str, env: dict[str, str]) -> Optional[str]:
+        try:
+            mtime = os.stat(script).st_mtime_ns
+            with open(script, "rb") as file:
+                sha256 = hashlib.sha256(file.read()).hexdigest()
+        except OSError:
+            return None
+        return hashlib.sha256(json.dumps([script, mtime, sha256, env], sort_keys=True).encode()).hexdigest()
+
+    # runs a script in the clean shell, and returns its export lines (or None if it cannot be
+    # captured), and whether the result only depends on the script (so it can be cached)
+    def _run(self, script: str, env: dict[str, str]) -> tuple[Optional[list[str]], bool]:
+        try:
+            with open(script, errors="replace") as file:
+                readVars = _readVars(file.read())
+        except OSError:
+            return None, False
+        if readVars - set(env) - set(_shellVars):
+            return None, True
+        try:
+            r = subprocess.run(
+                ["bash", "--noprofile", "--norc", "-c", _captureScript],
+                env=dict(env, DFR_SOURCE_SCRIPT=script),
+                cwd=os.path.dirname(script) or "/",
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=600,
+            )
+        except subprocess.TimeoutExpired:
+            return None, False
+        sections = r.stdout.decode(errors="surrogateescape").split("\1")
+        if r.returncode != 0 or len(sections) != 3:
+            return None, False
+        # functions and aliases
+        if sections[2].strip():
+            return None, True
+        before, after = _parseEnv(sections[0]), _parseEnv(sections[1])
+        if before.get("PWD") != after.get("PWD"):
+            return None, False
+        lines = [f"#Captured from {script}"]
+        for name in sorted(set(before) | set(after)):
+            if name in _ignoredVars or name == "PWD" or before.get(name) == after.get(name):
+                continue
+            if name not in after:
+                lines.append(f"unset {name}")
+                continue
+            line = _exportLine(name, after[name], before.get(name))
+            # a search path value used in any other way can not be replayed
+            if _sentinelPrefix in line:
+                return None, False
+            lines.append(line)
+        return lines, True
+
+    # the export lines of a sourced script, or None if it cannot be captured
+    def capture(self, script: str, extraEnv: Optional[dict[str, str]] = None) -> Optional[list[str]]:
+        env = self.baseEnv(extraEnv or {})
+        key = self.key(script, env)
+        if key is None:
+            return None
+        path = os.path.join(self.root, f"{key}.json")
+        try:
+            with open(path) as file:
+                return json.load(file)["lines"]
+        except (OSError, ValueError, KeyError):
+            pass
+        lines, cacheable = self._run(script, env)
+        if lines is None:
+            print(f"Warning: the effect of {script} cannot be captured, it is sourced instead", file=sys.stderr)
+        if not cacheable:
+            return lines
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as file:
+            json.dump({"script": script, "lines": lines}, file)
+        os.replace(tmp, path)
+        return lines
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+# the view folder of every merged search path variable
+viewDirs = {
+    "PATH": "bin",
+    "LD_LIBRARY_PATH": "lib",
+    "MANPATH": "share/man",
+    "PKG_CONFIG_PATH": "lib/pkgconfig",
+}
+
+
+def _entries(searchDir: str, envName: str) -> list[str]:
+    try:
+        names = sorted(os.listdir(searchDir))
+    except OSError:
+        return []
+    if envName == "MANPATH":
+        # man pages are looked up in section folders (`man1/`, ...)
+        return [
+            os.path.join(section, page)
+            for section in names
+            if os.path.isdir(os.path.join(searchDir, section))
+            for page in _entries(os.path.join(searchDir, section), "")
+        ]
+    if envName == "PKG_CONFIG_PATH":
+        return [n for n in names if n.endswith(".pc")]
+    return [n for n in names if not os.path.isdir(os.path.join(searchDir, n))]
+
+
+# A merged prefix of symlinks for the search paths of a tool set, so PATH, LD_LIBRARY_PATH,
+# MANPATH and PKG_CONFIG_PATH get a single entry instead of one (or more) per tool.
+# Every search path folder is linked entry by entry into `<root>/<key>/{bin,lib,...}`, where
+# an entry of an earlier folder shadows the same name in later folders (as the search path
+# order would), and is reported as a conflict if the two do not resolve to the same file.
+# The key covers the installs and search paths of the tool set, so a view is built once and
+# reused until the tool set changes.
+class EnvView:
+    def __init__(self, root: str):
+        self.root = root
+
+    def key(self, installs: list[str], searchPaths: dict[str, list[str]]) -> str:
+        return hashlib.sha256(json.dumps([installs, searchPaths], sort_keys=True).encode()).hexdigest()[:32]
+
+    # returns the view folder of the search paths (in search order) of the given installs
+    def build(self, installs: list[str], searchPaths: dict[str, list[str]]) -> str:
+        view = os.path.join(self.root, self.key(installs, searchPaths))
+        if os.path.isdir(view):
+            return view
+        tmp = f"{view}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        conflicts: list[str] = []
+        for envName, viewDir in viewDirs.items():
+            os.makedirs(os.path.join(tmp, viewDir), exist_ok=True)
+            linked: dict[str, str] = {}
+            for searchDir in searchPaths.get(envName, []):
+                for entry in _entries(searchDir, envName):
+                    target = os.path.join(searchDir, entry)
+                    if entry in linked:
+                        if os.path.realpath(linked[entry]) != os.path.realpath(target):
+                            conflicts.append(f"{viewDir}/{entry}: {linked[entry]} shadows {target}")
+                        continue
+                    link = os.path.join(tmp, viewDir, entry)
+                    os.makedirs(os.path.dirname(link), exist_ok=True)
+                    os.symlink(target, link)
+                    linked[entry] = target
+        with open(os.path.join(tmp, "conflicts.txt"), "w") as file:
+            file.writelines(f"{c}\n" for c in conflicts)
+        for conflict in conflicts:
+            print(f"Warning: environment view conflict {conflict}", file=sys.stderr)
+        try:
+            os.rename(tmp, view)
+        except OSError:
+            # built concurrently by another process
+            shutil.rmtree(tmp, ignore_errors=True)
+        return view
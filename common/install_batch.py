@@ -0,0 +1,17 @@
+from dfr_scripts.common import flattenToolVersions, paths
+from dfr_scripts.common.batch import BatchInstaller
+import os
+import sys
+import time
+import yaml
+
+# installs all the tools (and their dependencies) of a DFR configuration file concurrently.
+# usage: install_batch.py <config.yaml> <toolMnt> [<jobs>]
+configPath, toolMnt, *jobsOpt = sys.argv[1:]
+jobs = int(jobsOpt[0]) if jobsOpt else 4
+with open(configPath) as file:
+    config = yaml.safe_load(file) or {}
+logDir = os.path.join(paths.cache, "logs", time.strftime("install-%Y%m%d-%H%M%S"))
+installer = BatchInstaller(flattenToolVersions(config.get("tool_versions")), toolMnt, jobs, logDir)
+if not installer.run():
+    sys.exit(1)
@@ -0,0 +1,38 @@
+from dfr_scripts.common import VersionLoc, getTool
+import json
+import sys
+
+# resolves or installs a single tool version (used by `install_batch.py`), and writes the
+# resolved version and tool dependencies to a JSON result file.
+# `resolve` only resolves the version and dependencies (the dependencies are null for tools
+# that read them from their install tree), `install` installs the resolved version (passed as the
+# version request) on the resolved mount, without its dependencies.
+# usage: install_node.py <resolve|install> <tool> <version request> <toolMnt> <result path>
+cmd, tool_fullName, tool_version, toolMnt, resultPath = sys.argv[1:]
+tool = getTool(tool_fullName, tool_version)
+dependencies = None
+if cmd == "resolve":
+    version = tool.latestInstallableVersion(tool_version)
+    if version == "":
+        print(f"No installable versions found to match the pattern `{tool_version}` for the tool `{tool_fullName}`")
+        sys.exit(1)
+    tool.versionLoc = VersionLoc(toolMnt=tool.getInstalledToolMnt(version) or toolMnt, version=version)
+    try:
+        dependencies = tool.dependencies()
+    except OSError:
+        pass
+elif cmd == "install":
+    tool.install(toolMnt, "", withToolDeps=False)
+    dependencies = tool.dependencies()
+else:
+    print(f"Unknown command `{cmd}`")
+    sys.exit(1)
+with open(resultPath, "w") as file:
+    json.dump(
+        {
+            "version": tool.versionLoc.version,
+            "toolMnt": tool.versionLoc.toolMnt,
+            "dependencies": dependencies,
+        },
+        file,
+    )
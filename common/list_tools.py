@@ -0,0 +1,11 @@
+from dfr_scripts.common import toolRegistry
+
+# lists all the supported tools from the registry index, without executing their scripts.
+# usage: list_tools.py
+for fullName in toolRegistry.toolNames():
+    entry = toolRegistry.entry(fullName)
+    if entry is None:
+        print(f"{fullName} (not indexed, run `common/build_registry.py`)")
+    else:
+        deps = f" -> {', '.join(entry['dependencies'])}" if entry["dependencies"] else ""
+        print(f"{fullName} [{entry['class']}]{deps}")
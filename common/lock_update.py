@@ -0,0 +1,17 @@
+from dfr_scripts.common import Tools, flattenToolVersions
+from dfr_scripts.common.lockfile import lockfilePath, writeLockfile
+import sys
+import yaml
+
+# re-resolves all the tool versions (and dependencies) of a DFR configuration file and
+# rewrites its lockfile.
+# usage: lock_update.py <config.yaml>
+configPath = sys.argv[1]
+with open(configPath) as file:
+    config = yaml.safe_load(file) or {}
+tool_versions_flat = flattenToolVersions(config.get("tool_versions"))
+tools = Tools(tool_versions_flat)
+writeLockfile(configPath, tool_versions_flat, tools.lockedTools())
+for t in tools.resolved():
+    print(f"{t.fullName()}: {t.versionLoc.version} ({t.versionLoc.toolMnt})")
+print(f"Updated {lockfilePath(configPath)}")
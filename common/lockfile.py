@@ -0,0 +1,35 @@
+import os
+from typing import Optional
+
+lockfileName = "dfr-lock.yaml"
+
+
+# the lockfile is written next to the project configuration file
+def lockfilePath(configPath: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(configPath)), lockfileName)
+
+
+# returns the locked tool entries, or None if there is no lockfile or it was locked
+# for a different tool configuration
+def readLockfile(configPath: str, tool_versions_flat: dict[str, str]) -> Optional[list[dict[str, str]]]:
+    import yaml
+
+    try:
+        with open(lockfilePath(configPath)) as file:
+            lock = yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        return None
+    if lock.get("tool_versions") != tool_versions_flat:
+        return None
+    return lock.get("tools", [])
+
+
+def writeLockfile(configPath: str, tool_versions_flat: dict[str, str], lockedTools: list[dict[str, str]]):
+    import yaml
+
+    path = lockfilePath(configPath)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as file:
+        file.write("#This file is generated by DFR. Run `dfr tools update` to re-resolve the tool versions.\n")
+        yaml.safe_dump({"tool_versions": tool_versions_flat, "tools": lockedTools}, file, sort_keys=False)
+    os.replace(tmp, path)
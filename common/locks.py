@@ -0,0 +1,29 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+
+# An advisory `flock` on the given lock file path (created when missing).
+# Shared locks may be held by many processes at once, while an exclusive lock
+# waits for all of them. With `blocking=False`, yields False instead of waiting
+# when the lock is busy.
+@contextmanager
+def fileLock(path: str, shared: bool = False, blocking: bool = True) -> Iterator[bool]:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        op = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            op |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(fd, op)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
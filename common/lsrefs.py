@@ -0,0 +1,70 @@
+import subprocess
+import threading
+from typing import Optional
+
+# a listing is a list of (object hash, ref name) pairs, ordered as `git ls-remote` prints them,
+# including the `<ref>^{}` entries of peeled annotated tags
+Listing = list[tuple[str, str]]
+
+# per-process memo of remote ref listings, shared by all tools.
+# keys are repo URLs, values are (ref prefixes, listing) pairs, where None prefixes
+# stand for a listing of all refs.
+_listings: dict[str, list[tuple[Optional[tuple[str, ...]], Listing]]] = {}
+_listingsLock = threading.Lock()
+
+
+def _covers(listedPrefixes: Optional[tuple[str, ...]], prefixes: Optional[tuple[str, ...]]) -> bool:
+    if listedPrefixes is None:
+        return True
+    if prefixes is None:
+        return False
+    return all(any(p.startswith(lp) for lp in listedPrefixes) for p in prefixes)
+
+
+def _filter(listing: Listing, prefixes: Optional[tuple[str, ...]]) -> Listing:
+    if prefixes is None:
+        return listing
+    return [(oid, ref) for oid, ref in listing if ref.startswith(prefixes)]
+
+
+# lists remote refs with `git ls-remote` (over protocol v2, with git's own transports and
+# credential helpers). with `--tags`/`--heads`, the server only sends the tags/branches (the
+# `ref-prefix` arguments of the v2 `ls-refs` command), and the ref patterns drop the other
+# refs on the client. returns None if the listing failed.
+def _lsRemoteCmd(url: str, prefixes: Optional[tuple[str, ...]]) -> Optional[Listing]:
+    opts: list[str] = []
+    patterns: list[str] = []
+    if prefixes is not None:
+        if all(p.startswith(("refs/tags/", "refs/heads/")) for p in prefixes):
+            opts += ["--tags"] if any(p.startswith("refs/tags/") for p in prefixes) else []
+            opts += ["--heads"] if any(p.startswith("refs/heads/") for p in prefixes) else []
+        # patterns are matched against the tails of the ref names
+        patterns = [f"{p}*" for p in prefixes]
+    lsRemote = subprocess.run(
+        ["git", "-c", "protocol.version=2", "ls-remote"] + opts + [url] + patterns, stdout=subprocess.PIPE, text=True
+    )
+    if lsRemote.returncode != 0:
+        return None
+    ret: Listing = []
+    for line in lsRemote.stdout.splitlines():
+        oid, ref = line.split("\t", 1)
+        ret.append((oid, ref))
+    return _filter(ret, prefixes)
+
+
+# lists the refs of a remote repo that start with one of the given prefixes (all refs if None).
+# every remote is listed at most once per process for a given set of prefixes, and later
+# requests covered by an earlier listing are served from it.
+def lsRemote(url: str, prefixes: Optional[list[str]] = None) -> Listing:
+    key = tuple(sorted(set(prefixes))) if prefixes is not None else None
+    with _listingsLock:
+        for listedPrefixes, listed in _listings.get(url, []):
+            if _covers(listedPrefixes, key):
+                return _filter(listed, key)
+    listing = _lsRemoteCmd(url, key)
+    # failed listings are not memoized
+    if listing is None:
+        return []
+    with _listingsLock:
+        _listings.setdefault(url, []).append((key, listing))
+    return listing
@@ -0,0 +1,4 @@
+from dfr_scripts.common import mirrorStore
+
+# repacks and garbage-collects the git mirror store (meant to run on a schedule, e.g. nightly)
+mirrorStore.maintain()
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+# A persistent key/value store for remote metadata lookups (e.g., GitHub REST answers).
+# Entries are either immutable (cached forever) or revalidated (stored together with
+# their ETag and fetch time, so the caller can decide when to revalidate them).
+# The store is an SQLite database in WAL mode, so several concurrent `dfr` processes
+# (and threads, each holding its own connection) can safely read and write it.
+# Any database error degrades to a cache miss rather than failing the lookup.
+class MetaCache:
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS entries (
+                        key TEXT PRIMARY KEY,
+                        body TEXT NOT NULL,
+                        etag TEXT,
+                        fetched_at REAL NOT NULL,
+                        immutable INTEGER NOT NULL
+                    )
+                    """
+                )
+            except (sqlite3.Error, OSError):
+                return None
+            self._local.conn = conn
+        return conn
+
+    # returns the stored (body, etag, fetched_at, immutable) for the given key, if any
+    def get(self, key: str) -> Optional[tuple[str, Optional[str], float, bool]]:
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT body, etag, fetched_at, immutable FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        body, etag, fetchedAt, immutable = row
+        return body, etag, fetchedAt, bool(immutable)
+
+    def put(self, key: str, body: str, etag: Optional[str] = None, immutable: bool = False):
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, body, etag, fetched_at, immutable) VALUES (?, ?, ?, ?, ?)",
+                (key, body, etag, time.time(), int(immutable)),
+            )
+        except sqlite3.Error:
+            pass
+
+    # marks a revalidated entry as fresh again (e.g., after a `304 Not Modified` answer)
+    def touch(self, key: str):
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            conn.execute("UPDATE entries SET fetched_at = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,209 @@
+import os
+import posixpath
+import shutil
+import subprocess
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Iterator, Optional
+from urllib.parse import urlparse, urlunparse
+
+from .locks import fileLock
+
+
+def _git(args: list[str], check: bool = True, quiet: bool = False) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git"] + args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL if quiet else None,
+        text=True,
+        check=check,
+    )
+
+
+# the URL of a submodule, resolving a URL relative to its superproject URL (`../<repo>`)
+def _submoduleURL(superURL: str, url: str) -> str:
+    if not url.startswith(("./", "../")):
+        return url
+    parsed = urlparse(superURL)
+    return urlunparse(parsed._replace(path=posixpath.normpath(posixpath.join(parsed.path, url))))
+
+
+# A store of bare mirrors, one per upstream repository URL, that is kept up to date
+# with incremental fetches. Installs check out from a mirror with a `--shared` clone,
+# so the objects are borrowed (via git alternates) instead of downloaded and copied.
+# Submodules get their own mirrors, so repos that vendor the same submodules share objects.
+#
+# Concurrency is handled with two lock files per mirror:
+#  * `<mirror>.fetch.lock` is held exclusively while fetching into (or maintaining) the mirror.
+#  * `<mirror>.use.lock` is held shared by every install borrowing objects from the mirror,
+#    so maintenance (which may prune objects) only runs on mirrors no install is using.
+# Maintenance (repack/gc) never runs during an install. It is expected to run on a schedule,
+# e.g. a nightly cron job running `common/maintain_mirrors.py`.
+class MirrorStore:
+    root: str
+
+    def __init__(self, root: str):
+        self.root = root
+        self._fetched: set[str] = set()
+        self._fetchedLock = threading.Lock()
+
+    def path(self, url: str) -> str:
+        parsed = urlparse(url)
+        repoPath = parsed.path.strip("/")
+        if repoPath.endswith(".git"):
+            repoPath = repoPath[: -len(".git")]
+        return os.path.join(self.root, parsed.netloc or "local", f"{repoPath}.git")
+
+    def hasCommit(self, url: str, commit: str) -> bool:
+        catFile = _git(["--git-dir", self.path(url), "cat-file", "-e", f"{commit}^{{commit}}"], False, True)
+        return catFile.returncode == 0
+
+    # creates the mirror if missing and fetches all its branches and tags.
+    # every mirror is fetched at most once per process, unless a required commit is still missing.
+    def update(self, url: str, commit: Optional[str] = None):
+        mirror = self.path(url)
+        with self._fetchedLock:
+            fetched = mirror in self._fetched
+        if fetched and (commit is None or self.hasCommit(url, commit)):
+            return
+        with fileLock(f"{mirror}.fetch.lock"):
+            if not os.path.exists(mirror):
+                print(f"Creating mirror of {url} ...")
+                tmp = f"{mirror}.tmp"
+                shutil.rmtree(tmp, ignore_errors=True)
+                _git(["init", "--quiet", "--bare", tmp])
+                _git(["--git-dir", tmp, "remote", "add", "origin", url])
+                _git(["--git-dir", tmp, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"])
+                _git(["--git-dir", tmp, "config", "--add", "remote.origin.fetch", "+refs/tags/*:refs/tags/*"])
+                # maintenance is scheduled separately, never during a fetch
+                _git(["--git-dir", tmp, "config", "gc.auto", "0"])
+                _git(["--git-dir", tmp, "config", "maintenance.auto", "false"])
+                os.rename(tmp, mirror)
+            else:
+                print(f"Updating mirror of {url} ...")
+            if not fetched:
+                _git(["--git-dir", mirror, "fetch", "--quiet", "--prune", "--prune-tags", "origin"])
+            # a commit that is not reachable from any branch or tag is fetched directly
+            if commit is not None and not self.hasCommit(url, commit):
+                _git(["--git-dir", mirror, "fetch", "--quiet", "origin", commit], check=False)
+        with self._fetchedLock:
+            self._fetched.add(mirror)
+
+    # updates the mirror and holds it in use (blocking maintenance) until the context exits
+    @contextmanager
+    def use(self, url: str, commit: Optional[str] = None) -> Iterator[str]:
+        mirror = self.path(url)
+        with fileLock(f"{mirror}.use.lock", shared=True):
+            self.update(url, commit)
+            yield mirror
+
+    # checks out a working tree from the mirror without copying its objects.
+    # the origin remote of the working tree points to the upstream URL.
+    def clone(self, url: str, dest: str, commit: Optional[str] = None):
+        _git(["clone", "--quiet", "--shared", "--no-checkout", self.path(url), dest])
+        _git(["-C", dest, "remote", "set-url", "origin", url])
+        if commit is not None:
+            _git(["-C", dest, "checkout", "--quiet", commit])
+
+    # recursively checks out the submodules of a working tree from their own mirrors.
+    # the mirrors are held in use by the given exit stack.
+    def updateSubmodules(self, workTree: str, stack: ExitStack):
+        if not os.path.exists(os.path.join(workTree, ".gitmodules")):
+            return
+        _git(["-C", workTree, "submodule", "init", "--quiet"])
+        pathEntries = _git(
+            ["-C", workTree, "config", "-f", ".gitmodules", "--get-regexp", r"^submodule\..*\.path$"], False
+        ).stdout.splitlines()
+        for entry in pathEntries:
+            key, subPath = entry.split(" ", 1)
+            name = key[len("submodule.") : -len(".path")]
+            gitlink = _git(["-C", workTree, "ls-tree", "HEAD", "--", subPath]).stdout.split()
+            # skipping stale entries that no longer point to a gitlink
+            if len(gitlink) < 3 or gitlink[1] != "commit":
+                continue
+            commit = gitlink[2]
+            url = _git(["-C", workTree, "config", "--get", f"submodule.{name}.url"]).stdout.strip()
+            subTree = os.path.join(workTree, subPath)
+            try:
+                stack.enter_context(self.use(url, commit))
+                self.clone(url, subTree, commit)
+            except subprocess.CalledProcessError:
+                print(f"Could not check out submodule `{subPath}` from a mirror, cloning it directly...")
+                _git(["-C", workTree, "submodule", "update", "--init", "--recursive", "--", subPath])
+                continue
+            self.updateSubmodules(subTree, stack)
+
+    # the (path, commit, URL) of every submodule of a commit in a mirror
+    def submodules(self, url: str, commit: str) -> list[tuple[str, str, str]]:
+        gitDir = ["--git-dir", self.path(url)]
+        blob = ["config", "--blob", f"{commit}:.gitmodules"]
+        if _git(gitDir + ["cat-file", "-e", f"{commit}:.gitmodules"], False, True).returncode != 0:
+            return []
+        ret: list[tuple[str, str, str]] = []
+        pathEntries = _git(gitDir + blob + ["--get-regexp", r"^submodule\..*\.path$"], False).stdout.splitlines()
+        for entry in pathEntries:
+            key, subPath = entry.split(" ", 1)
+            name = key[len("submodule.") : -len(".path")]
+            gitlink = _git(gitDir + ["ls-tree", commit, "--", subPath]).stdout.split()
+            # skipping stale entries that no longer point to a gitlink
+            if len(gitlink) < 3 or gitlink[1] != "commit":
+                continue
+            subURL = _git(gitDir + blob + ["--get", f"submodule.{name}.url"]).stdout.strip()
+            ret.append((subPath, gitlink[2], _submoduleURL(url, subURL)))
+        return ret
+
+    # streams the tree of a commit into a folder (`git archive` piped into `tar -x`), and with
+    # `recursive`, the trees of its submodules from their own mirrors, without any working tree.
+    # file modes follow the user umask, as in a checkout. `sudo` extracts as root.
+    # the mirrors are held in use by the given exit stack.
+    def archive(self, url: str, commit: str, dest: str, stack: ExitStack, recursive: bool, sudo: bool = False):
+        mirror = stack.enter_context(self.use(url, commit))
+        asRoot = ["sudo"] if sudo else []
+        if not os.path.isdir(dest):
+            subprocess.run(asRoot + ["mkdir", "-p", dest], check=True)
+        # the mirror has no work tree, so with `--worktree-attributes` (and no global attributes file)
+        # the `export-ignore`/`export-subst` attributes of the tree are not applied, and the files
+        # match those of a checkout
+        gitArchive = subprocess.Popen(
+            ["git", "--git-dir", mirror, "-c", "tar.umask=user", "-c", "core.attributesFile=/dev/null"]
+            + ["archive", "--worktree-attributes", "--format=tar", commit],
+            stdout=subprocess.PIPE,
+        )
+        tar = subprocess.run(asRoot + ["tar", "-x", "-f", "-", "-C", dest], stdin=gitArchive.stdout)
+        gitArchive.stdout.close()  # type: ignore
+        if gitArchive.wait() != 0 or tar.returncode != 0:
+            raise subprocess.CalledProcessError(gitArchive.returncode or tar.returncode, "git archive")
+        if recursive:
+            for subPath, subCommit, subURL in self.submodules(url, commit):
+                self.archive(subURL, subCommit, os.path.join(dest, subPath), stack, recursive, sudo)
+
+    # the commit time of a commit in a mirror, in the `touch -t` format (UTC)
+    def commitTouchTime(self, url: str, commit: str) -> str:
+        show = ["--git-dir", self.path(url), "show", "--quiet", "--date=format-local:%Y%m%d%H%M.%S", "--format=%cd"]
+        env = dict(os.environ, TZ="UTC0")
+        return subprocess.run(
+            ["git"] + show + [commit], stdout=subprocess.PIPE, text=True, check=True, env=env
+        ).stdout.strip()
+
+    def mirrors(self) -> list[str]:
+        ret: list[str] = []
+        for dirPath, dirNames, _ in os.walk(self.root):
+            for dirName in list(dirNames):
+                if dirName.endswith(".git"):
+                    ret.append(os.path.join(dirPath, dirName))
+                    dirNames.remove(dirName)
+        return sorted(ret)
+
+    # repacks and garbage-collects every mirror that is not in use by an install.
+    # mirrors that are in use are skipped and will be handled on the next run.
+    def maintain(self):
+        for mirror in self.mirrors():
+            with fileLock(f"{mirror}.fetch.lock"):
+                with fileLock(f"{mirror}.use.lock", blocking=False) as locked:
+                    if not locked:
+                        print(f"Skipping mirror in use: {mirror}")
+                        continue
+                    print(f"Maintaining mirror: {mirror}")
+                    _git(["--git-dir", mirror, "gc", "--quiet", "--prune=now"], check=False)
+
@@ -0,0 +1,24 @@
+from dfr_scripts.common import mountIndex, toolMnts
+import os
+import sys
+
+# maintains the installed-version indexes of the tool mounts (requires write access to them).
+# usage: mount_index.py rebuild [--sizes] [<mount>...]  (--sizes records the install sizes)
+#        mount_index.py add <mount> <tool full name> <version> <install path>
+cmd, *args = sys.argv[1:]
+if cmd == "rebuild":
+    withSizes = "--sizes" in args
+    args = [a for a in args if a != "--sizes"]
+    for toolMnt in args or toolMnts:
+        if not os.path.isdir(os.path.join(mountIndex.root, toolMnt)):
+            print(f"Skipping missing mount `{toolMnt}`")
+            continue
+        tools = mountIndex.rebuild(toolMnt, withSizes)
+        count = sum(len(versions) for versions in tools.values())
+        print(f"Indexed {count} installed versions of {len(tools)} tools in {mountIndex.path(toolMnt)}")
+elif cmd == "add":
+    toolMnt, fullName, version, installPath = args
+    mountIndex.add(toolMnt, fullName, version, installPath)
+else:
+    print(f"Unknown command `{cmd}`")
+    sys.exit(1)
@@ -0,0 +1,135 @@
+import json
+import os
+from typing import Optional
+
+from .locks import fileLock
+
+indexFileName = ".dfr_index.json"
+readyFileName = ".dfr_ready"
+
+
+# the total apparent size of a directory tree (without following symlinks)
+def treeSize(path: str) -> int:
+    size = 0
+    for dirPath, dirNames, fileNames in os.walk(path):
+        for name in dirNames + fileNames:
+            try:
+                size += os.lstat(os.path.join(dirPath, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+# A per-mount index of the installed tool versions, stored at `/mnt/<mount>/.dfr_index.json`
+# as {<tool full name>: {<version>: {"ready": <.dfr_ready ctime ns>, "size": <bytes>}}}.
+# A lookup reads the whole index of a mount with a single read (once per process), instead of
+# listing and probing the install folders, which is slow on network-mounted tool volumes.
+# The index is updated atomically whenever an install completes, and can be rebuilt from the
+# install folders (`common/mount_index.py rebuild`) if it drifts. Mounts without an index are
+# scanned as before.
+# The install sizes walk whole install trees, so they are only recorded by rebuilds with sizes
+# (`common/mount_index.py rebuild --sizes`). The entries whose install was removed since are
+# dropped when a lookup finds their `.dfr_ready` marker missing.
+class MountIndex:
+    root: str
+
+    def __init__(self, root: str = "/mnt"):
+        self.root = root
+        self._indexes: dict[str, Optional[dict[str, dict[str, dict]]]] = {}
+
+    def path(self, toolMnt: str) -> str:
+        return os.path.join(self.root, toolMnt, indexFileName)
+
+    # the index of a mount, or None if the mount has no (readable) index
+    def read(self, toolMnt: str) -> Optional[dict[str, dict[str, dict]]]:
+        if toolMnt not in self._indexes:
+            try:
+                with open(self.path(toolMnt)) as file:
+                    self._indexes[toolMnt] = json.load(file)["tools"]
+            except (OSError, ValueError, KeyError):
+                self._indexes[toolMnt] = None
+        return self._indexes[toolMnt]
+
+    # the indexed versions of a tool under a mount, or None if the mount has no index
+    def versions(self, toolMnt: str, fullName: str) -> Optional[dict[str, dict]]:
+        index = self.read(toolMnt)
+        if index is None:
+            return None
+        return index.get(fullName, {})
+
+    def _entry(self, installPath: str, withSize: bool = False) -> Optional[dict]:
+        try:
+            ready = os.stat(os.path.join(installPath, readyFileName))
+        except OSError:
+            return None
+        entry = {"ready": ready.st_ctime_ns}
+        if withSize:
+            entry["size"] = treeSize(installPath)
+        return entry
+
+    def _write(self, toolMnt: str, tools: dict[str, dict[str, dict]]):
+        path = self.path(toolMnt)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as file:
+            json.dump({"tools": tools}, file, indent=1, sort_keys=True)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+        self._indexes[toolMnt] = tools
+
+    def _scan(self, toolMnt: str, withSizes: bool = False) -> dict[str, dict[str, dict]]:
+        tools: dict[str, dict[str, dict]] = {}
+        mntPath = os.path.join(self.root, toolMnt)
+        for domain in sorted(os.listdir(mntPath)):
+            domainPath = os.path.join(mntPath, domain)
+            if not os.path.isdir(domainPath):
+                continue
+            for vendor in sorted(os.listdir(domainPath)):
+                vendorPath = os.path.join(domainPath, vendor)
+                if not os.path.isdir(vendorPath):
+                    continue
+                for name in sorted(os.listdir(vendorPath)):
+                    namePath = os.path.join(vendorPath, name)
+                    if not os.path.isdir(namePath):
+                        continue
+                    for version in sorted(os.listdir(namePath)):
+                        entry = self._entry(os.path.join(namePath, version), withSizes)
+                        if entry is not None:
+                            tools.setdefault(f"{domain}.{vendor}.{name}", {})[version] = entry
+        return tools
+
+    # rebuilds the index of a mount from its install folders (with the install sizes, if asked)
+    def rebuild(self, toolMnt: str, withSizes: bool = False) -> dict[str, dict[str, dict]]:
+        with fileLock(f"{self.path(toolMnt)}.lock"):
+            tools = self._scan(toolMnt, withSizes)
+            self._write(toolMnt, tools)
+        return tools
+
+    # records a completed install in the index of its mount.
+    # a mount without an index is fully indexed first, so earlier installs are not hidden.
+    def add(self, toolMnt: str, fullName: str, version: str, installPath: str):
+        with fileLock(f"{self.path(toolMnt)}.lock"):
+            self._indexes.pop(toolMnt, None)
+            tools = self.read(toolMnt)
+            if tools is None:
+                tools = self._scan(toolMnt)
+            entry = self._entry(installPath)
+            if entry is not None:
+                tools.setdefault(fullName, {})[version] = entry
+            self._write(toolMnt, tools)
+
+    # drops the entry of a removed install from the index of its mount.
+    # the index file is only updated where it is writable, and is rebuilt on the next install otherwise.
+    def drop(self, toolMnt: str, fullName: str, version: str):
+        index = self.read(toolMnt)
+        if index is not None:
+            index.get(fullName, {}).pop(version, None)
+        try:
+            with fileLock(f"{self.path(toolMnt)}.lock"):
+                self._indexes.pop(toolMnt, None)
+                tools = self.read(toolMnt)
+                if tools is None or version not in tools.get(fullName, {}):
+                    return
+                del tools[fullName][version]
+                self._write(toolMnt, tools)
+        except OSError:
+            self._indexes[toolMnt] = index
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import platform
+import shlex
+import shutil
+from abc import abstractmethod
+from typing import Optional
+
+
+# a fingerprint of the base image the tools are built on (distribution, architecture and libc),
+# or the `DFR_BASE_FINGERPRINT` environment variable, if set
+def baseFingerprint() -> str:
+    override = os.environ.get("DFR_BASE_FINGERPRINT")
+    if override:
+        return override
+    try:
+        with open("/etc/os-release") as file:
+            osRelease = file.read()
+    except OSError:
+        osRelease = ""
+    libc = "-".join(platform.libc_ver())
+    return hashlib.sha256(f"{osRelease}\0{platform.machine()}\0{libc}".encode()).hexdigest()[:16]
+
+
+# the content address of a prebuilt tool install.
+# the install path is part of it, since builds embed their install prefix.
+def packageKey(fullName: str, commit: str, flags: str, fingerprint: str, installPath: str) -> str:
+    return hashlib.sha256(f"{fullName}\0{commit}\0{flags}\0{fingerprint}\0{installPath}".encode()).hexdigest()
+
+
+# the tar compression program (pigz writes gzip streams, using all cores)
+def _compressor() -> str:
+    return "pigz" if shutil.which("pigz") else "gzip"
+
+
+# A content-addressed cache of prebuilt tool installs, keyed by `packageKey`.
+# Packages are gzip-compressed tarballs of the install folder (including its `.dfr_ready`
+# marker), which are unpacked as a stream into the install path.
+# The cache is a local (possibly shared) directory, or a plain HTTP server that serves
+# packages with GET/HEAD and accepts new ones with PUT.
+class PackageCache:
+    location: str
+
+    def __init__(self, location: str):
+        self.location = location.rstrip("/")
+
+    def packageName(self, key: str) -> str:
+        return f"{key[:2]}/{key}.tar.gz"
+
+    @abstractmethod
+    def has(self, key: str) -> bool:
+        pass
+
+    # a shell command that writes the package to stdout
+    @abstractmethod
+    def _readShellCmd(self, key: str) -> str:
+        pass
+
+    # a shell command that stores the package from the given local archive file
+    @abstractmethod
+    def _storeShellCmd(self, key: str, archive: str) -> str:
+        pass
+
+    # a shell command that unpacks the package into a fresh install path
+    def unpackShellCmd(self, key: str, installPath: str) -> str:
+        return f"""
+                sudo rm -rf {shlex.quote(installPath)}
+                sudo mkdir -p {shlex.quote(installPath)}
+                {self._readShellCmd(key)} | sudo tar -I {_compressor()} -xf - -C {shlex.quote(installPath)}
+                test -e {shlex.quote(os.path.join(installPath, ".dfr_ready"))}
+                """
+
+    # a shell command that packs the install path and pushes it to the cache
+    def pushShellCmd(self, key: str, installPath: str) -> str:
+        return f"""
+                DFR_PKG=`mktemp`
+                trap 'rm -f $DFR_PKG' EXIT
+                sudo tar -I {_compressor()} -cf - -C {shlex.quote(installPath)} . > $DFR_PKG
+                {self._storeShellCmd(key, "$DFR_PKG")}
+                """
+
+
+class LocalPackageCache(PackageCache):
+    def path(self, key: str) -> str:
+        return os.path.join(self.location, self.packageName(key))
+
+    def has(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def _readShellCmd(self, key: str) -> str:
+        return f"cat {shlex.quote(self.path(key))}"
+
+    # stored through a temporary file, so a package is never visible half-written
+    def _storeShellCmd(self, key: str, archive: str) -> str:
+        path = shlex.quote(self.path(key))
+        tmp = shlex.quote(f"{self.path(key)}.{os.getpid()}.tmp")
+        return f"mkdir -p {shlex.quote(os.path.dirname(self.path(key)))} && cp {archive} {tmp} && mv {tmp} {path}"
+
+
+class HTTPPackageCache(PackageCache):
+    def url(self, key: str) -> str:
+        return f"{self.location}/{self.packageName(key)}"
+
+    def has(self, key: str) -> bool:
+        import requests
+
+        try:
+            return requests.head(self.url(key), allow_redirects=True, timeout=30).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _readShellCmd(self, key: str) -> str:
+        return f"curl -sSfL {shlex.quote(self.url(key))}"
+
+    def _storeShellCmd(self, key: str, archive: str) -> str:
+        return f"curl -sSf -T {archive} {shlex.quote(self.url(key))}"
+
+
+# the package cache at the given location (a directory or an HTTP URL), or None if empty
+def openPackageCache(location: str) -> Optional[PackageCache]:
+    if not location:
+        return None
+    if location.startswith(("http://", "https://")):
+        return HTTPPackageCache(location)
+    return LocalPackageCache(os.path.abspath(os.path.expanduser(location)))
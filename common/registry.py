@@ -0,0 +1,86 @@
+import glob
+import json
+import os
+from types import ModuleType
+from typing import Callable, Optional
+
+registryFileName = ".dfr_registry.json"
+
+
+# A prebuilt index of all the tool scripts, listing every tool's full name, class,
+# static `dependencies` set and siblings. It is generated once when the scripts are
+# installed (`common/build_registry.py`), so listing tools or planning a dependency graph
+# does not execute every tool module.
+# Every entry records the modification time of its script, and an entry whose script was
+# changed since the index was built is ignored (the caller falls back to loading the module).
+class Registry:
+    root: str
+
+    def __init__(self, root: str):
+        self.root = root
+        self._entries: Optional[dict[str, dict]] = None
+
+    def path(self) -> str:
+        return os.path.join(self.root, registryFileName)
+
+    def scriptPath(self, fullName: str) -> str:
+        return os.path.join(self.root, *fullName.split("."), "__init__.py")
+
+    def _scriptMTime(self, fullName: str) -> Optional[int]:
+        try:
+            return os.stat(self.scriptPath(fullName)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            try:
+                with open(self.path()) as file:
+                    self._entries = {e["fullName"]: e for e in json.load(file)["tools"]}
+            except (OSError, ValueError, KeyError):
+                self._entries = {}
+        return self._entries
+
+    # the up-to-date registry entry of a tool, if any
+    def entry(self, fullName: str) -> Optional[dict]:
+        entry = self._load().get(fullName)
+        if entry is None or entry["mtime"] != self._scriptMTime(fullName):
+            return None
+        return entry
+
+    def dependencies(self, fullName: str) -> Optional[set[str]]:
+        entry = self.entry(fullName)
+        return set(entry["dependencies"]) if entry else None
+
+    def siblings(self, fullName: str) -> Optional[set[str]]:
+        entry = self.entry(fullName)
+        return set(entry["siblings"]) if entry else None
+
+    # the full names of all the tool scripts, in name order
+    def toolNames(self) -> list[str]:
+        scripts = glob.glob(os.path.join(self.root, "*", "*", "*", "__init__.py"))
+        return sorted(".".join(os.path.relpath(s, self.root).split(os.sep)[:3]) for s in scripts)
+
+    # executes every tool module once and writes the registry index
+    def build(self, loadModule: Callable[[str], ModuleType]) -> list[dict]:
+        tools: list[dict] = []
+        for fullName in self.toolNames():
+            module = loadModule(fullName)
+            if not hasattr(module, "SpecificTool"):
+                continue
+            tool = module.SpecificTool("latest")
+            tools.append(
+                {
+                    "fullName": fullName,
+                    "class": module.SpecificTool.__mro__[1].__name__,
+                    "dependencies": sorted(getattr(module, "dependencies", set())),
+                    "siblings": sorted(tool.siblings()),
+                    "mtime": self._scriptMTime(fullName),
+                }
+            )
+        tmp = f"{self.path()}.{os.getpid()}.tmp"
+        with open(tmp, "w") as file:
+            json.dump({"tools": tools}, file, indent=2)
+        os.replace(tmp, self.path())
+        self._entries = {e["fullName"]: e for e in tools}
+        return tools
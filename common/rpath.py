@@ -0,0 +1,131 @@
+import json
+import os
+import re
+import shutil
+import stat
+import struct
+import subprocess
+from typing import Optional
+
+# the marker of an install whose binaries find the libraries of its lib dirs through their RUNPATH
+rpathMarkerName = ".dfr_rpath"
+
+_PT_DYNAMIC = 2
+
+
+# whether a file is a dynamically linked ELF executable or shared library
+def isDynamicELF(path: str) -> bool:
+    try:
+        with open(path, "rb") as file:
+            header = file.read(64)
+            if len(header) < 52 or header[:4] != b"\x7fELF" or header[4] not in (1, 2) or header[5] not in (1, 2):
+                return False
+            endian = "<" if header[5] == 1 else ">"
+            if header[4] == 2:
+                if len(header) < 64:
+                    return False
+                phoff = struct.unpack_from(f"{endian}Q", header, 32)[0]
+                phentsize, phnum = struct.unpack_from(f"{endian}HH", header, 54)
+            else:
+                phoff = struct.unpack_from(f"{endian}I", header, 28)[0]
+                phentsize, phnum = struct.unpack_from(f"{endian}HH", header, 42)
+            file.seek(phoff)
+            table = file.read(phentsize * phnum)
+    except OSError:
+        return False
+    for i in range(phnum):
+        if len(table) < (i + 1) * phentsize:
+            break
+        if struct.unpack_from(f"{endian}I", table, i * phentsize)[0] == _PT_DYNAMIC:
+            return True
+    return False
+
+
+# the dynamically linked ELF files of an install tree (symlinks excluded, their targets are in the tree)
+def dynamicELFs(installPath: str) -> list[str]:
+    ret: list[str] = []
+    for dirPath, _, fileNames in os.walk(installPath):
+        for fileName in fileNames:
+            path = os.path.join(dirPath, fileName)
+            if stat.S_ISREG(os.lstat(path).st_mode) and isDynamicELF(path):
+                ret.append(path)
+    return sorted(ret)
+
+
+def _runPath(path: str) -> list[str]:
+    r = subprocess.run(["patchelf", "--print-rpath", path], stdout=subprocess.PIPE, text=True, check=True)
+    return [e for e in r.stdout.strip().split(":") if e]
+
+
+# the `$ORIGIN`-relative search path of a lib dir for an ELF file
+def originPath(elfPath: str, libDir: str) -> str:
+    rel = os.path.relpath(libDir, os.path.dirname(elfPath))
+    return "$ORIGIN" if rel == "." else f"$ORIGIN/{rel}"
+
+
+# the libraries an ELF file does not resolve without LD_LIBRARY_PATH (or None if `ldd` cannot tell)
+def unresolvedLibs(path: str) -> Optional[list[str]]:
+    env = {k: v for k, v in os.environ.items() if k != "LD_LIBRARY_PATH"}
+    r = subprocess.run(["ldd", path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+    if r.returncode != 0:
+        return None
+    return re.findall(r"^\s*(\S+) => not found", r.stdout, re.MULTILINE)
+
+
+# Install-time RUNPATH fixups, so built tools find their own shared libraries without the
+# LD_LIBRARY_PATH exports of their environment (which every dynamic load of the session pays
+# for, and which leak into unrelated programs).
+# Every dynamic ELF file of the install gets `$ORIGIN`-relative RUNPATH entries to the lib dirs
+# of the tool (before its existing entries), which keeps the install relocatable across mounts.
+# Every ELF file is then checked with `ldd` without LD_LIBRARY_PATH, and if none misses a library
+# that is in the lib dirs, the lib dirs are recorded in the `.dfr_rpath` marker of the install,
+# and their LD_LIBRARY_PATH exports are dropped from the environment.
+# returns the verified lib dirs (relative to the install), or an empty list.
+def fixRPaths(installPath: str, libDirs: list[str]) -> list[str]:
+    markerPath = os.path.join(installPath, rpathMarkerName)
+    if os.path.exists(markerPath):
+        os.remove(markerPath)
+    libDirs = [d for d in libDirs if os.path.isdir(os.path.join(installPath, d))]
+    if not libDirs:
+        return []
+    if shutil.which("patchelf") is None:
+        print("Warning: `patchelf` is not installed, the RUNPATH fixups are skipped.")
+        return []
+    elfs = dynamicELFs(installPath)
+    patched = 0
+    for path in elfs:
+        try:
+            runPath = _runPath(path)
+            added = [originPath(path, os.path.join(installPath, d)) for d in libDirs]
+            newRunPath = added + [e for e in runPath if e not in added]
+            if newRunPath != runPath:
+                subprocess.run(["patchelf", "--set-rpath", ":".join(newRunPath), path], check=True)
+                patched += 1
+        except subprocess.CalledProcessError:
+            print(f"Warning: could not set the RUNPATH of {path}")
+    print(f"Set the RUNPATH of {patched} of {len(elfs)} ELF files")
+    libNames = {n for d in libDirs for n in os.listdir(os.path.join(installPath, d))}
+    failed = False
+    for path in elfs:
+        missing = [lib for lib in unresolvedLibs(path) or [] if lib in libNames]
+        if missing:
+            print(f"Warning: {os.path.relpath(path, installPath)} does not resolve {', '.join(missing)}")
+            failed = True
+    if failed:
+        print("The RUNPATH verification failed, LD_LIBRARY_PATH is kept in the environment.")
+        return []
+    tmp = f"{markerPath}.tmp"
+    with open(tmp, "w") as file:
+        json.dump({"libDirs": libDirs}, file)
+    os.replace(tmp, markerPath)
+    print(f"Verified the RUNPATH of {len(elfs)} ELF files, LD_LIBRARY_PATH is not needed for {', '.join(libDirs)}")
+    return libDirs
+
+
+# the lib dirs (relative to the install) whose libraries the binaries of an install find by RUNPATH
+def verifiedLibDirs(installPath: str) -> list[str]:
+    try:
+        with open(os.path.join(installPath, rpathMarkerName)) as file:
+            return json.load(file)["libDirs"]
+    except (OSError, ValueError, KeyError):
+        return []
@@ -0,0 +1,20 @@
+from dfr_scripts.common.rpath import fixRPaths, unresolvedLibs, dynamicELFs, verifiedLibDirs
+import os
+import sys
+
+# the RUNPATH fixups of built installs (requires write access to the install).
+# usage: rpath_fixup.py fix <install path> <lib dir>...  (lib dirs relative to the install)
+#        rpath_fixup.py check <install path>           (the libraries not resolved without LD_LIBRARY_PATH)
+cmd, installPath, *libDirs = sys.argv[1:]
+
+if cmd == "fix":
+    fixRPaths(installPath, libDirs)
+elif cmd == "check":
+    print(f"Verified lib dirs: {', '.join(verifiedLibDirs(installPath)) or 'none'}")
+    for path in dynamicELFs(installPath):
+        missing = unresolvedLibs(path)
+        if missing:
+            print(f"{os.path.relpath(path, installPath)}: {', '.join(missing)}")
+else:
+    print(f"Unknown command `{cmd}`")
+    sys.exit(1)
@@ -0,0 +1,210 @@
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+_pageSize = os.sysconf("SC_PAGE_SIZE")
+_clockTicks = os.sysconf("SC_CLK_TCK")
+
+
+# the process ids of a process tree (children are found through `/proc/<pid>/stat`)
+def processTree(rootPid: int) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as file:
+                # the command name may contain spaces, so fields are counted after its closing `)`
+                ppid = int(file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    ret = [rootPid]
+    i = 0
+    while i < len(ret):
+        ret += children.get(ret[i], [])
+        i += 1
+    return ret
+
+
+def processRSS(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as file:
+            return int(file.read().split()[1]) * _pageSize
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+# the bytes written to storage by a process (unreadable for processes of other users, e.g. `sudo`)
+def processWrittenBytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/io") as file:
+            for line in file:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+# the CPU seconds of the reaped children of the current process (and of itself, with `own`)
+def cpuTime(own: bool = True) -> float:
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    ret = children.ru_utime + children.ru_stime
+    if own:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        ret += usage.ru_utime + usage.ru_stime
+    return ret
+
+
+# Samples a process tree in the background, and accumulates the peak RSS (summed over the
+# tree) and the bytes written per phase, as given by the `phase` callback at every sample.
+# Processes that exit between two samples miss their last writes, so bytes are a lower bound.
+class TreeSampler:
+    def __init__(self, rootPid: int, phase: Callable[[], str], interval: float = 0.5):
+        self.rootPid = rootPid
+        self.phase = phase
+        self.interval = interval
+        self.peakRSS: dict[str, int] = {}
+        self.writtenBytes: dict[str, int] = {}
+        self._lastWritten: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        for pid in processTree(rootPid):
+            written = processWrittenBytes(pid)
+            if written is not None:
+                self._lastWritten[pid] = written
+
+    def sample(self):
+        phase = self.phase()
+        pids = processTree(self.rootPid)
+        rss = sum(processRSS(pid) for pid in pids)
+        self.peakRSS[phase] = max(self.peakRSS.get(phase, 0), rss)
+        for pid in pids:
+            written = processWrittenBytes(pid)
+            if written is not None:
+                delta = written - self._lastWritten.get(pid, 0)
+                self._lastWritten[pid] = written
+                self.writtenBytes[phase] = self.writtenBytes.get(phase, 0) + max(delta, 0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self) -> "TreeSampler":
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+# Structured timing and resource telemetry of a tool install.
+# Every phase becomes a span with its wall time, CPU time, peak RSS of the process tree and
+# bytes written. Phases run in Python (ref resolution, clone, checkout, submodule update) are
+# recorded with `span`, and the phases of the install shell command (build, configure, make,
+# install, ready-marker, ...) are told apart by the `dfr_phase` markers its builders emit.
+# The spans are appended as JSON lines to the telemetry log when the install ends
+# (see `common/telemetry_report.py` for a summary).
+class InstallTelemetry:
+    def __init__(self, logPath: str, tool: str, versionReq: str):
+        self.logPath = logPath
+        self.tool = tool
+        self.versionReq = versionReq
+        self.version = ""
+        self.status = "failed"
+        self.startTime = time.time()
+        self.spans: list[dict] = []
+
+    def _addSpan(self, phase: str, start: float, wall: float, cpu: float, peakRSS: int, writtenBytes: int):
+        for span in self.spans:
+            # a phase that occurs more than once is accumulated in a single span
+            if span["phase"] == phase:
+                span["wall"] += wall
+                span["cpu"] += cpu
+                span["peakRSS"] = max(span["peakRSS"], peakRSS)
+                span["bytesWritten"] += writtenBytes
+                return
+        self.spans.append(
+            {"phase": phase, "start": start, "wall": wall, "cpu": cpu, "peakRSS": peakRSS, "bytesWritten": writtenBytes}
+        )
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        start = time.time()
+        cpuStart = cpuTime()
+        with TreeSampler(os.getpid(), lambda: phase) as sampler:
+            try:
+                yield
+            finally:
+                wall = time.time() - start
+                cpu = cpuTime() - cpuStart
+        self._addSpan(phase, start, wall, cpu, sampler.peakRSS.get(phase, 0), sampler.writtenBytes.get(phase, 0))
+
+    # runs a shell script, recording a span for every phase of it, and returns its exit code.
+    # the script logs its phases (with `dfr_phase`) to the phase log given as DFR_PHASE_LOG, and
+    # each marker records the wall clock and the CPU time of the shell's reaped children.
+    def runShellCmd(self, script: str) -> int:
+        markerFD, markerPath = tempfile.mkstemp(prefix="dfr_phases_")
+        with os.fdopen(markerFD, "w") as file:
+            file.write(f"prepare {time.time()} 0 0\n")
+
+        def currentPhase() -> str:
+            try:
+                with open(markerPath) as file:
+                    markers = file.read().split("\n")
+                return markers[-2].split(" ", 1)[0] if len(markers) > 1 else "prepare"
+            except OSError:
+                return "prepare"
+
+        cpuStart = cpuTime(own=False)
+        try:
+            process = subprocess.Popen(script, shell=True, env=dict(os.environ, DFR_PHASE_LOG=markerPath))
+            with TreeSampler(process.pid, currentPhase) as sampler:
+                returncode = process.wait()
+            end = time.time()
+            cpuTotal = cpuTime(own=False) - cpuStart
+            with open(markerPath) as file:
+                markers = [line.split() for line in file.read().splitlines()]
+        finally:
+            os.remove(markerPath)
+        cpuSum = 0.0
+        for i, marker in enumerate(markers):
+            start = float(marker[1])
+            if i + 1 < len(markers):
+                wall = float(markers[i + 1][1]) - start
+                cpu = (sum(map(int, markers[i + 1][2:])) - sum(map(int, marker[2:]))) / _clockTicks
+            else:
+                wall = end - start
+                cpu = max(cpuTotal - cpuSum, 0.0)
+            cpuSum += cpu
+            self._addSpan(
+                marker[0], start, wall, cpu, sampler.peakRSS.get(marker[0], 0), sampler.writtenBytes.get(marker[0], 0)
+            )
+        return returncode
+
+    # appends the spans of the install to the telemetry log
+    def flush(self):
+        if not self.spans:
+            return
+        os.makedirs(os.path.dirname(self.logPath), exist_ok=True)
+        record = {"tool": self.tool, "versionReq": self.versionReq, "version": self.version, "status": self.status}
+        data = "".join(
+            json.dumps({"time": self.startTime, **record, **span}) + "\n" for span in self.spans
+        ).encode()
+        # a single append, so the records of concurrent installs do not interleave
+        fd = os.open(self.logPath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        self.spans = []
@@ -0,0 +1,85 @@
+from dfr_scripts.common import telemetryLog
+import json
+import sys
+
+# summarizes the install telemetry log: the slowest tools, the slowest phases overall,
+# and the slowest phases of each tool, across all past installs.
+# usage: telemetry_report.py [<number of rows>]
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+
+def size(n: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n < 1024:
+            return f"{n:.0f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TB"
+
+
+def duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.2f}h"
+
+
+spans: list[dict] = []
+try:
+    with open(telemetryLog) as file:
+        for line in file:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                pass
+except FileNotFoundError:
+    pass
+if not spans:
+    print(f"No install telemetry in {telemetryLog}")
+    sys.exit(0)
+
+# an install is identified by its tool and start time
+installs: dict[tuple[str, float], dict] = {}
+for span in spans:
+    install = installs.setdefault((span["tool"], span["time"]), {"wall": 0.0, "cpu": 0.0, "peakRSS": 0, "bytesWritten": 0})
+    install["wall"] += span["wall"]
+    install["bytesWritten"] += span.get("bytesWritten", 0)
+    install["cpu"] += span["cpu"]
+    install["peakRSS"] = max(install["peakRSS"], span["peakRSS"])
+
+
+def aggregate(groups: dict, key, span: dict):
+    group = groups.setdefault(key, {"count": 0, "wall": 0.0, "cpu": 0.0, "peakRSS": 0, "bytesWritten": 0})
+    group["count"] += 1
+    group["wall"] += span["wall"]
+    group["cpu"] += span["cpu"]
+    group["peakRSS"] = max(group["peakRSS"], span["peakRSS"])
+    group["bytesWritten"] += span.get("bytesWritten", 0)
+
+
+tools: dict = {}
+for (tool, _), install in installs.items():
+    aggregate(tools, tool, install)
+phases: dict = {}
+toolPhases: dict = {}
+for span in spans:
+    aggregate(phases, span["phase"], span)
+    aggregate(toolPhases, (span["tool"], span["phase"]), span)
+
+
+def printTable(title: str, groups: dict, name):
+    print(f"\n{title}")
+    print(f"  {'':<48} {'count':>6} {'avg wall':>9} {'avg cpu':>9} {'peak rss':>9} {'avg written':>12}")
+    ordered = sorted(groups.items(), key=lambda g: g[1]["wall"] / g[1]["count"], reverse=True)
+    for key, g in ordered[:rows]:
+        n = g["count"]
+        print(
+            f"  {name(key):<48} {n:>6} {duration(g['wall'] / n):>9} {duration(g['cpu'] / n):>9} "
+            f"{size(g['peakRSS']):>9} {size(g['bytesWritten'] / n):>12}"
+        )
+
+
+print(f"{len(installs)} installs, {len(spans)} spans in {telemetryLog}")
+printTable("Slowest tools (per install):", tools, lambda k: k)
+printTable("Slowest phases:", phases, lambda k: k)
+printTable("Slowest tool phases:", toolPhases, lambda k: f"{k[0]} {k[1]}")
@@ -0,0 +1,14 @@
+from dfr_scripts.common import Tools, flattenToolVersions
+import sys
+import yaml
+
+# prints the resolved dependency and sibling graph of the tools in a DFR configuration file.
+# usage: tool_graph.py <config.yaml> [json|dot]
+configPath, *formatOpt = sys.argv[1:]
+with open(configPath) as file:
+    config = yaml.safe_load(file) or {}
+graph = Tools(flattenToolVersions(config.get("tool_versions"))).graph
+if formatOpt == ["dot"]:
+    print(graph.toDOT())
+else:
+    print(graph.toJSON())
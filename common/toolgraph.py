@@ -0,0 +1,115 @@
+import json
+from collections import deque
+from typing import Callable, Optional
+
+
+class ToolGraphError(Exception):
+    # the offending path (e.g., the tools of a dependency cycle)
+    path: list[str]
+
+    def __init__(self, message: str, path: Optional[list[str]] = None):
+        super().__init__(message)
+        self.path = path or []
+
+
+# The static dependency and sibling graph of a tool configuration.
+# The graph is built once from the configured tools and expanded with the static dependencies
+# of every reachable tool (each one is queried exactly once). It provides a deterministic
+# topological order (dependencies first) in linear time, and reports dependency cycles and
+# missing siblings with the offending path.
+class ToolGraph:
+    # configured tools and their version requests, in configuration order
+    configured: dict[str, str]
+    # all reachable tools, in discovery order
+    nodes: list[str]
+    dependencies: dict[str, list[str]]
+    siblings: dict[str, list[str]]
+
+    def __init__(
+        self,
+        tool_versions_flat: dict[str, str],
+        depsOf: Callable[[str], set[str]],
+        siblingsOf: Callable[[str], set[str]],
+    ):
+        self.configured = dict(tool_versions_flat)
+        self.nodes = []
+        self.dependencies = {}
+        self.siblings = {}
+        queue = deque(self.configured.keys())
+        seen = set(queue)
+        while queue:
+            fullName = queue.popleft()
+            self.nodes.append(fullName)
+            self.dependencies[fullName] = sorted(depsOf(fullName))
+            self.siblings[fullName] = sorted(siblingsOf(fullName)) if fullName in self.configured else []
+            for dep in self.dependencies[fullName]:
+                if dep not in seen:
+                    seen.add(dep)
+                    queue.append(dep)
+
+    # all reachable tools ordered so that every tool comes after its dependencies.
+    # the order only depends on the configuration order and the tool names.
+    def order(self) -> list[str]:
+        ret: list[str] = []
+        # 1 = visiting (on the current path), 2 = done
+        state: dict[str, int] = {}
+        for root in self.configured:
+            if root in state:
+                continue
+            # iterative DFS, keeping the current path for cycle reports
+            path: list[str] = [root]
+            iters = [iter(self.dependencies[root])]
+            state[root] = 1
+            while iters:
+                dep = next(iters[-1], None)
+                if dep is None:
+                    iters.pop()
+                    done = path.pop()
+                    state[done] = 2
+                    ret.append(done)
+                elif state.get(dep) == 1:
+                    cycle = path[path.index(dep) :] + [dep]
+                    raise ToolGraphError(f"Dependency cycle: {' -> '.join(cycle)}", cycle)
+                elif dep not in state:
+                    state[dep] = 1
+                    path.append(dep)
+                    iters.append(iter(self.dependencies[dep]))
+        return ret
+
+    # the order restricted to the configured tools
+    def configuredOrder(self) -> list[str]:
+        return [n for n in self.order() if n in self.configured]
+
+    # paths (<tool> -> <sibling>) of configured tools whose siblings are not configured
+    def missingSiblings(self) -> list[list[str]]:
+        return [[n, s] for n in self.configured for s in self.siblings[n] if s not in self.configured]
+
+    def toDict(self) -> dict:
+        return {
+            "nodes": [
+                {
+                    "name": n,
+                    "versionReq": self.configured.get(n),
+                    "dependencies": self.dependencies[n],
+                    "siblings": self.siblings[n],
+                }
+                for n in self.nodes
+            ],
+            "order": self.order(),
+        }
+
+    def toJSON(self) -> str:
+        return json.dumps(self.toDict(), indent=2)
+
+    def toDOT(self) -> str:
+        lines = ["digraph tools {"]
+        for n in self.nodes:
+            style = "" if n in self.configured else " [style=dashed]"
+            lines.append(f'  "{n}"{style};')
+        for n in self.nodes:
+            for d in self.dependencies[n]:
+                lines.append(f'  "{n}" -> "{d}";')
+            for s in self.siblings[n]:
+                lines.append(f'  "{n}" -> "{s}" [style=dotted, arrowhead=none];')
+        lines.append("}")
+        return "\n".join(lines)
@@ -0,0 +1,168 @@
+import lzma
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+streamMagic = b"\xfd7zXZ\x00"
+footerMagic = b"YZ"
+
+
+# the size of the integrity check of a stream check id
+def _checkSize(checkId: int) -> int:
+    return 0 if checkId == 0 else 4 << ((checkId - 1) // 3)
+
+
+# decodes a multibyte integer of the xz format at `pos`, or returns None if it is incomplete
+def _varint(data: bytearray, pos: int) -> Optional[tuple[int, int]]:
+    value = 0
+    for i in range(9):
+        if pos + i >= len(data):
+            return None
+        value |= (data[pos + i] & 0x7F) << (7 * i)
+        if not data[pos + i] & 0x80:
+            return value, pos + i + 1
+    raise lzma.LZMAError("Invalid xz multibyte integer")
+
+
+def _encodeVarint(value: int) -> bytes:
+    ret = bytearray()
+    while value >= 0x80:
+        ret.append((value & 0x7F) | 0x80)
+        value >>= 7
+    ret.append(value)
+    return bytes(ret)
+
+
+# a standalone xz stream of a single block of another stream (same header, a one record index)
+def _blockStream(streamHeader: bytes, block: bytes, unpaddedSize: int, uncompressedSize: int) -> bytes:
+    index = b"\x00" + _encodeVarint(1) + _encodeVarint(unpaddedSize) + _encodeVarint(uncompressedSize)
+    index += b"\x00" * (-len(index) % 4)
+    index += struct.pack("<I", zlib.crc32(index))
+    footer = struct.pack("<I", len(index) // 4 - 1) + streamHeader[6:8]
+    return streamHeader + block + index + struct.pack("<I", zlib.crc32(footer)) + footer + footerMagic
+
+
+# Streaming decompression of xz data that decodes independent blocks in parallel.
+# Multi-threaded xz encoders (`xz -T`, `pixz`, ...) split the data into blocks that record their
+# compressed and uncompressed sizes in the block headers, so block boundaries are known while
+# streaming. Every such block is decoded on its own (as a standalone stream, so its integrity
+# check is verified) in a thread pool, and the output is written in order, a whole block per
+# write. A stream without block sizes (a single-threaded `xz`) is decoded sequentially.
+# Concatenated streams and stream padding are supported.
+class ParallelXZDecompressor:
+    def __init__(self, write: Callable[[bytes], object], threads: int = 0):
+        self.threads = threads or os.cpu_count() or 1
+        self._write = write
+        self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        # the decoded blocks in stream order (bounded, so memory use is bounded)
+        self._pending: deque[Future] = deque()
+        self._maxPending = self.threads * 2
+        self._buffer = bytearray()
+        self._state = "streamHeader"
+        self._streamHeader = b""
+        self._firstBlock = True
+        self._sequential: Optional[lzma.LZMADecompressor] = None
+        self.parallelBlocks = 0
+        self.sequentialStreams = 0
+
+    def _drain(self, all: bool = False):
+        while self._pending and (all or self._pending[0].done() or len(self._pending) > self._maxPending):
+            self._write(self._pending.popleft().result())
+
+    def _parse(self) -> bool:
+        buf = self._buffer
+        if self._state == "streamHeader":
+            # stream padding
+            while len(buf) >= 4 and buf[:4] == b"\x00\x00\x00\x00":
+                del buf[:4]
+            if len(buf) < 12:
+                return False
+            if buf[:6] != streamMagic:
+                raise lzma.LZMAError("Not an xz stream")
+            self._streamHeader = bytes(buf[:12])
+            del buf[:12]
+            self._state = "block"
+            self._firstBlock = True
+            return True
+        if self._state == "block":
+            if not buf:
+                return False
+            if buf[0] == 0:
+                self._state = "index"
+                return True
+            headerSize = (buf[0] + 1) * 4
+            if len(buf) < headerSize:
+                return False
+            flags = buf[1]
+            if flags & 0xC0 != 0xC0:
+                if not self._firstBlock:
+                    raise lzma.LZMAError("An xz block without sizes follows blocks with sizes")
+                # the whole stream is decoded sequentially
+                self._drain(all=True)
+                self._sequential = lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+                self._buffer = bytearray(self._streamHeader) + buf
+                self._state = "sequential"
+                self.sequentialStreams += 1
+                return True
+            compressedSize, pos = _varint(buf, 2)  # type: ignore
+            uncompressedSize, pos = _varint(buf, pos)  # type: ignore
+            checkSize = _checkSize(self._streamHeader[7] & 0x0F)
+            blockSize = headerSize + compressedSize + (-compressedSize % 4) + checkSize
+            if len(buf) < blockSize:
+                return False
+            stream = _blockStream(
+                self._streamHeader, bytes(buf[:blockSize]), headerSize + compressedSize + checkSize, uncompressedSize
+            )
+            del buf[:blockSize]
+            self._pending.append(self._executor.submit(lzma.decompress, stream, lzma.FORMAT_XZ))
+            self.parallelBlocks += 1
+            self._firstBlock = False
+            self._drain()
+            return True
+        if self._state == "index":
+            # the index of the original stream is skipped (every block was verified on its own)
+            count = _varint(buf, 1)
+            if count is None:
+                return False
+            pos = count[1]
+            for _ in range(count[0] * 2):
+                field = _varint(buf, pos)
+                if field is None:
+                    return False
+                pos = field[1]
+            indexSize = pos + (-pos % 4) + 4
+            if len(buf) < indexSize + 12:
+                return False
+            if buf[indexSize + 10 : indexSize + 12] != footerMagic:
+                raise lzma.LZMAError("Invalid xz stream footer")
+            del buf[: indexSize + 12]
+            self._state = "streamHeader"
+            return True
+        # sequential
+        if not buf:
+            return False
+        self._write(self._sequential.decompress(bytes(buf)))  # type: ignore
+        if self._sequential.eof:  # type: ignore
+            self._buffer = bytearray(self._sequential.unused_data)  # type: ignore
+            self._sequential = None
+            self._state = "streamHeader"
+        else:
+            self._buffer = bytearray()
+        return True
+
+    def feed(self, data: bytes):
+        self._buffer += data
+        while self._parse():
+            pass
+
+    # writes the remaining decoded data and checks that the xz data is complete
+    def close(self):
+        try:
+            self._drain(all=True)
+            if self._state != "streamHeader" or any(self._buffer):
+                raise lzma.LZMAError("Truncated xz data")
+        finally:
+            self._executor.shutdown(cancel_futures=True)
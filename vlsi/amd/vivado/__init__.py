@@ -2,8 +2,9 @@ import subprocess
 import shlex
 import os
 import shutil
+import tempfile
 import textwrap
-from dfr_scripts.common import AMDTool, Download
+from dfr_scripts.common import AMDTool, Download, downloadCache
 
 
 class SpecificTool(AMDTool):
@@ -36,14 +37,23 @@ class SpecificTool(AMDTool):
 
     installerFolder = "/tmp/amd"
     installerExec = f"{installerFolder}/xsetup"
-    installerConfig = f"{installerFolder}/install_config.txt"
     configGenDefaultFile = os.path.expanduser("~/.Xilinx/install_config.txt")
 
+    # the installer is extracted once into the download cache, and the installer folder links to it
     def extract(self, downloadedFilePath: str):
-        if os.path.exists(self.installerFolder):
+        def extractInstaller(cachedPath: str, tree: str):
+            os.chmod(cachedPath, 0o777)
+            subprocess.run(shlex.split(f"{cachedPath} --keep --noexec --target {tree}"), check=True)
+
+        tree = downloadCache.extractedTree(downloadedFilePath, extractInstaller)
+        self.removeInstallerFolder()
+        os.symlink(tree, self.installerFolder)
+
+    def removeInstallerFolder(self):
+        if os.path.islink(self.installerFolder):
+            os.remove(self.installerFolder)
+        elif os.path.exists(self.installerFolder):
             shutil.rmtree(self.installerFolder)
-        os.chmod(downloadedFilePath, 0o777)
-        subprocess.run(shlex.split(f"{downloadedFilePath} --keep --noexec --target {self.installerFolder}"))
 
     def postDownloadInstall(self, date: str, flags: str):
         if flags == "__GEN_CFG__":
@@ -56,27 +66,32 @@ class SpecificTool(AMDTool):
             template = f"{os.path.dirname(os.path.realpath(__file__))}/install_config_{self.versionLoc.version}.txt"
             with open(template, "r") as file:
                 lines = file.readlines()
-            with open(self.installerConfig, "w") as file:
-                for line in lines:
-                    if line.startswith("Destination="):
-                        line = f"Destination=/mnt/{self.versionLoc.toolMnt}/{self.domain}/{self.vendor}\n"
-                    file.write(line)
+            # the config is specific to the mount, so it is kept out of the (shared) cached installer
+            fd, installerConfig = tempfile.mkstemp(prefix="dfr-vivado-", suffix=".txt")
+            try:
+                with os.fdopen(fd, "w") as file:
+                    for line in lines:
+                        if line.startswith("Destination="):
+                            line = f"Destination=/mnt/{self.versionLoc.toolMnt}/{self.domain}/{self.vendor}\n"
+                        file.write(line)
 
-            subprocess.run(
-                textwrap.dedent(
-                    f"""
-                    set -e
-                    echo Running token generation...
-                    sudo {self.installerExec} -b AuthTokenGen
-                    echo Running setup...
-                    sudo {self.installerExec} -b Install -a XilinxEULA,3rdPartyEULA -c {self.installerConfig}
-                    sudo touch -a -m -t {date}0000 {self.installDirReadyFilePath()}
-                    """
-                ),
-                shell=True,
-            )
+                subprocess.run(
+                    textwrap.dedent(
+                        f"""
+                        set -e
+                        echo Running token generation...
+                        sudo {self.installerExec} -b AuthTokenGen
+                        echo Running setup...
+                        sudo {self.installerExec} -b Install -a XilinxEULA,3rdPartyEULA -c {installerConfig}
+                        sudo touch -a -m -t {date}0000 {self.installDirReadyFilePath()}
+                        """
+                    ),
+                    shell=True,
+                )
+            finally:
+                os.remove(installerConfig)
 
-        shutil.rmtree(self.installerFolder)
+        self.removeInstallerFolder()
 
     # removing default addition of vivado binary to path because this is handled by `settings64.sh`
     def env_path(self) -> list[str]:
@@ -9,8 +9,11 @@ class SpecificTool(GitOSSTool):
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase configure
                 autoreconf -vif
                 ./configure --disable-nls --prefix={self.installPath()}
+                dfr_phase make
                 make -j`nproc`
+                dfr_phase install
                 sudo make install
                 """
@@ -7,10 +7,13 @@ class SpecificTool(GitOSSTool):
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase configure
                 chmod +x autoconf.sh
                 ./autoconf.sh
                 ./configure --prefix={self.installPath()}
+                dfr_phase make
                 make -j`nproc`
+                dfr_phase install
                 sudo make install
                 """
 
@@ -8,6 +8,7 @@ class SpecificTool(GitOSSTool):
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase make
                 sudo ./build.sh -j`nproc` -prefix {self.installPath()} -without-qtbinding
                 """
 
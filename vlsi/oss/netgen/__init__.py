@@ -7,7 +7,10 @@ class SpecificTool(GitOSSTool):
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase configure
                 ./configure --prefix={self.installPath()}
+                dfr_phase make
                 make -j`nproc`
+                dfr_phase install
                 sudo make install
                 """
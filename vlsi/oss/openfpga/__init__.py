@@ -18,13 +18,18 @@ class SpecificTool(GitOSSTool):
     def recursiveClone(self) -> bool:
         return True
 
+    def usesCMake(self) -> bool:
+        return True
+
     def acceptCloneError(self) -> bool:
         return True
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         # CMAKE_FLAGS="-DOPENFPGA_WITH_YOSYS=OFF -DOPENFPGA_WITH_YOSYS_PLUGIN=OFF"
         return f"""
+                dfr_phase make
                 make all -j`nproc` 
+                dfr_phase install
                 sudo cp -avr . {self.installPath()}
                 """
 
@@ -33,3 +38,7 @@ class SpecificTool(GitOSSTool):
 
     def env_sources(self) -> list[str]:
         return [f"{self.linkedPath()}/openfpga.sh"]
+
+    # `openfpga.sh` defines the task shell functions (`run-task`, ...)
+    def env_sources_capturable(self) -> bool:
+        return False
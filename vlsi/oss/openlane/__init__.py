@@ -56,6 +56,7 @@ class SpecificTool(GitOSSTool):
                 rm -rf *.github
                 rm -rf designs
                 rm -rf docker
+                dfr_phase install
                 sudo cp -r * {self.installPath()}/
                 """
 
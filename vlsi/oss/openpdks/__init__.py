@@ -1,30 +1,35 @@
-import sys
-from dfr_scripts.common import GitOSSTool, downloadAvailable
+from dfr_scripts.common import GitOSSTool, downloadExtractShellCmd
 
 
 class SpecificTool(GitOSSTool):
     def __init__(self, versionReq: str):
         super().__init__("vlsi", "openpdks", versionReq, "https://github.com/RTimothyEdwards/open_pdks")
 
+    # the download itself probes the availability of the PDK (exit code 3 if not available)
     def pdkCmd(self, pdk: str) -> str:
         url = f"https://github.com/efabless/volare/releases/download/{pdk}-{self.versionLoc.version}/default.tar.xz"
-        if downloadAvailable(url):
-            return f"""
-                    cd {self.installPath()}
-                    curl -L {url} | sudo tar -xJC .
-                    """
-        else:
-            return ""
+        return f"""
+                if {downloadExtractShellCmd(url, self.installPath())}; then
+                  found=1
+                elif [ $? -ne 3 ]; then
+                  exit 1
+                fi
+                """
+
+    # the PDKs are downloads (of several GB), which the download cache keeps already
+    def packageCacheable(self) -> bool:
+        return False
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
-        sky130Cmd = self.pdkCmd("sky130")
-        gf180mcu = self.pdkCmd("gf180mcu")
-        if sky130Cmd == "" and gf180mcu == "":
-            print(f"Could not find PDK download link for {self.versionLoc.version}")
-            sys.exit(1)
         return f"""
-                {sky130Cmd}
-                {gf180mcu}
+                dfr_phase download
+                found=0
+                {self.pdkCmd("sky130")}
+                {self.pdkCmd("gf180mcu")}
+                if [ $found -eq 0 ]; then
+                  echo "Could not find PDK download link for {self.versionLoc.version}"
+                  exit 1
+                fi
                 """
 
     def env_path(self) -> list[str]:
@@ -8,12 +8,18 @@ class SpecificTool(GitOSSTool):
     def recursiveClone(self) -> bool:
         return True
 
+    def usesCMake(self) -> bool:
+        return True
+
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
                 mkdir -p build
                 cd build
+                dfr_phase configure
                 cmake .. -DCMAKE_INSTALL_PREFIX={self.installPath()}
+                dfr_phase make
                 make -j`nproc`  
+                dfr_phase install
                 sudo make install
                 """
 
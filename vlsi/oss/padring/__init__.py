@@ -7,9 +7,12 @@ class SpecificTool(GitOSSTool):
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase configure
                 bash ./bootstrap.sh 
                 cd build/ 
+                dfr_phase make
                 ninja
+                dfr_phase install
                 sudo mkdir -p {self.installPath()}/bin 
                 sudo cp padring {self.installPath()}/bin/
                 """
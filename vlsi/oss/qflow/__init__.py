@@ -7,9 +7,12 @@ class SpecificTool(GitOSSTool):
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase configure
                 ./configure
                 cd src
+                dfr_phase make
                 make vlog2Verilog && make vlog2Spice
+                dfr_phase install
                 sudo mkdir -p {self.installPath()}/bin
                 sudo cp vlog2Verilog {self.installPath()}/bin/
                 sudo cp vlog2Spice {self.installPath()}/bin/
@@ -8,12 +8,18 @@ class SpecificTool(GitOSSTool):
     def recursiveClone(self) -> bool:
         return True
 
+    def usesCMake(self) -> bool:
+        return True
+
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
                 mkdir -p build
                 cd build
+                dfr_phase configure
                 cmake -DCMAKE_BUILD_TYPE=Release -G "Unix Makefiles" ..
+                dfr_phase make
                 sudo make -j`nproc` install
+                dfr_phase install
                 sudo cp -r ../bin {self.installPath()}/
                 sudo cp -r ../lib {self.installPath()}/
                 sudo cp -r ../frameworks {self.installPath()}/
@@ -17,8 +17,13 @@ class SpecificTool(GitOSSTool):
     def recursiveClone(self) -> bool:
         return True
 
+    def usesCMake(self) -> bool:
+        return True
+
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase make
                 make PREFIX={self.installPath()} -j`nproc`
+                dfr_phase install
                 sudo make PREFIX={self.installPath()} install
                 """
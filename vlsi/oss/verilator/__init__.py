@@ -9,9 +9,12 @@ class SpecificTool(GitOSSTool):
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
                 unset VERILATOR_ROOT
+                dfr_phase configure
                 autoconf         
                 ./configure --prefix {self.installPath()}
+                dfr_phase make
                 make -j`nproc`  
+                dfr_phase install
                 sudo make install
                 """
 
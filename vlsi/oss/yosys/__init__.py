@@ -1,4 +1,4 @@
-from dfr_scripts.common import GitOSSTool
+from dfr_scripts.common import GitOSSTool, compilerCache
 
 
 class SpecificTool(GitOSSTool):
@@ -6,8 +6,13 @@ class SpecificTool(GitOSSTool):
         super().__init__("vlsi", "yosys", versionReq, "https://github.com/YosysHQ/yosys")
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
+        # yosys sets its own compiler, so the compiler cache is enabled with its make options
+        cacheOpt = f"ENABLE_{compilerCache.launcher.upper()}=1" if compilerCache else ""
         return f"""
+                dfr_phase configure
                 make PREFIX={self.installPath()} config-gcc
-                make PREFIX={self.installPath()} -j`nproc`
+                dfr_phase make
+                make PREFIX={self.installPath()} {cacheOpt} -j`nproc`
+                dfr_phase install
                 sudo make PREFIX={self.installPath()} install
                 """
@@ -10,6 +10,8 @@ class SpecificTool(GitOSSTool):
 
     def buildAndInstallShellCmd(self, flags: str) -> str:
         return f"""
+                dfr_phase make
                 make PREFIX={self.installPath()} -j`nproc`
+                dfr_phase install
                 sudo make PREFIX={self.installPath()} install
                 """